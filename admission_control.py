@@ -0,0 +1,192 @@
+"""
+Admission Control for Ubuntu Chrome Automation
+Holds browser launches while the host is short on memory, /dev/shm or CPU
+"""
+
+import threading
+import time
+from typing import Optional, Dict, Any, Tuple
+
+from browser_supervisor import browser_supervisor
+from system_metrics import system_sampler, format_bytes
+from config import ADMISSION_CONFIG
+
+MB = 1024 * 1024
+
+
+class AdmissionController:
+    """Admits a new Chrome only when the host can hold it without swapping"""
+    
+    def __init__(self):
+        self.enabled = ADMISSION_CONFIG["enabled"]
+        self.min_available_memory = ADMISSION_CONFIG["min_available_memory_mb"] * MB
+        self.max_shm_percent = ADMISSION_CONFIG["max_shm_percent"]
+        self.max_load_per_cpu = ADMISSION_CONFIG["max_load_per_cpu"]
+        self.launch_wait_timeout = ADMISSION_CONFIG["launch_wait_timeout"]
+        self.lock = threading.Lock()
+        self._reservations: Dict[int, Dict[str, Any]] = {}
+        self._next_reservation = 0
+        self.last_decision: Dict[str, Any] = {"admitted": True, "reason": None}
+        self.denied_count = 0
+    
+    def estimate_browser_memory(self) -> int:
+        """Estimate memory of one more browser from the ones already running"""
+        browsers = [b for b in browser_supervisor.get_status()["browsers"] if b["alive"] and b["rss_mb"] > 0]
+        if browsers:
+            return int(sum(b["rss_mb"] for b in browsers) / len(browsers) * MB)
+        return ADMISSION_CONFIG["browser_memory_estimate_mb"] * MB
+    
+    def check(self) -> Tuple[bool, Optional[str]]:
+        """
+        Check whether another browser may be launched (without reserving memory for it)
+        
+        Returns:
+            (admitted, reason) where reason explains a denial
+        """
+        admitted, reason, _ = self._decide(reserve=False)
+        return admitted, reason
+    
+    def _decide(self, reserve: bool) -> Tuple[bool, Optional[str], Optional[int]]:
+        """
+        Admission decision, reserving the browser's memory in the same locked step
+        
+        Concurrent launches see each other's reservations, so they cannot all
+        be admitted against the same free memory.
+        
+        Returns:
+            (admitted, reason, reservation ID when reserved)
+        """
+        snapshot = system_sampler.get_snapshot()
+        browser_memory = self.estimate_browser_memory()
+        
+        with self.lock:
+            # Launched browsers are visible in samples taken after their launch,
+            # launches still in progress are not visible yet
+            self._reservations = {
+                reservation_id: reservation for reservation_id, reservation in self._reservations.items()
+                if reservation["launched_at"] is None or reservation["launched_at"] > snapshot["sampled_at"]
+            }
+            reserved = sum(reservation["memory"] for reservation in self._reservations.values())
+            
+            reason = None
+            if self.enabled:
+                available = snapshot["memory"]["available_bytes"] - reserved
+                if available - browser_memory < self.min_available_memory:
+                    reason = (f"memory: {format_bytes(available)} available, "
+                              f"{format_bytes(browser_memory + self.min_available_memory)} needed")
+                
+                shm = snapshot.get("shm")
+                if not reason and shm and shm["used_percent"] > self.max_shm_percent:
+                    reason = f"shm: {shm['used_percent']}% used"
+                
+                cpu = snapshot["cpu"]
+                load_per_cpu = cpu["load_1m"] / cpu["count"]
+                if not reason and load_per_cpu > self.max_load_per_cpu:
+                    reason = f"cpu: load {load_per_cpu:.2f} per CPU"
+            
+            admitted = reason is None
+            reservation_id = None
+            if admitted and reserve:
+                self._next_reservation += 1
+                reservation_id = self._next_reservation
+                self._reservations[reservation_id] = {"memory": browser_memory, "launched_at": None}
+            if not admitted:
+                self.denied_count += 1
+            self.last_decision = {
+                "admitted": admitted,
+                "reason": reason,
+                "checked_at": time.time()
+            }
+        return admitted, reason, reservation_id
+    
+    def admit_dispatch(self) -> Optional[int]:
+        """
+        Admit a queued job's browser before the job is dispatched
+        
+        The memory stays reserved as a ticket; the next launch takes it
+        over in wait_for_admission instead of deciding again, so an admitted
+        job never waits for (or fails on) admission while starting.
+        
+        Returns:
+            Ticket (reservation ID), None if the job must stay queued
+        """
+        admitted, _, reservation_id = self._decide(reserve=True)
+        if not admitted:
+            return None
+        with self.lock:
+            self._reservations[reservation_id]["ticket"] = True
+        return reservation_id
+    
+    def release_ticket(self, reservation_id: Optional[int]):
+        """Give back a dispatch ticket no launch has taken over (e.g. a reused pooled browser)"""
+        with self.lock:
+            reservation = self._reservations.get(reservation_id)
+            if reservation and reservation.get("ticket"):
+                del self._reservations[reservation_id]
+    
+    def _take_ticket(self) -> Optional[int]:
+        with self.lock:
+            for reservation_id, reservation in self._reservations.items():
+                if reservation.get("ticket"):
+                    reservation["ticket"] = False
+                    return reservation_id
+        return None
+    
+    def record_launch(self, reservation_id: int):
+        """Keep a reservation until the next sample sees the launched browser"""
+        with self.lock:
+            reservation = self._reservations.get(reservation_id)
+            if reservation:
+                reservation["launched_at"] = time.time()
+    
+    def release(self, reservation_id: Optional[int]):
+        """Give back the memory of a launch that failed"""
+        with self.lock:
+            self._reservations.pop(reservation_id, None)
+    
+    def wait_for_admission(self, timeout: float = None) -> Optional[int]:
+        """
+        Block until a launch is admitted or timeout expires, taking over a dispatch ticket if one is open
+        
+        Returns:
+            Reservation ID to pass to record_launch (or release on failure),
+            None if the launch was not admitted
+        """
+        ticket = self._take_ticket()
+        if ticket is not None:
+            return ticket
+        
+        timeout = timeout if timeout is not None else self.launch_wait_timeout
+        deadline = time.time() + timeout
+        reported = False
+        
+        while True:
+            admitted, reason, reservation_id = self._decide(reserve=True)
+            if admitted:
+                return reservation_id
+            if not reported:
+                print(f"⏳ Browser başlatma bekletiliyor - {reason}")
+                reported = True
+            if time.time() >= deadline:
+                print(f"❌ Browser başlatma kabul edilmedi: {reason}")
+                return None
+            time.sleep(min(system_sampler.interval, max(0.0, deadline - time.time())))
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get last decision and limits"""
+        with self.lock:
+            return {
+                "enabled": self.enabled,
+                "last_decision": dict(self.last_decision),
+                "denied_count": self.denied_count,
+                "browser_memory_estimate_mb": round(self.estimate_browser_memory() / MB),
+                "limits": {
+                    "min_available_memory_mb": self.min_available_memory // MB,
+                    "max_shm_percent": self.max_shm_percent,
+                    "max_load_per_cpu": self.max_load_per_cpu
+                }
+            }
+
+
+# Process-wide admission controller shared by scheduler and Chrome manager
+admission_controller = AdmissionController()
@@ -6,15 +6,23 @@ PRD'deki 3. API endpoint yapısına göre tasarlandı
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 import asyncio
 import time
 from datetime import datetime
 import uuid
+from functools import partial
 
 from chrome_automation import ChromeAutomation
 from session_manager import SessionManager
+from system_metrics import system_sampler
+from metrics import registry, STEP_DURATION, LIVE_BROWSERS
+from browser_supervisor import browser_supervisor
+from display_pool import display_pool
+from job_events import job_events
+from config import SUPERVISOR_CONFIG, CHROME_CONFIG, JOB_PROGRESS_CONFIG
 
 # FastAPI app
 app = FastAPI(
@@ -35,6 +43,7 @@ app.add_middleware(
 # In-memory job storage (production'da Redis kullanılmalı)
 jobs = {}
 active_sessions = {}
+LIVE_BROWSERS.set_function(lambda: len(browser_supervisor.browsers))
 
 # Pydantic models
 class GoogleFlowRequest(BaseModel):
@@ -87,12 +96,16 @@ async def run_automation(job_id: str, prompt: str, user_id: str):
             job["currentStep"] = step
             job["progress"] = progress
             print(f"Job {job_id}: {step} - Progress: {progress}%")
+            job_events.publish(job_id)
         
-        # Automation'ı çalıştır
-        success = automation.start_test(
+        # Automation'ı çalıştır (event loop'u bloklamadan, progress bu sırada okunabilsin)
+        loop = asyncio.get_running_loop()
+        success = await loop.run_in_executor(None, partial(
+            automation.start_test,
             user_id=user_id or "api_user",
-            prompt=prompt
-        )
+            prompt=prompt,
+            progress_callback=progress_callback
+        ))
         
         if success:
             job["status"] = "completed"
@@ -106,6 +119,7 @@ async def run_automation(job_id: str, prompt: str, user_id: str):
         
         # Cleanup
         automation.close_browser()
+        job_events.publish(job_id)
         
         # Callback gönder (eğer varsa)
         if job.get("callbackUrl"):
@@ -117,12 +131,41 @@ async def run_automation(job_id: str, prompt: str, user_id: str):
         job["error"] = str(e)
         job["failedAt"] = datetime.now().isoformat()
         print(f"Automation error for job {job_id}: {e}")
+        job_events.publish(job_id)
+
+@app.on_event("startup")
+async def start_background_services():
+    """Background servisleri başlat"""
+    system_sampler.start()
+    if SUPERVISOR_CONFIG["reap_orphans_on_startup"]:
+        browser_supervisor.reap_orphans()
+    if not CHROME_CONFIG["headless"]:
+        display_pool.start()
+        browser_supervisor.check_callbacks.append(display_pool.maintain)
+    browser_supervisor.start()
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    """Background servisleri durdur"""
+    browser_supervisor.stop()
+    display_pool.stop()
+    system_sampler.stop()
+
+# Metrics endpoint
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics endpoint"""
+    return PlainTextResponse(registry.render(), media_type=registry.content_type)
 
 # Health check endpoint
 @app.get("/api/v1/system/health", response_model=HealthStatus)
 async def get_system_health():
     """Sistem sağlık durumunu kontrol eder"""
     try:
+        # Cached snapshot, probe maliyeti yok denecek kadar az
+        snapshot = system_sampler.get_snapshot()
+        summary = system_sampler.get_summary()
+        
         health_status = {
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
@@ -135,12 +178,19 @@ async def get_system_health():
                 "chromeBrowser": {
                     "status": "available",
                     "version": "120.0.6099.109",
-                    "instances": len(active_sessions)
+                    "instances": len(active_sessions),
+                    "processes": summary["chromeProcesses"],
+                    "memory": summary["chromeMemory"]
                 },
                 "system": {
-                    "cpu": "15%",  # System monitoring'den alınacak
-                    "memory": "2.1GB/8GB",
-                    "disk": "45GB/100GB"
+                    "cpu": summary["cpu"],
+                    "memory": summary["memory"],
+                    "disk": summary["disk"],
+                    "load": summary["load"],
+                    "profilesSize": summary["profilesSize"],
+                    "downloadsSize": summary["downloadsSize"],
+                    "sampledAt": summary["sampledAt"],
+                    "details": snapshot
                 }
             }
         }
@@ -236,13 +286,29 @@ async def start_google_flow_automation(
             }
         )
 
+def job_progress(job_id: str) -> Optional[Dict[str, Any]]:
+    """Long-poll'un karşılaştırdığı job durumu"""
+    job = jobs.get(job_id)
+    if not job:
+        return None
+    return {"status": job["status"], "progress": job.get("progress"), "currentStep": job.get("currentStep")}
+
 # Job status endpoint
 @app.get("/api/v1/automation/status/{job_id}", response_model=JobStatus)
-async def get_job_status(job_id: str):
-    """Belirli bir job'ın durumunu sorgular"""
+async def get_job_status(job_id: str, wait: float = 0):
+    """Belirli bir job'ın durumunu sorgular (?wait=N: job değişene kadar en fazla N saniye bekler)"""
     try:
         job = jobs.get(job_id)
         
+        if job and wait > 0:
+            await job_events.wait_for_change(
+                job_id,
+                partial(job_progress, job_id),
+                job_progress(job_id),
+                min(wait, JOB_PROGRESS_CONFIG["max_wait_seconds"])
+            )
+            job = jobs.get(job_id)
+        
         if not job:
             raise HTTPException(
                 status_code=404,
@@ -395,10 +461,11 @@ async def send_callback(url: str, job: Dict[str, Any]):
     try:
         import aiohttp
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=job) as response:
-                if response.status != 200:
-                    print(f"Callback failed: {response.status} {response.status_text}")
+        with STEP_DURATION.time(step="callback_delivery"):
+            async with aiohttp.ClientSession() as session:
+                async with session.post(url, json=job) as response:
+                    if response.status != 200:
+                        print(f"Callback failed: {response.status} {response.status_text}")
                     
     except Exception as e:
         print(f"Callback error: {e}")
@@ -0,0 +1,248 @@
+"""
+Browser Download Tracker for Ubuntu Chrome Automation
+Follows downloads made by Chrome through CDP events instead of polling the downloads directory
+"""
+
+import errno
+import hashlib
+import mimetypes
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from cdp_client import cdp_sessions, CDPSession
+from config import BROWSER_DOWNLOAD_CONFIG, DOWNLOADS_DIR, DOWNLOADED_VIDEOS_DIR
+from static_cache import static_cache
+from video_downloader import safe_filename
+
+# Opens the video URL in the tab, the browser requests it with its own cookies.
+# <a download> is ignored for cross-origin URLs, so the response is turned
+# into an attachment by the tracker's Fetch interception instead.
+TRIGGER_DOWNLOAD_SCRIPT = "window.location.assign(arguments[0]);"
+
+# Response content types of a video navigation that would otherwise be played
+DOWNLOADABLE_TYPES = ("video/", "application/octet-stream", "binary/octet-stream")
+
+
+class BrowserDownloadTracker:
+    """
+    Sends a browser's downloads to a per-job directory and reports their completion
+    
+    Files are saved under their download GUID ("allowAndName"), so
+    parallel downloads never collide and the finished file is found
+    without listing the directory.
+    """
+    
+    def __init__(self, session: CDPSession, download_dir: Path):
+        self.session = session
+        self.download_dir = Path(download_dir)
+        self.downloads: Dict[str, Dict[str, Any]] = {}
+        self.began = threading.Event()
+        self.lock = threading.Lock()
+        self.attachment_url: Optional[str] = None
+        self.attachment_name: Optional[str] = None
+    
+    @classmethod
+    def attach(cls, driver, job_id: str) -> Optional["BrowserDownloadTracker"]:
+        """Start tracking a browser's downloads for a job, None when it has no CDP session"""
+        session = cdp_sessions.get(driver)
+        if not session:
+            return None
+        tracker = cls(session, DOWNLOADS_DIR / safe_filename(job_id))
+        try:
+            tracker.start()
+            return tracker
+        except Exception as e:
+            print(f"⚠️ Browser download takibi başlatılamadı: {e}")
+            tracker.stop()
+            return None
+    
+    def start(self):
+        self.download_dir.mkdir(parents=True, exist_ok=True)
+        self.session.on("Browser.downloadWillBegin", self._on_will_begin)
+        self.session.on("Browser.downloadProgress", self._on_progress)
+        self.session.send("Browser.setDownloadBehavior", {
+            "behavior": "allowAndName",
+            "downloadPath": str(self.download_dir),
+            "eventsEnabled": True
+        })
+    
+    def force_attachment(self, url: str, filename: str):
+        """
+        Make the browser download the URL's response instead of displaying it
+        
+        Document responses are paused at the response stage and the video
+        gets Content-Disposition: attachment. Fetch.enable replaces the
+        session's patterns, so the static cache's patterns are kept in it.
+        """
+        self.attachment_url = url
+        self.attachment_name = filename
+        self.session.on("Fetch.requestPaused", self._on_request_paused)
+        patterns = static_cache.patterns_for(self.session) + [
+            {"urlPattern": "*", "resourceType": "Document", "requestStage": "Response"}
+        ]
+        self.session.send("Fetch.enable", {"patterns": patterns})
+    
+    def _on_request_paused(self, params: Dict[str, Any]):
+        if params.get("resourceType") != "Document":
+            return
+        request_id = params["requestId"]
+        headers = [
+            header for header in params.get("responseHeaders", [])
+            if header["name"].lower() != "content-disposition"
+        ]
+        content_type = next((header["value"] for header in headers if header["name"].lower() == "content-type"), "")
+        # Signed links may redirect, the final response is recognized by its type
+        is_video = params["request"]["url"] == self.attachment_url or content_type.lower().startswith(DOWNLOADABLE_TYPES)
+        try:
+            if self.attachment_url and is_video and params.get("responseStatusCode") == 200:
+                headers.append({"name": "Content-Disposition", "value": f'attachment; filename="{self.attachment_name}"'})
+                self.session.send("Fetch.continueResponse", {
+                    "requestId": request_id,
+                    "responseCode": 200,
+                    "responseHeaders": headers
+                }, wait=False)
+                return
+        except Exception as e:
+            print(f"⚠️ İndirme başlığı eklenemedi: {e}")
+        self.session.send("Fetch.continueRequest", {"requestId": request_id}, wait=False)
+    
+    def stop(self):
+        """Stop tracking and give the (pooled) browser its default download behavior back"""
+        self.session.off("Browser.downloadWillBegin", self._on_will_begin)
+        self.session.off("Browser.downloadProgress", self._on_progress)
+        if self.attachment_url:
+            self.session.off("Fetch.requestPaused", self._on_request_paused)
+            self.attachment_url = None
+            try:
+                patterns = static_cache.patterns_for(self.session)
+                if patterns:
+                    self.session.send("Fetch.enable", {"patterns": patterns})
+                else:
+                    self.session.send("Fetch.disable", {})
+            except Exception:
+                pass
+        try:
+            self.session.send("Browser.setDownloadBehavior", {"behavior": "default"})
+        except Exception:
+            pass
+        # Moved files are gone already, only partial or failed downloads remain
+        shutil.rmtree(self.download_dir, ignore_errors=True)
+    
+    def _on_will_begin(self, params: Dict[str, Any]):
+        with self.lock:
+            self.downloads[params["guid"]] = {
+                "guid": params["guid"],
+                "url": params.get("url"),
+                "suggested_filename": params.get("suggestedFilename"),
+                "state": "inProgress",
+                "received": 0,
+                "total": 0,
+                "done": threading.Event()
+            }
+        self.began.set()
+    
+    def _on_progress(self, params: Dict[str, Any]):
+        with self.lock:
+            download = self.downloads.get(params["guid"])
+        if not download:
+            return
+        download["received"] = params.get("receivedBytes", download["received"])
+        download["total"] = params.get("totalBytes", download["total"])
+        download["state"] = params["state"]
+        if params["state"] in ("completed", "canceled"):
+            download["done"].set()
+    
+    def wait(self, start_timeout: float = None, timeout: float = None) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the first download to finish
+        
+        Returns:
+            Completed download with its path, None if it did not start, failed or timed out
+        """
+        start_timeout = start_timeout if start_timeout is not None else BROWSER_DOWNLOAD_CONFIG["start_timeout"]
+        timeout = timeout if timeout is not None else BROWSER_DOWNLOAD_CONFIG["timeout"]
+        if not self.began.wait(start_timeout):
+            print("❌ Browser indirmeyi başlatmadı")
+            return None
+        
+        with self.lock:
+            download = next(iter(self.downloads.values()))
+        if not download["done"].wait(timeout):
+            print(f"❌ Browser indirmesi zaman aşımına uğradı ({download['received']} byte)")
+            try:
+                self.session.send("Browser.cancelDownload", {"guid": download["guid"]})
+            except Exception:
+                pass
+            return None
+        if download["state"] != "completed":
+            print("❌ Browser indirmesi iptal edildi")
+            return None
+        return {**download, "path": self.download_dir / download["guid"]}
+    
+    def move_to_media(self, download: Dict[str, Any], name: str, target_dir: Path = None) -> Dict[str, Any]:
+        """
+        Move a finished download into the media directory with a rename
+        
+        Returns:
+            {"filename", "path", "size", "sha256", "content_type"}
+        """
+        suggested = download.get("suggested_filename") or ""
+        extension = Path(suggested).suffix.lower() or ".mp4"
+        filename = f"{safe_filename(name)}{extension}"
+        target = Path(target_dir or DOWNLOADED_VIDEOS_DIR) / filename
+        
+        try:
+            os.replace(download["path"], target)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Downloads and media live on different filesystems
+            print(f"⚠️ {DOWNLOADS_DIR} ve media aynı dosya sisteminde değil, dosya kopyalanıyor")
+            shutil.move(str(download["path"]), str(target))
+        
+        hasher = hashlib.sha256()
+        with open(target, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                hasher.update(chunk)
+        
+        size = target.stat().st_size
+        print(f"✅ Browser indirmesi taşındı: {filename} ({size} byte)")
+        return {
+            "filename": filename,
+            "path": str(target),
+            "size": size,
+            "sha256": hasher.hexdigest(),
+            "content_type": mimetypes.guess_type(filename)[0]
+        }
+
+
+def download_in_browser(driver, url: str, name: str) -> Optional[Dict[str, Any]]:
+    """
+    Download a video through the browser and move it into the media directory
+    
+    Args:
+        driver: WebDriver of a page whose cookies can fetch the video
+        url: Video URL
+        name: File name without extension (e.g. the job ID)
+    
+    Returns:
+        Stored file like VideoDownloader.download, None on failure
+    """
+    tracker = BrowserDownloadTracker.attach(driver, name)
+    if not tracker:
+        return None
+    try:
+        tracker.force_attachment(url, f"{safe_filename(name)}.mp4")
+        driver.execute_script(TRIGGER_DOWNLOAD_SCRIPT, url)
+        download = tracker.wait()
+        if not download:
+            return None
+        return tracker.move_to_media(download, name)
+    except Exception as e:
+        print(f"❌ Browser indirme hatası: {e}")
+        return None
+    finally:
+        tracker.stop()
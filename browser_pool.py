@@ -0,0 +1,182 @@
+"""
+Browser Pool for Ubuntu Chrome Automation
+Keeps logged-in browsers alive between jobs, one profile slot per browser
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Dict, Any, List
+
+from chrome_manager import ChromeDriverManager
+from browser_supervisor import BrowserSupervisor, browser_supervisor
+from config import SUPERVISOR_CONFIG, PREWARM_CONFIG
+
+# Opens (or keeps alive) credentialed connections without waiting for responses
+PREWARM_SCRIPT = """
+for (const origin of arguments[0]) {
+    fetch(origin + "/", {method: "HEAD", mode: "no-cors", credentials: "include", cache: "no-store"})
+        .catch(() => {});
+}
+"""
+
+
+class BrowserPool:
+    """Reuses logged-in browsers between jobs and recycles them through the supervisor"""
+    
+    def __init__(self, chrome_manager: ChromeDriverManager = None, supervisor: BrowserSupervisor = None):
+        self.chrome_manager = chrome_manager or ChromeDriverManager()
+        self.supervisor = supervisor or browser_supervisor
+        self.max_idle_seconds = SUPERVISOR_CONFIG["max_idle_seconds"]
+        self.idle: List[Dict[str, Any]] = []
+        self.leased: Dict[int, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.supervisor.check_callbacks.append(self.maintain)
+    
+    def lease(self, profile_name: str = None):
+        """
+        Lease a browser for a profile
+        
+        Reuses an idle browser of the profile if one is alive, otherwise
+        launches a new one in a free profile slot.
+        
+        Returns:
+            Driver or None if launching failed
+        """
+        base_profile = profile_name or f"chrome-profile-{os.getpid()}"
+        
+        while True:
+            with self.lock:
+                entry = next(
+                    (e for e in reversed(self.idle) if self._slot_base(e["profile"]) == base_profile),
+                    None
+                )
+                if entry:
+                    self.idle.remove(entry)
+                    self.leased[id(entry["driver"])] = entry
+            if not entry:
+                break
+            if self._is_responsive(entry["driver"]) and not self.supervisor.get_recycle_reason(entry["driver"]):
+                print(f"♻️ Havuzdaki browser yeniden kullanılıyor: {entry['profile']}")
+                if self._prewarm_due(entry):
+                    self.prewarm(entry)
+                return entry["driver"]
+            self._close(entry, "unresponsive")
+        
+        with self.lock:
+            used = {e["profile"] for e in self.idle} | {e["profile"] for e in self.leased.values()}
+            slot = 1
+            profile = base_profile
+            while profile in used:
+                slot += 1
+                profile = f"{base_profile}-slot{slot}"
+            # Reserve the slot while Chrome starts
+            placeholder = {"driver": None, "profile": profile, "released_at": None}
+            self.leased[id(placeholder)] = placeholder
+        
+        driver = self.chrome_manager.setup_chrome_driver(profile_name=profile)
+        with self.lock:
+            del self.leased[id(placeholder)]
+            if driver:
+                self.leased[id(driver)] = {"driver": driver, "profile": profile, "released_at": None}
+        return driver
+    
+    def release(self, driver):
+        """Return a browser to the pool, recycling it if the supervisor says so"""
+        if not driver:
+            return
+        
+        self.supervisor.record_job(driver)
+        with self.lock:
+            entry = self.leased.pop(id(driver), None)
+        if not entry:
+            # Browser launched outside the pool (e.g. a standby browser)
+            profile = self.supervisor.get_profile(driver) or f"chrome-profile-{os.getpid()}"
+            entry = {"driver": driver, "profile": profile, "released_at": None}
+        
+        # The job just used the connections, they count as warm
+        entry["prewarmed_at"] = time.time()
+        reason = self.supervisor.get_recycle_reason(driver)
+        if reason:
+            self._close(entry, reason)
+            return
+        
+        entry["released_at"] = time.time()
+        with self.lock:
+            self.idle.append(entry)
+    
+    def _prewarm_due(self, entry: Dict[str, Any]) -> bool:
+        if not PREWARM_CONFIG["enabled"]:
+            return False
+        return time.time() - entry.get("prewarmed_at", 0) > PREWARM_CONFIG["interval_seconds"]
+    
+    def prewarm(self, entry: Dict[str, Any]):
+        """Open connections to Flow and login origins from an idle browser's page"""
+        try:
+            # about:blank and data: pages have no origin to send credentialed requests from
+            if not entry["driver"].current_url.startswith("http"):
+                return
+            entry["driver"].execute_script(PREWARM_SCRIPT, PREWARM_CONFIG["origins"])
+            entry["prewarmed_at"] = time.time()
+        except Exception as e:
+            print(f"⚠️ Bağlantı ön ısıtma hatası ({entry['profile']}): {e}")
+    
+    def maintain(self):
+        """Close idle browsers that are unhealthy or idle for too long, keep the rest warm"""
+        now = time.time()
+        with self.lock:
+            candidates = list(self.idle)
+        
+        for entry in candidates:
+            reason = self.supervisor.get_recycle_reason(entry["driver"])
+            if not reason and now - entry["released_at"] > self.max_idle_seconds:
+                reason = "idle"
+            if not reason:
+                if self._prewarm_due(entry):
+                    self.prewarm(entry)
+                continue
+            with self.lock:
+                if entry not in self.idle:
+                    continue
+                self.idle.remove(entry)
+            self._close(entry, reason)
+    
+    def close_all(self):
+        """Close every idle browser"""
+        with self.lock:
+            entries = list(self.idle)
+            self.idle.clear()
+        for entry in entries:
+            self._close(entry, "shutdown")
+    
+    def _close(self, entry: Dict[str, Any], reason: str):
+        print(f"♻️ Browser kapatılıyor ({reason}): {entry['profile']}")
+        with self.lock:
+            self.leased.pop(id(entry["driver"]), None)
+        try:
+            entry["driver"].quit()
+        except Exception as e:
+            print(f"⚠️ Browser kapatma hatası: {e}")
+        finally:
+            self.supervisor.cleanup(entry["driver"])
+    
+    @staticmethod
+    def _slot_base(profile: str) -> str:
+        return re.sub(r"-slot\d+$", "", profile)
+    
+    @staticmethod
+    def _is_responsive(driver) -> bool:
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get idle and leased browser counts"""
+        with self.lock:
+            return {
+                "idle": [e["profile"] for e in self.idle],
+                "leased": [e["profile"] for e in self.leased.values()]
+            }
@@ -0,0 +1,322 @@
+"""
+Browser Supervisor for Ubuntu Chrome Automation
+Tracks Chrome process trees, recycles heavy or worn-out browsers and reaps orphans
+"""
+
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Set, Tuple, Callable
+
+from system_metrics import (
+    system_sampler, read_all_processes, read_process_stat, get_process_tree, CHROME_PROCESS_NAMES, PROC_DIR
+)
+from display_pool import display_pool
+from cdp_client import cdp_sessions
+from config import SUPERVISOR_CONFIG, PROFILES_DIR
+
+OWNER_FILE = ".owner_pid"
+
+
+def read_cmdline(pid: int) -> List[str]:
+    """Read command line arguments of a process"""
+    try:
+        with open(PROC_DIR / str(pid) / "cmdline", "rb") as f:
+            return [arg.decode(errors="replace") for arg in f.read().split(b"\0") if arg]
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return []
+
+
+def is_process_alive(pid: int) -> bool:
+    """Check if a process exists and is not a zombie"""
+    try:
+        with open(PROC_DIR / str(pid) / "stat") as f:
+            data = f.read()
+        return data[data.rindex(")") + 2] != "Z"
+    except (FileNotFoundError, ProcessLookupError, PermissionError, ValueError, IndexError):
+        return False
+
+
+def read_owner_file(profile_path: Path) -> Tuple[Optional[int], Set[int]]:
+    """Get the owner PID of a profile and the browser PIDs recorded with it"""
+    try:
+        pids = [int(line) for line in (Path(profile_path) / OWNER_FILE).read_text().split()]
+    except (OSError, ValueError):
+        return None, set()
+    return (pids[0], set(pids[1:])) if pids else (None, set())
+
+
+def kill_processes(pids: List[int], timeout: float = None) -> int:
+    """Terminate processes, killing the ones that survive SIGTERM"""
+    timeout = timeout if timeout is not None else SUPERVISOR_CONFIG["kill_timeout"]
+    alive = [pid for pid in pids if pid != os.getpid() and is_process_alive(pid)]
+    for pid in alive:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
+    
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        reap_zombies()
+        if not any(is_process_alive(pid) for pid in alive):
+            break
+        time.sleep(0.1)
+    
+    for pid in alive:
+        if is_process_alive(pid):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+    reap_zombies()
+    return len(alive)
+
+
+def reap_zombies() -> int:
+    """Collect exit status of finished Chrome child processes"""
+    reaped = 0
+    for pid, stat in read_all_processes().items():
+        if stat["state"] != "Z" or stat["ppid"] != os.getpid():
+            continue
+        if not stat["name"].startswith(CHROME_PROCESS_NAMES):
+            continue
+        try:
+            os.waitpid(pid, os.WNOHANG)
+            reaped += 1
+        except ChildProcessError:
+            pass
+    return reaped
+
+
+class BrowserSupervisor:
+    """Supervises process trees of every browser launched by ChromeDriverManager"""
+    
+    def __init__(self):
+        self.check_interval = SUPERVISOR_CONFIG["check_interval"]
+        self.max_jobs = SUPERVISOR_CONFIG["max_jobs_per_browser"]
+        self.max_process_rss = SUPERVISOR_CONFIG["max_process_rss_mb"] * 1024 * 1024
+        self.browsers: Dict[int, Dict[str, Any]] = {}
+        self.check_callbacks: List[Callable[[], None]] = []
+        self.lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start background supervision thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="browser-supervisor", daemon=True)
+        self._thread.start()
+        print("✅ Browser supervisor başlatıldı")
+    
+    def stop(self):
+        """Stop background supervision thread"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+    
+    def _run(self):
+        while not self._stop_event.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ Browser supervisor hatası: {e}")
+    
+    def check(self):
+        """Sample browser process trees, reap zombies and run pool maintenance"""
+        self.sample()
+        reap_zombies()
+        for callback in list(self.check_callbacks):
+            callback()
+    
+    def register(self, driver, profile_path: Path, display: str = None):
+        """Start supervising a newly launched browser and the Xvfb display it uses"""
+        root_pids = [getattr(driver, "browser_pid", None)]
+        service = getattr(driver, "service", None)
+        process = getattr(service, "process", None) if service else None
+        root_pids.append(getattr(process, "pid", None))
+        root_pids = [pid for pid in root_pids if pid]
+        if not root_pids:
+            display_pool.release(display)
+            return
+        
+        # Mark profile as owned by this process so restarts can find orphans,
+        # the browser's own PIDs (chromedriver) follow on the next lines
+        try:
+            (Path(profile_path) / OWNER_FILE).write_text("\n".join(str(pid) for pid in [os.getpid()] + root_pids))
+        except OSError as e:
+            print(f"⚠️ Profile owner dosyası yazılamadı: {e}")
+        
+        with self.lock:
+            self.browsers[root_pids[0]] = {
+                "driver": driver,
+                "profile": Path(profile_path).name,
+                "root_pids": root_pids,
+                "pids": list(root_pids),
+                "jobs": 0,
+                "rss_bytes": 0,
+                "max_process_rss_bytes": 0,
+                "launched_at": time.time(),
+                "display": display,
+                "alive": True
+            }
+        system_sampler.track_browser(driver)
+    
+    def _find(self, driver) -> Optional[Dict[str, Any]]:
+        for entry in self.browsers.values():
+            if entry["driver"] is driver:
+                return entry
+        return None
+    
+    def get_profile(self, driver) -> Optional[str]:
+        """Get profile directory name of a supervised browser"""
+        with self.lock:
+            entry = self._find(driver)
+            return entry["profile"] if entry else None
+    
+    def record_job(self, driver):
+        """Count a finished job on a browser"""
+        with self.lock:
+            entry = self._find(driver)
+            if entry:
+                entry["jobs"] += 1
+    
+    def sample(self):
+        """Refresh PIDs and RSS of every supervised process tree"""
+        processes = read_all_processes()
+        with self.lock:
+            entries = list(self.browsers.values())
+        
+        for entry in entries:
+            pids = get_process_tree(set(entry["root_pids"]), processes)
+            rss = [processes[pid]["rss_bytes"] for pid in pids]
+            entry["alive"] = entry["root_pids"][0] in pids
+            # Keep previously seen PIDs, a dead root leaves reparented children
+            seen = {pid for pid in entry["pids"] if pid in processes}
+            entry["pids"] = sorted(seen | set(pids))
+            entry["rss_bytes"] = sum(rss)
+            entry["max_process_rss_bytes"] = max(rss) if rss else 0
+    
+    def get_recycle_reason(self, driver) -> Optional[str]:
+        """Get why a browser should be recycled, None if it is healthy"""
+        with self.lock:
+            entry = self._find(driver)
+            if not entry:
+                return None
+            if not entry["alive"]:
+                return "dead"
+            if entry["max_process_rss_bytes"] > self.max_process_rss:
+                return "memory"
+            if entry["jobs"] >= self.max_jobs:
+                return "max_jobs"
+        return None
+    
+    def cleanup(self, driver):
+        """Stop supervising a browser and kill what is left of its process tree"""
+        with self.lock:
+            entry = self._find(driver)
+            if not entry:
+                return
+            del self.browsers[entry["root_pids"][0]]
+        
+        cdp_sessions.close(driver)
+        leftovers = []
+        for pid in entry["pids"]:
+            stat = read_process_stat(pid)
+            # Skip PIDs that were reused by unrelated processes
+            if stat and stat["state"] != "Z" and stat["name"].startswith(CHROME_PROCESS_NAMES):
+                leftovers.append(pid)
+        if leftovers:
+            print(f"🧹 Kapatılmayan browser süreçleri sonlandırılıyor: {leftovers}")
+            kill_processes(leftovers)
+        
+        # Display is free only after Chrome is gone
+        display_pool.release(entry["display"])
+    
+    def reap_orphans(self) -> int:
+        """
+        Kill Chrome processes left behind by earlier runs
+        
+        A Chrome process is an orphan when it uses a profile under
+        PROFILES_DIR whose owner process is gone. A chromedriver whose
+        parent is gone is an orphan only if such a profile's owner file
+        recorded it or it started such a Chrome, so other services'
+        chromedrivers are left alone. An Xvfb on a pool
+        display number that was left to init is an orphan too.
+        """
+        processes = read_all_processes()
+        with self.lock:
+            supervised = {pid for entry in self.browsers.values() for pid in entry["pids"]}
+        
+        orphans = []
+        drivers = []
+        profiles_dir = str(PROFILES_DIR.resolve())
+        for pid, stat in processes.items():
+            if stat["name"] == "Xvfb" and stat["ppid"] == 1:
+                # Pool displays run in their own session and outlive a crashed API
+                display = next((arg for arg in read_cmdline(pid)[1:2] if arg.startswith(":")), "")
+                if display[1:].isdigit() and display_pool.is_pool_display(int(display[1:])):
+                    orphans.append(pid)
+                continue
+            if pid in supervised or not stat["name"].startswith(CHROME_PROCESS_NAMES):
+                continue
+            
+            if "chromedriver" in stat["name"]:
+                if stat["ppid"] == 1:
+                    drivers.append(pid)
+                continue
+            
+            for arg in read_cmdline(pid):
+                if arg.startswith("--user-data-dir=") and arg.split("=", 1)[1].startswith(profiles_dir):
+                    owner_pid, _ = read_owner_file(Path(arg.split("=", 1)[1]))
+                    if not owner_pid or not is_process_alive(owner_pid):
+                        orphans.append(pid)
+                    break
+        
+        # A parentless chromedriver is ours only if a profile whose owner is gone recorded it
+        # or it started one of the orphaned Chromes; other services' chromedrivers stay
+        recorded = set()
+        for owner_file in PROFILES_DIR.glob(f"*/{OWNER_FILE}"):
+            owner_pid, pids = read_owner_file(owner_file.parent)
+            if not owner_pid or not is_process_alive(owner_pid):
+                recorded |= pids
+        orphan_set = set(orphans)
+        for pid in drivers:
+            if pid in recorded or any(stat["ppid"] == pid and child in orphan_set for child, stat in processes.items()):
+                orphans.append(pid)
+        
+        if orphans:
+            print(f"🧹 {len(orphans)} orphan Chrome/Xvfb süreci sonlandırılıyor")
+            kill_processes(orphans)
+        return len(orphans)
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get supervised browsers and their resource usage"""
+        with self.lock:
+            return {
+                "browsers": [
+                    {
+                        "browser_pid": pid,
+                        "profile": entry["profile"],
+                        "process_count": len(entry["pids"]),
+                        "rss_mb": round(entry["rss_bytes"] / 1024 / 1024, 1),
+                        "max_process_rss_mb": round(entry["max_process_rss_bytes"] / 1024 / 1024, 1),
+                        "jobs": entry["jobs"],
+                        "display": entry["display"],
+                        "alive": entry["alive"],
+                        "uptime_seconds": round(time.time() - entry["launched_at"])
+                    }
+                    for pid, entry in self.browsers.items()
+                ],
+                "max_jobs_per_browser": self.max_jobs,
+                "max_process_rss_mb": SUPERVISOR_CONFIG["max_process_rss_mb"]
+            }
+
+
+# Process-wide supervisor, ChromeDriverManager registers every browser here
+browser_supervisor = BrowserSupervisor()
@@ -0,0 +1,206 @@
+"""
+CDP Client for Ubuntu Chrome Automation
+Event-capable DevTools connection to a browser's page, next to chromedriver's own
+"""
+
+import itertools
+import json
+import queue
+import threading
+from typing import Optional, Dict, Any, List, Callable
+
+import requests
+import websocket
+
+from config import CDP_CONFIG
+
+
+class CDPError(Exception):
+    """Error returned by a CDP command"""
+
+
+def get_debugger_address(driver) -> Optional[str]:
+    """Get host:port of the browser's remote debugging endpoint"""
+    options = getattr(driver, "options", None)
+    address = getattr(options, "debugger_address", None)
+    if address:
+        return address
+    capabilities = getattr(driver, "capabilities", None) or {}
+    return capabilities.get("goog:chromeOptions", {}).get("debuggerAddress")
+
+
+def get_page_websocket_url(debugger_address: str) -> Optional[str]:
+    """Get DevTools websocket URL of the first page target"""
+    response = requests.get(f"http://{debugger_address}/json/list", timeout=CDP_CONFIG["connect_timeout"])
+    for target in response.json():
+        if target.get("type") == "page" and target.get("webSocketDebuggerUrl"):
+            return target["webSocketDebuggerUrl"]
+    return None
+
+
+class CDPSession:
+    """
+    DevTools websocket connection with command results and event handlers
+    
+    A reader thread resolves command results and queues events, a
+    dispatcher thread runs event handlers. Handlers may therefore send
+    commands and wait for their results without blocking the reader.
+    """
+    
+    def __init__(self, websocket_url: str):
+        self.websocket_url = websocket_url
+        self.ws = websocket.create_connection(
+            websocket_url,
+            timeout=CDP_CONFIG["connect_timeout"],
+            suppress_origin=True,
+            enable_multithread=True
+        )
+        self.ws.settimeout(None)
+        self.handlers: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self.pending: Dict[int, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.closed = False
+        self._ids = itertools.count(1)
+        self._events: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._reader = threading.Thread(target=self._read_loop, name="cdp-reader", daemon=True)
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="cdp-dispatcher", daemon=True)
+        self._reader.start()
+        self._dispatcher.start()
+    
+    def send(self, method: str, params: Dict[str, Any] = None, wait: bool = True,
+             timeout: float = None) -> Optional[Dict[str, Any]]:
+        """
+        Send a command
+        
+        Args:
+            method: CDP method like 'Network.enable'
+            params: Command parameters
+            wait: Wait for and return the result
+            timeout: Seconds to wait for the result
+        
+        Returns:
+            Command result, None when not waiting
+        """
+        if self.closed:
+            raise CDPError(f"CDP bağlantısı kapalı: {method}")
+        
+        command_id = next(self._ids)
+        waiter = {"event": threading.Event(), "result": None, "error": None}
+        if wait:
+            with self.lock:
+                self.pending[command_id] = waiter
+        
+        self.ws.send(json.dumps({"id": command_id, "method": method, "params": params or {}}))
+        if not wait:
+            return None
+        
+        if not waiter["event"].wait(timeout or CDP_CONFIG["command_timeout"]):
+            with self.lock:
+                self.pending.pop(command_id, None)
+            raise CDPError(f"CDP komutu zaman aşımına uğradı: {method}")
+        if waiter["error"]:
+            raise CDPError(f"{method}: {waiter['error'].get('message')}")
+        return waiter["result"]
+    
+    def on(self, event: str, handler: Callable[[Dict[str, Any]], None]):
+        """Call handler with params of every event with the given name"""
+        with self.lock:
+            self.handlers.setdefault(event, []).append(handler)
+    
+    def off(self, event: str, handler: Callable[[Dict[str, Any]], None]):
+        """Remove an event handler"""
+        with self.lock:
+            if handler in self.handlers.get(event, []):
+                self.handlers[event].remove(handler)
+    
+    def _read_loop(self):
+        try:
+            while not self.closed:
+                message = json.loads(self.ws.recv())
+                if "id" in message:
+                    with self.lock:
+                        waiter = self.pending.pop(message["id"], None)
+                    if waiter:
+                        waiter["result"] = message.get("result")
+                        waiter["error"] = message.get("error")
+                        waiter["event"].set()
+                elif "method" in message:
+                    self._events.put(message)
+        except Exception:
+            # Browser closed or connection dropped
+            pass
+        finally:
+            self._mark_closed()
+    
+    def _dispatch_loop(self):
+        while True:
+            message = self._events.get()
+            if message is None:
+                return
+            with self.lock:
+                handlers = list(self.handlers.get(message["method"], []))
+            for handler in handlers:
+                try:
+                    handler(message.get("params", {}))
+                except Exception as e:
+                    print(f"⚠️ CDP event handler hatası ({message['method']}): {e}")
+    
+    def _mark_closed(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            waiters = list(self.pending.values())
+            self.pending.clear()
+        for waiter in waiters:
+            waiter["error"] = {"message": "connection closed"}
+            waiter["event"].set()
+        self._events.put(None)
+    
+    def close(self):
+        """Close the connection"""
+        self._mark_closed()
+        try:
+            self.ws.close()
+        except Exception:
+            pass
+
+
+class CDPSessionRegistry:
+    """One shared CDP session per browser, opened on first use"""
+    
+    def __init__(self):
+        self.sessions: Dict[int, CDPSession] = {}
+        self.lock = threading.Lock()
+    
+    def get(self, driver) -> Optional[CDPSession]:
+        """Get the browser's CDP session, opening it if needed"""
+        with self.lock:
+            session = self.sessions.get(id(driver))
+            if session and not session.closed:
+                return session
+            
+            try:
+                address = get_debugger_address(driver)
+                url = get_page_websocket_url(address) if address else None
+                if not url:
+                    print("⚠️ CDP debugger adresi bulunamadı")
+                    return None
+                session = CDPSession(url)
+            except Exception as e:
+                print(f"⚠️ CDP bağlantısı açılamadı: {e}")
+                return None
+            
+            self.sessions[id(driver)] = session
+            return session
+    
+    def close(self, driver):
+        """Close the browser's CDP session"""
+        with self.lock:
+            session = self.sessions.pop(id(driver), None)
+        if session:
+            session.close()
+
+
+# Process-wide CDP sessions, closed by the browser supervisor with their browser
+cdp_sessions = CDPSessionRegistry()
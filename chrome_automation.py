@@ -4,49 +4,130 @@ Handles Google login, Flow navigation, and project creation
 """
 
 import time
-from typing import Optional, Dict, Any
+from functools import wraps
+from typing import Optional, Dict, Any, List, Callable
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
 
 from chrome_manager import ChromeDriverManager
 from session_manager import SessionManager
-from config import FLOW_CONFIG
+from config import FLOW_CONFIG, TOTP_CONFIG
+from browser_supervisor import browser_supervisor
+from metrics import STEP_DURATION, SELECTOR_MISSES
+from resource_profiles import get_step_profile, apply_resource_profile
+from page_state import detect_page_state, wait_for_flow_ready, reset_to_flow_home
+from totp import generate_fresh_totp
+from dom_probe import probe_buttons
+from page_helpers import fill_and_submit, click_first
+from dom_watch import dom_watcher
+from project_capture import ProjectCapture, wait_for_project_id, project_url_for
+from browser_downloads import download_in_browser
+
+
+# Progress reported when a step starts: (label, percent)
+STEP_PROGRESS = {
+    "browser_launch": ("Browser başlatılıyor", 10),
+    "login": ("Google hesabına giriş yapılıyor", 25),
+    "flow_navigation": ("Flow'a gidiliyor", 45),
+    "onboarding": ("Flow onboarding kontrol ediliyor", 55),
+    "project_creation": ("Proje oluşturuluyor", 65)
+}
+
+
+def timed_step(step: str):
+    """Record duration of an automation step in step_timings and metrics"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if step in STEP_PROGRESS:
+                self.report_progress(*STEP_PROGRESS[step])
+            start = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.step_timings[step] = elapsed
+                STEP_DURATION.observe(elapsed, step=step)
+        return wrapper
+    return decorator
+
+
+# Onboarding button labels per step, in the order they are tried
+ONBOARDING_BUTTONS = {
+    "welcome": ["Skip", "Continue", "Get Started", "Next"],
+    "tutorial": ["Skip Tutorial", "Skip Guide", "Not Now", "Maybe Later"],
+    "permissions": ["Allow", "Accept", "Yes", "OK"],
+    "setup": ["Finish", "Complete", "Done", "Start Creating"]
+}
 
 
 class ChromeAutomation:
     """Main automation class for Google Flow operations"""
     
-    def __init__(self):
+    def __init__(self, standby_manager=None, browser_pool=None, account: str = None):
         self.chrome_manager = ChromeDriverManager()
         self.session_manager = SessionManager()
+        self.account = account
+        self.standby_manager = standby_manager
+        self.browser_pool = browser_pool
         self.driver = None
-        self.wait = None
+        self.project_id: Optional[str] = None
+        self.project_url: Optional[str] = None
+        self.credit_cost = FLOW_CONFIG["credits_per_project"]
+        self.step_timings: Dict[str, float] = {}
+        self.resource_profile: Optional[str] = None
+        self.applied_resource_profile: Optional[str] = None
+        self.page_state: Dict[str, Any] = {}
+        self.progress_callback: Optional[Callable[[str, int], None]] = None
+        self.progress = 0
         
-    def start_test(self, user_id: str = None, prompt: str = "A cat") -> bool:
+    def report_progress(self, step: str, progress: int):
+        """Report step-level progress to the caller, never moving backwards"""
+        self.progress = max(self.progress, progress)
+        if self.progress_callback:
+            try:
+                self.progress_callback(step, self.progress)
+            except Exception as e:
+                print(f"⚠️ Progress bildirilemedi: {e}")
+    
+    def start_test(self, user_id: str = None, prompt: str = "A cat", credit_cost: int = None,
+                   resource_profile: str = None,
+                   progress_callback: Optional[Callable[[str, int], None]] = None) -> bool:
         """
         Start the main automation test
         
         Args:
             user_id: User identifier
             prompt: Project creation prompt
+            credit_cost: Credits the generation is expected to consume
+            resource_profile: Resource profile for every step
+                (defaults to STEP_RESOURCE_PROFILES)
+            progress_callback: Called with (step, percent) as steps start
             
         Returns:
             True if successful, False otherwise
         """
         try:
+            if credit_cost is not None:
+                self.credit_cost = credit_cost
+            self.resource_profile = resource_profile
+            self.progress_callback = progress_callback
+            
             print("=== Ubuntu Chrome Automation Başlatılıyor ===")
             
-            # Setup Chrome driver
-            self.driver = self.chrome_manager.setup_chrome_driver()
-            if not self.driver:
-                print("❌ Chrome driver kurulamadı!")
+            # A scheduled job runs on its placed account's own session and profile
+            if self.account and not self.session_manager.bind_account(self.account):
+                print(f"❌ Job hesabına geçilemedi: {self.account}")
                 return False
             
-            self.wait = WebDriverWait(self.driver, FLOW_CONFIG["wait_timeout"])
+            # Setup Chrome driver (with the job account's profile)
+            if not self.launch_browser(self.session_manager.get_session_profile()):
+                print("❌ Chrome driver kurulamadı!")
+                return False
             
             # Check session status (main decision point)
+            self.report_progress("Oturum kontrol ediliyor", 15)
             session_status = self.session_manager.check_session_status()
             
             if session_status == "valid_with_credits":
@@ -55,10 +136,14 @@ class ChromeAutomation:
                 
             elif session_status == "valid_low_credits":
                 print("⚠️ Geçerli session ama düşük kredi - hesap değiştir")
-                if not self.session_manager.switch_to_next_account():
+                if not self.session_manager.switch_to_next_account(self.get_standby_email()):
                     print("❌ Yeni hesaba geçilemedi!")
                     return False
-                # Continue with new account
+                if self.adopt_standby_browser():
+                    return self.navigate_to_flow_with_onboarding_check(prompt, user_id)
+                # Continue with new account in its own profile
+                if not self.relaunch_for_current_account():
+                    return False
                 
             elif session_status == "invalid_or_none":
                 print("🔑 Session geçersiz veya yok - login gerekli")
@@ -68,61 +153,128 @@ class ChromeAutomation:
                 return False
             
             # Check credits after login
-            if not self.session_manager.check_credits_and_switch_if_needed():
+            if not self.session_manager.check_credits_and_switch_if_needed(self.get_standby_email()):
                 # Continue to Flow
                 return self.navigate_to_flow_with_onboarding_check(prompt, user_id)
             else:
-                # Account switched, need to login again
-                return self.perform_login_flow()
+                # Account switched, need to login again unless standby is ready
+                if not self.adopt_standby_browser():
+                    if not self.relaunch_for_current_account() or not self.perform_login_flow():
+                        return False
+                return self.navigate_to_flow_with_onboarding_check(prompt, user_id)
                 
         except Exception as e:
             print(f"❌ Test sırasında hata: {e}")
             return False
     
-    def perform_login_flow(self) -> bool:
-        """Perform Google login flow"""
+    @timed_step("browser_launch")
+    def launch_browser(self, profile_name: str = None) -> bool:
+        """Launch Chrome with the given profile (or lease one from the pool)"""
+        if self.browser_pool:
+            self.driver = self.browser_pool.lease(profile_name)
+        else:
+            self.driver = self.chrome_manager.setup_chrome_driver(profile_name=profile_name)
+        if not self.driver:
+            return False
+        
+        # A pooled browser may still block what the previous job's last step blocked
+        self.applied_resource_profile = None
+        return True
+    
+    def relaunch_for_current_account(self) -> bool:
+        """
+        Switch to the browser of the current account's profile after an account switch
+        
+        The old browser belongs to the previous account's profile; logging
+        the new account in there would leave that (pooled) profile signed
+        in as the wrong account.
+        """
+        self.close_browser()
+        if not self.launch_browser(self.session_manager.get_session_profile()):
+            print("❌ Yeni hesabın browser'ı başlatılamadı!")
+            return False
+        return True
+    
+    def use_resource_profile(self, step: str):
+        """Block the content the step does not need"""
+        profile = get_step_profile(step, self.resource_profile)
+        if profile == self.applied_resource_profile:
+            return
+        if apply_resource_profile(self.driver, profile):
+            self.applied_resource_profile = profile
+            print(f"🧰 Resource profile: {profile} ({step})")
+    
+    def get_standby_email(self) -> Optional[str]:
+        """Get email of the account logged in on the standby browser"""
+        if not self.standby_manager:
+            return None
+        return self.standby_manager.get_ready_email()
+    
+    def adopt_standby_browser(self) -> bool:
+        """Replace current browser with the standby browser of the new account"""
+        if not self.standby_manager:
+            return False
+        
+        session = self.session_manager.get_current_session()
+        if not session:
+            return False
+        
+        standby_driver = self.standby_manager.take(session["email"])
+        if not standby_driver:
+            return False
+        
+        self.close_browser()
+        self.driver = standby_driver
+        self.applied_resource_profile = None
+        print("✅ Standby browser devralındı - login atlandı")
+        return True
+    
+    @timed_step("login")
+    def perform_login_flow(self, credentials: Optional[Dict[str, str]] = None) -> bool:
+        """
+        Perform Google login flow
+        
+        Args:
+            credentials: Email, password and optional TOTP secret to log in with
+                (defaults to the current session's credentials)
+        """
         try:
             print("🔑 Google login başlatılıyor...")
+            self.use_resource_profile("login")
             
             # Navigate to Google login
             self.driver.get(FLOW_CONFIG["login_url"])
             time.sleep(2)
             
             # Get credentials
-            credentials = self.session_manager.get_current_credentials()
+            credentials = credentials or self.session_manager.get_current_credentials()
             if not credentials:
                 print("❌ Credentials bulunamadı!")
                 return False
             
-            # Enter email
-            email_input = self.wait.until(
-                EC.presence_of_element_located((By.NAME, "identifier"))
-            )
-            email_input.clear()
-            email_input.send_keys(credentials["email"])
-            time.sleep(1)
-            
-            # Click next button
-            next_button = self.driver.find_element(By.ID, "identifierNext")
-            next_button.click()
+            # Enter email and click next
+            if not dom_watcher.wait_for(self.driver, ['input[name="identifier"]']):
+                print("❌ Email alanı bulunamadı")
+                return False
+            result = fill_and_submit(self.driver, ['input[name="identifier"]'], credentials["email"], ["#identifierNext"])
+            if not result["submitted"]:
+                print("❌ Email adımı tamamlanamadı")
+                return False
             time.sleep(2)
             
-            # Enter password
-            password_input = self.wait.until(
-                EC.presence_of_element_located((By.NAME, "password"))
-            )
-            password_input.clear()
-            password_input.send_keys(credentials["password"])
-            time.sleep(1)
-            
-            # Click next button
-            password_next = self.driver.find_element(By.ID, "passwordNext")
-            password_next.click()
+            # Enter password and click next
+            if not dom_watcher.wait_for(self.driver, ['input[name="password"]']):
+                print("❌ Şifre alanı bulunamadı")
+                return False
+            result = fill_and_submit(self.driver, ['input[name="password"]'], credentials["password"], ["#passwordNext"])
+            if not result["submitted"]:
+                print("❌ Şifre adımı tamamlanamadı")
+                return False
             time.sleep(3)
             
             # Check for 2FA
             if self.check_2fa_required():
-                if not self.handle_2fa():
+                if not self.handle_2fa(credentials.get("totp_secret")):
                     return False
             
             # Verify login success
@@ -146,13 +298,33 @@ class ChromeAutomation:
         except NoSuchElementException:
             return False
     
-    def handle_2fa(self) -> bool:
-        """Handle 2FA authentication"""
+    def handle_2fa(self, totp_secret: Optional[str] = None) -> bool:
+        """
+        Handle 2FA authentication with a locally generated TOTP code
+        
+        Args:
+            totp_secret: Base32 secret of the account's authenticator
+        """
         try:
-            print("⚠️ 2FA kodu gerekli! Lütfen kodu girin...")
-            print("⏰ 30 saniye bekleniyor...")
-            time.sleep(30)  # Give user time to enter 2FA code
+            if not totp_secret:
+                print("❌ 2FA gerekli ama hesap için TOTP secret tanımlı değil")
+                return False
+            
+            print("🔐 2FA kodu oluşturuluyor...")
+            pin_input = self.driver.find_element(By.NAME, "totpPin")
+            pin_input.clear()
+            pin_input.send_keys(generate_fresh_totp(totp_secret))
+            
+            try:
+                self.driver.find_element(By.ID, "totpNext").click()
+            except NoSuchElementException:
+                pin_input.send_keys(Keys.ENTER)
             
+            # Challenge page goes away once the code is accepted
+            if not dom_watcher.wait_for(self.driver, ['input[name="totpPin"]'], "hidden", TOTP_CONFIG["verify_timeout"]):
+                print("❌ 2FA kodu kabul edilmedi")
+                return False
+            print("✅ 2FA kodu kabul edildi")
             return True
         except Exception as e:
             print(f"❌ 2FA hatası: {e}")
@@ -191,19 +363,39 @@ class ChromeAutomation:
     def navigate_to_flow_directly(self, prompt: str, user_id: str) -> bool:
         """Navigate directly to Flow (bypassing onboarding)"""
         if not self.navigate_to_flow():
-            return False
+            # Session is valid but this browser's profile is not logged in (e.g. a new pool slot)
+            if not self.page_state.get("signed_out"):
+                return False
+            print("🔑 Browser profili login değil - login yapılıyor")
+            if not self.perform_login_flow() or not self.navigate_to_flow():
+                return False
         
         return self.create_new_project_with_prompt(prompt, user_id)
     
+    @timed_step("flow_navigation")
     def navigate_to_flow(self) -> bool:
-        """Navigate to Google Flow page"""
+        """Navigate to Google Flow page, skipping the load when the browser is already there"""
         try:
+            self.use_resource_profile("flow_navigation")
+            
+            # A leased browser is often still on Flow from its previous job
+            self.page_state = detect_page_state(self.driver)
+            if self.page_state["flow_ready"]:
+                print("✅ Browser zaten Flow ana sayfasında - navigasyon atlandı")
+                return True
+            
+            if self.page_state["logged_in"] and reset_to_flow_home(self.driver):
+                self.page_state = wait_for_flow_ready(self.driver)
+                if self.page_state["flow_ready"]:
+                    print("✅ Flow ana sayfasına sayfa içinde dönüldü")
+                    return True
+            
             print("🌐 Flow sayfasına gidiliyor...")
             self.driver.get(FLOW_CONFIG["base_url"])
-            time.sleep(3)
+            self.page_state = wait_for_flow_ready(self.driver)
             
             # Check if we're on Flow page
-            if "flow" in self.driver.current_url.lower():
+            if self.page_state["on_flow"] and not self.page_state["signed_out"]:
                 print("✅ Flow sayfasına başarıyla gidildi")
                 return True
             else:
@@ -214,25 +406,37 @@ class ChromeAutomation:
             print(f"❌ Flow navigasyon hatası: {e}")
             return False
     
+    @timed_step("onboarding")
     def handle_flow_onboarding(self) -> bool:
         """Handle Flow onboarding steps"""
         try:
             print("🚀 Flow onboarding başlatılıyor...")
+            self.use_resource_profile("onboarding")
+            
+            # One probe finds the buttons of every step, re-probe only after a click changed the page
+            found = self.probe_onboarding()
             
             # Skip welcome screen
-            if not self.skip_welcome_screen():
+            if self.skip_welcome_screen(found["welcome"]):
+                found = self.probe_onboarding()
+            else:
                 print("⚠️ Welcome screen atlanamadı")
             
             # Skip tutorial/guide
-            if not self.skip_tutorial_guide():
+            if self.skip_tutorial_guide(found["tutorial"]):
+                found = self.probe_onboarding()
+            else:
                 print("⚠️ Tutorial guide atlanamadı")
             
             # Handle permissions
-            if not self.handle_flow_permissions():
+            permissions_found = bool(found["permissions"])
+            if not self.handle_flow_permissions(found["permissions"]):
                 print("⚠️ Permissions handle edilemedi")
+            if permissions_found:
+                found = self.probe_onboarding()
             
             # Complete initial setup
-            if not self.complete_initial_setup():
+            if not self.complete_initial_setup(found["setup"]):
                 print("⚠️ Initial setup tamamlanamadı")
             
             print("✅ Flow onboarding tamamlandı")
@@ -242,26 +446,30 @@ class ChromeAutomation:
             print(f"❌ Flow onboarding hatası: {e}")
             return False
     
-    def skip_welcome_screen(self) -> bool:
+    def probe_onboarding(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Find visible onboarding, permission and setup buttons in one round-trip"""
+        return probe_buttons(self.driver, ONBOARDING_BUTTONS)
+    
+    def _click_found(self, found: Optional[List[Dict[str, Any]]], step: str) -> Optional[str]:
+        """Click the first found button of a step, returns its label"""
+        found = found if found is not None else self.probe_onboarding()[step]
+        SELECTOR_MISSES.inc(len(ONBOARDING_BUTTONS[step]) - len(found), step=step)
+        for button in found:
+            try:
+                button["element"].click()
+                return button["label"]
+            except WebDriverException:
+                # Page changed since the probe
+                continue
+        return None
+    
+    def skip_welcome_screen(self, found: Optional[List[Dict[str, Any]]] = None) -> bool:
         """Skip Flow welcome screen"""
         try:
-            # Look for skip or continue buttons
-            skip_selectors = [
-                "//button[contains(text(), 'Skip')]",
-                "//button[contains(text(), 'Continue')]",
-                "//button[contains(text(), 'Get Started')]",
-                "//button[contains(text(), 'Next')]"
-            ]
-            
-            for selector in skip_selectors:
-                try:
-                    button = self.driver.find_element(By.XPATH, selector)
-                    button.click()
-                    time.sleep(1)
-                    print("✅ Welcome screen atlandı")
-                    return True
-                except NoSuchElementException:
-                    continue
+            if self._click_found(found, "welcome"):
+                time.sleep(1)
+                print("✅ Welcome screen atlandı")
+                return True
             
             print("⚠️ Welcome screen skip butonu bulunamadı")
             return False
@@ -270,26 +478,13 @@ class ChromeAutomation:
             print(f"⚠️ Welcome screen skip hatası: {e}")
             return False
     
-    def skip_tutorial_guide(self) -> bool:
+    def skip_tutorial_guide(self, found: Optional[List[Dict[str, Any]]] = None) -> bool:
         """Skip Flow tutorial/guide"""
         try:
-            # Look for tutorial skip options
-            tutorial_selectors = [
-                "//button[contains(text(), 'Skip Tutorial')]",
-                "//button[contains(text(), 'Skip Guide')]",
-                "//button[contains(text(), 'Not Now')]",
-                "//button[contains(text(), 'Maybe Later')]"
-            ]
-            
-            for selector in tutorial_selectors:
-                try:
-                    button = self.driver.find_element(By.XPATH, selector)
-                    button.click()
-                    time.sleep(1)
-                    print("✅ Tutorial guide atlandı")
-                    return True
-                except NoSuchElementException:
-                    continue
+            if self._click_found(found, "tutorial"):
+                time.sleep(1)
+                print("✅ Tutorial guide atlandı")
+                return True
             
             print("⚠️ Tutorial guide skip butonu bulunamadı")
             return False
@@ -298,24 +493,19 @@ class ChromeAutomation:
             print(f"⚠️ Tutorial guide skip hatası: {e}")
             return False
     
-    def handle_flow_permissions(self) -> bool:
+    def handle_flow_permissions(self, found: Optional[List[Dict[str, Any]]] = None) -> bool:
         """Handle Flow permissions requests"""
         try:
-            # Look for permission dialogs
-            permission_selectors = [
-                "//button[contains(text(), 'Allow')]",
-                "//button[contains(text(), 'Accept')]",
-                "//button[contains(text(), 'Yes')]",
-                "//button[contains(text(), 'OK')]"
-            ]
+            found = found if found is not None else self.probe_onboarding()["permissions"]
+            SELECTOR_MISSES.inc(len(ONBOARDING_BUTTONS["permissions"]) - len(found), step="permissions")
             
-            for selector in permission_selectors:
+            # Every present permission dialog is answered
+            for button in found:
                 try:
-                    button = self.driver.find_element(By.XPATH, selector)
-                    button.click()
+                    button["element"].click()
                     time.sleep(1)
                     print("✅ Permission verildi")
-                except NoSuchElementException:
+                except WebDriverException:
                     continue
             
             return True
@@ -324,26 +514,13 @@ class ChromeAutomation:
             print(f"⚠️ Permission handling hatası: {e}")
             return False
     
-    def complete_initial_setup(self) -> bool:
+    def complete_initial_setup(self, found: Optional[List[Dict[str, Any]]] = None) -> bool:
         """Complete initial Flow setup"""
         try:
-            # Look for setup completion buttons
-            setup_selectors = [
-                "//button[contains(text(), 'Finish')]",
-                "//button[contains(text(), 'Complete')]",
-                "//button[contains(text(), 'Done')]",
-                "//button[contains(text(), 'Start Creating')]"
-            ]
-            
-            for selector in setup_selectors:
-                try:
-                    button = self.driver.find_element(By.XPATH, selector)
-                    button.click()
-                    time.sleep(2)
-                    print("✅ Initial setup tamamlandı")
-                    return True
-                except NoSuchElementException:
-                    continue
+            if self._click_found(found, "setup"):
+                time.sleep(2)
+                print("✅ Initial setup tamamlandı")
+                return True
             
             print("⚠️ Setup completion butonu bulunamadı")
             return False
@@ -352,10 +529,12 @@ class ChromeAutomation:
             print(f"⚠️ Setup completion hatası: {e}")
             return False
     
+    @timed_step("project_creation")
     def create_new_project_with_prompt(self, prompt: str, user_id: str) -> bool:
         """Create new project with given prompt"""
         try:
             print(f"🎬 Yeni proje oluşturuluyor: {prompt}")
+            self.use_resource_profile("project_creation")
             
             # Look for create project button
             create_selectors = [
@@ -364,91 +543,84 @@ class ChromeAutomation:
                 "//button[contains(text(), 'Start')]"
             ]
             
-            create_button = None
-            for selector in create_selectors:
-                try:
-                    create_button = self.wait.until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    break
-                except TimeoutException:
-                    continue
+            # Click whichever create button shows up first
+            clicked = None
+            if dom_watcher.wait_for(self.driver, create_selectors, "clickable"):
+                clicked = click_first(self.driver, create_selectors)
             
-            if not create_button:
+            if not clicked:
+                SELECTOR_MISSES.inc(step="create_button")
                 print("❌ Create project butonu bulunamadı")
                 return False
             
-            create_button.click()
+            self.report_progress("Prompt yazılıyor", 70)
             time.sleep(2)
             
             # Find prompt input field
             prompt_selectors = [
-                "//textarea[@placeholder*='prompt']",
-                "//textarea[@placeholder*='description']",
-                "//input[@placeholder*='prompt']",
-                "//input[@placeholder*='description']"
+                "textarea[placeholder*='prompt']",
+                "textarea[placeholder*='description']",
+                "input[placeholder*='prompt']",
+                "input[placeholder*='description']"
             ]
             
-            prompt_input = None
-            for selector in prompt_selectors:
-                try:
-                    prompt_input = self.wait.until(
-                        EC.presence_of_element_located((By.XPATH, selector))
-                    )
-                    break
-                except TimeoutException:
-                    continue
-            
-            if not prompt_input:
+            if not dom_watcher.wait_for(self.driver, prompt_selectors):
+                SELECTOR_MISSES.inc(step="prompt_input")
                 print("❌ Prompt input alanı bulunamadı")
                 return False
             
-            # Fill prompt
-            prompt_input.clear()
-            prompt_input.send_keys(prompt)
-            time.sleep(1)
-            
-            # Submit project creation
+            # Fill prompt and submit project creation in one page call
             submit_selectors = [
                 "//button[contains(text(), 'Create')]",
                 "//button[contains(text(), 'Submit')]",
                 "//button[contains(text(), 'Generate')]"
             ]
             
-            submit_button = None
-            for selector in submit_selectors:
-                try:
-                    submit_button = self.driver.find_element(By.XPATH, selector)
-                    break
-                except NoSuchElementException:
-                    continue
-            
-            if not submit_button:
+            # Listen for the creation API response before submitting
+            capture = ProjectCapture.attach(self.driver)
+            result = fill_and_submit(self.driver, prompt_selectors, prompt, submit_selectors)
+            if not result["submitted"] and capture:
+                capture.stop()
+            if not result["filled"]:
+                SELECTOR_MISSES.inc(step="prompt_input")
+                print("❌ Prompt input alanı bulunamadı")
+                return False
+            if not result["submitted"]:
+                SELECTOR_MISSES.inc(step="submit_button")
                 print("❌ Submit butonu bulunamadı")
                 return False
             
-            submit_button.click()
-            time.sleep(FLOW_CONFIG["project_creation_delay"])
-            
-            # Capture project URL
-            project_url = self.driver.current_url
-            print(f"✅ Proje oluşturuldu: {project_url}")
+            # Capture project ID from the API response (or the project page URL)
+            self.report_progress("Prompt gönderildi, proje bekleniyor", 80)
+            project_id = wait_for_project_id(self.driver, capture)
+            if project_id:
+                self.project_id = project_id
+                self.project_url = project_url_for(project_id)
+                print(f"✅ Proje oluşturuldu: {self.project_url}")
+            else:
+                self.project_url = self.driver.current_url
+                print(f"⚠️ Proje ID'si yakalanamadı, mevcut URL kaydediliyor: {self.project_url}")
             
             # Save to session
-            self.save_project_to_session(project_url, user_id)
+            self.save_project_to_session(self.project_url, user_id, self.project_id)
             
+            # Consume credits so low-credit forecasting sees the burn
+            self.record_credit_usage(self.credit_cost)
+            
+            self.report_progress("Proje oluşturuldu", 90)
             return True
             
         except Exception as e:
             print(f"❌ Proje oluşturma hatası: {e}")
             return False
     
-    def save_project_to_session(self, project_url: str, user_id: str):
+    def save_project_to_session(self, project_url: str, user_id: str, project_id: str = None):
         """Save project to session"""
         try:
             from datetime import datetime
             
             project_data = {
+                "id": project_id,
                 "url": project_url,
                 "user_id": user_id,
                 "created_at": datetime.now().isoformat(),
@@ -465,14 +637,48 @@ class ChromeAutomation:
         except Exception as e:
             print(f"⚠️ Proje kaydetme hatası: {e}")
     
+    def export_web_session(self) -> Dict[str, Any]:
+        """Get cookies and user agent of the browser for requests outside of it"""
+        try:
+            return {
+                "cookies": self.driver.get_cookies(),
+                "user_agent": self.driver.execute_script("return navigator.userAgent")
+            }
+        except Exception as e:
+            print(f"⚠️ Browser oturumu alınamadı: {e}")
+            return {"cookies": [], "user_agent": None}
+    
+    def download_video_in_browser(self, video_url: str, name: str) -> Optional[Dict[str, Any]]:
+        """Download a video with the browser itself and move it into the media directory"""
+        # The download link needs Flow's origin and cookies
+        if not detect_page_state(self.driver)["logged_in"] and not self.navigate_to_flow():
+            return None
+        return download_in_browser(self.driver, video_url, name)
+    
+    def record_credit_usage(self, credits_used: int):
+        """Deduct used credits from the current account"""
+        session = self.session_manager.get_current_session()
+        if session:
+            self.session_manager.update_account_usage(session["email"], credits_used)
+    
     def close_browser(self):
-        """Close browser and cleanup"""
+        """Close browser (or return it to the pool) and cleanup"""
+        driver, self.driver = self.driver, None
+        if not driver:
+            return
+        
+        if self.browser_pool:
+            self.browser_pool.release(driver)
+            return
+        
         try:
-            if self.driver:
-                self.driver.quit()
-                print("✅ Browser kapatıldı")
+            driver.quit()
+            print("✅ Browser kapatıldı")
         except Exception as e:
             print(f"⚠️ Browser kapatma hatası: {e}")
+        finally:
+            # Kill renderers/chromedriver left behind by a failed quit
+            browser_supervisor.cleanup(driver)
 
 
 if __name__ == "__main__":
@@ -13,7 +13,13 @@ import undetected_chromedriver as uc
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 
-from config import CHROME_CONFIG, PROFILES_DIR
+from config import CHROME_CONFIG, PROFILES_DIR, PREWARM_CONFIG
+from browser_supervisor import browser_supervisor
+from admission_control import admission_controller
+from display_pool import display_pool, parse_screen_size
+from resource_profiles import get_launch_arguments
+from static_cache import static_cache
+from page_helpers import install_page_helpers
 
 
 class ChromeDriverManager:
@@ -29,16 +35,22 @@ class ChromeDriverManager:
             "/opt/google/chrome/chrome"
         ]
         
-    def setup_chrome_driver(self, headless: bool = None) -> Optional[uc.Chrome]:
+    def setup_chrome_driver(self, headless: bool = None, profile_name: str = None,
+                            screen_size: str = None) -> Optional[uc.Chrome]:
         """
         Setup and configure Chrome driver for Ubuntu
         
         Args:
             headless: Whether to run in headless mode
+            profile_name: Profile directory name under PROFILES_DIR
+                (defaults to a per-process profile)
+            screen_size: Xvfb screen 'WIDTHxHEIGHTxDEPTH' for headful runs
             
         Returns:
             Configured Chrome driver instance or None if failed
         """
+        display = None
+        reservation = None
         try:
             print("🔧 Chrome driver kurulumu başlatılıyor...")
             
@@ -53,29 +65,54 @@ class ChromeDriverManager:
             self.chrome_version = self.get_chrome_version()
             print(f"✅ Chrome versiyonu: {self.chrome_version}")
             
-            # Setup Chrome options
-            options = self._setup_chrome_options(headless or CHROME_CONFIG["headless"])
+            # Hold the launch while the host is short on memory/shm/CPU (reserves its memory)
+            reservation = admission_controller.wait_for_admission()
+            if reservation is None:
+                return None
+            
+            headless = headless or CHROME_CONFIG["headless"]
             
             # Create profile directory
-            profile_path = PROFILES_DIR / f"chrome-profile-{os.getpid()}"
+            profile_path = PROFILES_DIR / (profile_name or f"chrome-profile-{os.getpid()}")
             profile_path.mkdir(exist_ok=True)
             
+            # Headful Chrome gets its own pooled Xvfb display
+            if not headless:
+                display = display_pool.acquire(profile_path.name, screen_size)
+                if display:
+                    print(f"🖥️ Xvfb display atandı: {display}")
+            
+            # Setup Chrome options
+            options = self._setup_chrome_options(headless, display, screen_size)
+            
             # Launch undetected_chromedriver
             driver = uc.Chrome(
                 version_main=self.chrome_version,
                 options=options,
-                headless=headless or CHROME_CONFIG["headless"],
+                headless=headless,
                 user_data_dir=str(profile_path)
             )
             
+            # Supervise Chrome process tree (metrics, recycling, orphan cleanup)
+            browser_supervisor.register(driver, profile_path, display)
+            admission_controller.record_launch(reservation)
+            
+            # Serve Flow/Google static assets from the shared local store
+            static_cache.attach(driver)
+            
+            # Composite form actions for every page this browser loads
+            install_page_helpers(driver)
+            
             print("✅ Chrome driver başarıyla kuruldu!")
             return driver
             
         except Exception as e:
             print(f"❌ Chrome driver kurulum hatası: {e}")
+            display_pool.release(display)
+            admission_controller.release(reservation)
             return None
     
-    def _setup_chrome_options(self, headless: bool) -> Options:
+    def _setup_chrome_options(self, headless: bool, display: str = None, screen_size: str = None) -> Options:
         """Setup Chrome options for Ubuntu"""
         options = Options()
         
@@ -83,6 +120,13 @@ class ChromeDriverManager:
         if headless:
             options.add_argument("--headless")
         
+        # Virtual display, the window fills the Xvfb screen
+        if display:
+            screen = parse_screen_size(screen_size or display_pool.screen_size)
+            options.add_argument(f"--display={display}")
+            options.add_argument(f"--window-size={screen['width']},{screen['height']}")
+            options.add_argument("--window-position=0,0")
+        
         # Ubuntu-specific optimizations
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-dev-shm-usage")
@@ -100,11 +144,20 @@ class ChromeDriverManager:
         # Security options
         options.add_argument("--disable-web-security")
         options.add_argument("--allow-running-insecure-content")
-        options.add_argument("--disable-features=VizDisplayCompositor")
+        # Chrome only honors the last --disable-features switch, keep them in one
+        disabled_features = ["VizDisplayCompositor"]
+        if PREWARM_CONFIG["enabled"]:
+            # Let navigations reuse connections pre-warmed from another site's page
+            disabled_features.append("PartitionConnectionsByNetworkIsolationKey")
+        options.add_argument(f"--disable-features={','.join(disabled_features)}")
         
         # User agent
         options.add_argument(f"--user-agent={CHROME_CONFIG['user_agent']}")
         
+        # Launch arguments of the resource profile (blocking itself is applied per step via CDP)
+        for argument in get_launch_arguments():
+            options.add_argument(argument)
+        
         # Additional arguments
         options.add_argument("--disable-blink-features=AutomationControlled")
         options.add_argument("--disable-infobars")
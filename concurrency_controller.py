@@ -0,0 +1,135 @@
+"""
+Adaptive Concurrency Controller for Ubuntu Chrome Automation
+Raises the parallel browser limit additively and cuts it multiplicatively (AIMD)
+"""
+
+import math
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Deque
+
+from config import CONCURRENCY_CONFIG, SCHEDULER_CONFIG
+
+
+class AIMDConcurrencyController:
+    """
+    Adjusts how many jobs may run at once from finished job results
+    
+    Every window of finished jobs is one decision. When the success rate
+    and every step's median duration stay healthy the limit grows by one,
+    otherwise it is multiplied by decrease_factor. A step is unhealthy when
+    its median is latency_tolerance times slower than its baseline, the
+    median seen at the lowest limit (where browsers do not compete).
+    """
+    
+    def __init__(self, initial_limit: int = None):
+        self.min_limit = CONCURRENCY_CONFIG["min_limit"]
+        self.max_limit = max(self.min_limit, CONCURRENCY_CONFIG["max_limit"])
+        self.window_size = CONCURRENCY_CONFIG["window_size"]
+        self.min_success_rate = CONCURRENCY_CONFIG["min_success_rate"]
+        self.latency_tolerance = CONCURRENCY_CONFIG["latency_tolerance"]
+        self.decrease_factor = CONCURRENCY_CONFIG["decrease_factor"]
+        self.ignored_steps = set(CONCURRENCY_CONFIG["ignored_steps"])
+        
+        initial_limit = initial_limit or SCHEDULER_CONFIG["max_concurrent_jobs"]
+        self.limit = min(self.max_limit, max(self.min_limit, initial_limit))
+        self.baseline: Dict[str, float] = {}
+        self.window: List[Dict[str, Any]] = []
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=CONCURRENCY_CONFIG["history_size"])
+        self.lock = threading.Lock()
+        
+        # Failures a window may hold and still reach min_success_rate
+        self._allowed_failures = self.window_size - math.ceil(self.window_size * self.min_success_rate)
+    
+    def record(self, success: bool, step_timings: Dict[str, float] = None):
+        """
+        Record a finished job
+        
+        Args:
+            success: Whether the job succeeded
+            step_timings: Seconds spent in each automation step
+        """
+        with self.lock:
+            self.window.append({
+                "success": success,
+                "step_timings": dict(step_timings or {})
+            })
+            failures = sum(1 for result in self.window if not result["success"])
+            
+            # A window that can no longer reach the success rate is decided early
+            if failures > self._allowed_failures or len(self.window) >= self.window_size:
+                self._decide()
+    
+    def _decide(self):
+        results = self.window
+        self.window = []
+        success_rate = sum(1 for result in results if result["success"]) / len(results)
+        
+        medians = {}
+        for step in {step for result in results for step in result["step_timings"]}:
+            if step in self.ignored_steps:
+                continue
+            durations = [
+                result["step_timings"][step] for result in results
+                if result["success"] and step in result["step_timings"]
+            ]
+            if durations:
+                medians[step] = statistics.median(durations)
+        
+        slow_steps = [
+            step for step, median in medians.items()
+            if step in self.baseline and median > self.baseline[step] * self.latency_tolerance
+        ]
+        
+        old_limit = self.limit
+        if success_rate < self.min_success_rate:
+            self.limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+            reason = "low_success_rate"
+        elif slow_steps:
+            self.limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+            reason = "slow_steps"
+        else:
+            self.limit = min(self.max_limit, self.limit + 1)
+            reason = "healthy"
+        
+        # Baseline is the uncontended duration, refresh it at the lowest limit
+        for step, median in medians.items():
+            if old_limit == self.min_limit or step not in self.baseline:
+                self.baseline[step] = median
+            else:
+                self.baseline[step] = min(self.baseline[step], median)
+        
+        self.history.append({
+            "timestamp": time.time(),
+            "old_limit": old_limit,
+            "limit": self.limit,
+            "reason": reason,
+            "jobs": len(results),
+            "success_rate": round(success_rate, 2),
+            "slow_steps": slow_steps,
+            "step_medians": {step: round(median, 2) for step, median in medians.items()}
+        })
+        
+        if self.limit != old_limit:
+            print(f"⚖️ Eşzamanlı job limiti {old_limit} -> {self.limit} ({reason})")
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get current limit, step baselines and decision history"""
+        with self.lock:
+            return {
+                "limit": self.limit,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "window": {
+                    "jobs": len(self.window),
+                    "size": self.window_size
+                },
+                "baseline": {step: round(duration, 2) for step, duration in self.baseline.items()},
+                "history": list(self.history)
+            }
+
+
+# Process-wide controller, the scheduler reads its limit before every dispatch
+concurrency_controller = AIMDConcurrencyController()
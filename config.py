@@ -11,9 +11,14 @@ DATA_DIR = BASE_DIR / "data"
 LOGS_DIR = BASE_DIR / "logs"
 PROFILES_DIR = BASE_DIR / "profiles"
 DOWNLOADS_DIR = BASE_DIR / "downloads"
+STATIC_CACHE_DIR = DATA_DIR / "static_cache"
+MEDIA_DIR = BASE_DIR / "media"
+DOWNLOADED_VIDEOS_DIR = MEDIA_DIR / "downloaded_videos"
+MEDIA_OUTPUT_DIR = MEDIA_DIR / "output"
+MEDIA_STORE_DIR = MEDIA_DIR / "store"
 
 # Create directories if they don't exist
-for directory in [DATA_DIR, LOGS_DIR, PROFILES_DIR, DOWNLOADS_DIR]:
+for directory in [DATA_DIR, LOGS_DIR, PROFILES_DIR, DOWNLOADS_DIR, MEDIA_DIR, DOWNLOADED_VIDEOS_DIR, MEDIA_OUTPUT_DIR, MEDIA_STORE_DIR]:
     directory.mkdir(exist_ok=True)
 
 # Chrome Configuration
@@ -26,7 +31,45 @@ CHROME_CONFIG = {
     "disable_plugins": True,
     "disable_images": False,  # Keep images for better detection
     "disable_javascript": False,  # Keep JS for Flow functionality
-    "user_agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    "user_agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "resource_profile": "balanced"  # Launch profile from RESOURCE_PROFILES
+}
+
+# Resource Profiles - heavy content blocked per step through CDP Network.setBlockedURLs
+# Patterns end with * so URLs with query strings match too
+RESOURCE_BLOCK_PATTERNS = {
+    "images": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.ico*", "*.svg*"],
+    "fonts": ["*.woff*", "*.ttf*", "*.otf*", "*fonts.gstatic.com/*"],
+    "media": ["*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*", "*.ogg*"],
+    "trackers": [
+        "*google-analytics.com/*",
+        "*googletagmanager.com/*",
+        "*doubleclick.net/*",
+        "*googlesyndication.com/*"
+    ]
+}
+
+RESOURCE_PROFILES = {
+    "lean": {
+        "blocked": ["images", "fonts", "media", "trackers"],
+        "launch_arguments": ["--mute-audio", "--disable-background-networking"]
+    },
+    "balanced": {
+        "blocked": ["media", "trackers"],
+        "launch_arguments": ["--mute-audio"]
+    },
+    "full": {
+        "blocked": [],
+        "launch_arguments": []
+    }
+}
+
+# Runtime profile per automation step, a job's own profile overrides these
+STEP_RESOURCE_PROFILES = {
+    "login": "lean",
+    "flow_navigation": "lean",
+    "onboarding": "balanced",
+    "project_creation": "full"
 }
 
 # Session Configuration
@@ -42,8 +85,28 @@ FLOW_CONFIG = {
     "base_url": "https://labs.google/fx/tools/flow",
     "login_url": "https://accounts.google.com/signin",
     "wait_timeout": 20,
-    "project_creation_delay": 5,
-    "video_quality": "720p"
+    "project_creation_timeout": 30,  # Seconds to wait for the created project's ID
+    "video_quality": "720p",
+    "credits_per_project": 20,  # Default credits for a generation with unknown model
+    "page_ready_timeout": 10,  # Seconds to wait for the Flow UI after navigation
+    "page_settle_seconds": 3,  # Loaded Flow page without a create button counts as ready after this
+    "page_state_poll_interval": 0.25,
+    "submit_ready_timeout": 3  # Seconds a page helper waits for a submit button to become enabled
+}
+
+# TOTP 2-Step Verification Configuration
+TOTP_CONFIG = {
+    "digits": 6,
+    "period": 30,
+    "min_validity_seconds": 3,  # Wait for the next code if the current one expires sooner
+    "verify_timeout": 10  # Seconds to wait for the challenge page to go away
+}
+
+# Expected credit cost of one generation per model
+MODEL_CREDIT_COSTS = {
+    "veo-3": 100,
+    "veo-3-fast": 20,
+    "veo-2": 10
 }
 
 # Account Pool Configuration
@@ -53,6 +116,191 @@ ACCOUNT_CONFIG = {
     "max_login_attempts": 3
 }
 
+# Job Scheduler Configuration
+SCHEDULER_CONFIG = {
+    "max_concurrent_jobs": 1,  # Starting limit, adjusted by the concurrency controller
+    "dispatch_interval": 1.0  # Seconds between queue re-evaluations
+}
+
+# Standby Account Configuration
+STANDBY_CONFIG = {
+    "enabled": True,
+    "check_interval": 30,  # Seconds between credit burn forecasts
+    "warmup_lead_seconds": 600,  # Warm up next account this long before credits run out
+    "jobs_margin": 1,  # Also warm up when remaining credits cover this many jobs or fewer
+    "sample_window": 20,  # Credit samples kept per account for forecasting
+    "min_samples": 2
+}
+
+# System Metrics Configuration
+METRICS_CONFIG = {
+    "sample_interval": 5,  # Seconds between /proc samples
+    "disk_sample_every": 12  # Walk profile/download dirs every N samples
+}
+
+# Browser Supervisor Configuration
+SUPERVISOR_CONFIG = {
+    "check_interval": 15,  # Seconds between process tree samples
+    "max_jobs_per_browser": 20,  # Recycle browser after this many jobs
+    "max_process_rss_mb": 1024,  # PRD: max 1GB RAM per process
+    "max_idle_seconds": 900,  # Close pooled browsers idle longer than this
+    "kill_timeout": 5,  # Seconds to wait after SIGTERM before SIGKILL
+    "reap_orphans_on_startup": True
+}
+
+# Admission Control Configuration
+ADMISSION_CONFIG = {
+    "enabled": True,
+    "min_available_memory_mb": 512,  # Memory that must stay free after a launch
+    "browser_memory_estimate_mb": 700,  # Used until real browser RSS is known
+    "max_shm_percent": 80,  # /dev/shm usage limit
+    "max_load_per_cpu": 1.5,  # 1 minute load average per CPU limit
+    "launch_wait_timeout": 120  # Seconds a browser launch waits for admission
+}
+
+# Chrome DevTools Protocol Configuration
+CDP_CONFIG = {
+    "connect_timeout": 5,
+    "command_timeout": 10
+}
+
+# Shared Static Asset Cache (served to every browser through CDP Fetch)
+STATIC_CACHE_CONFIG = {
+    "enabled": True,
+    "max_size_mb": 512,
+    "max_entry_size_mb": 20,
+    "default_ttl_seconds": 86400,  # Used when a response has no max-age but cannot change
+    "index_flush_seconds": 2,  # Index writes after stores are batched into one per this interval
+    "workers": 4,  # Threads answering paused requests, off the shared CDP event thread
+    "hashed_url_patterns": [  # URLs whose content never changes (build or content hash in the path)
+        r"/_next/static/",
+        r"[/._-][0-9a-fA-F]{8,}[/._-]"
+    ],
+    "url_patterns": [
+        "https://www.gstatic.com/*",
+        "https://ssl.gstatic.com/*",
+        "https://fonts.gstatic.com/*",
+        "https://fonts.googleapis.com/*",
+        "https://labs.google/fx/_next/static/*"
+    ],
+    "resource_types": ["Script", "Stylesheet", "Font", "Image"]
+}
+
+# Connection Pre-warming for idle pooled browsers
+PREWARM_CONFIG = {
+    "enabled": True,
+    "interval_seconds": 120,  # Below the servers' idle connection timeout
+    "origins": [
+        "https://labs.google",
+        "https://accounts.google.com",
+        "https://www.gstatic.com"
+    ]
+}
+
+# Virtual Display Configuration (Xvfb, headful Chrome only)
+DISPLAY_CONFIG = {
+    "enabled": True,
+    "base_display": 100,  # First display number, :100, :101, ...
+    "max_displays": ACCOUNT_CONFIG["max_concurrent_accounts"] + 1,  # Parallel browsers plus standby
+    "prewarm_displays": 1,  # Idle displays kept started for the next browser
+    "screen_size": "1920x1080x24",  # WIDTHxHEIGHTxDEPTH
+    "startup_timeout": 10
+}
+
+# Adaptive Concurrency Configuration (AIMD)
+CONCURRENCY_CONFIG = {
+    "min_limit": 1,
+    "max_limit": ACCOUNT_CONFIG["max_concurrent_accounts"],
+    "window_size": 5,  # Finished jobs per decision
+    "min_success_rate": 0.9,  # Lower success rate halves the limit
+    "latency_tolerance": 1.5,  # Step slower than baseline by this factor halves the limit
+    "decrease_factor": 0.5,
+    "ignored_steps": ["login"],  # Steps that do not depend on concurrency
+    "history_size": 50
+}
+
+# Project ID Capture (Flow's project creation API responses, read through CDP Network)
+PROJECT_CAPTURE_CONFIG = {
+    "create_url_patterns": [r"labs\.google/fx/api/.*create_?project"],  # Creation request only, case-insensitive
+    "create_methods": ["POST"],
+    "id_keys": ["projectId", "project_id"]
+}
+
+# Generation Watcher (status API polls of pending Flow projects, one task for all jobs)
+GENERATION_WATCH_CONFIG = {
+    "enabled": True,
+    # Flow's project status API (JSON), formatted with project_id/project_url
+    "status_url": "https://labs.google/fx/api/trpc/project.getProject?input=%7B%22json%22%3A%7B%22projectId%22%3A%22{project_id}%22%7D%7D",
+    "expected_render_seconds": 90,  # Polls get denser towards this age of a generation
+    "min_interval": 5,
+    "max_interval": 60,
+    "backoff_factor": 1.5,  # Interval growth after the expected render time
+    "timeout_seconds": 900,  # Only a generation reported as pending this long counts as failed
+    "max_parallel_polls": 4,
+    "max_consecutive_errors": 5,  # Then the job finishes with an unknown state (project link only)
+    "max_unknown_checks": 5,  # Responses not describing the project before giving up the same way
+    "request_timeout": 15,
+    "project_id_keys": ["projectId", "project_id", "id"],  # Marks the JSON object of the watched project
+    "status_keys": ["status", "state", "generationStatus"],
+    "completed_status_pattern": r"SUCCE|COMPLETE",
+    "failed_status_pattern": r"FAIL|ERROR|CANCEL|BLOCK",
+    "video_url_keys": ["videoUrl", "fifeUrl", "servingUri"],  # URL fields of generated videos
+    "video_url_patterns": [r'https://[^\s"\'<>]+?\.mp4[^\s"\'<>]*']  # Other video links inside the project
+}
+
+# Video Download Configuration (finished videos into media/downloaded_videos)
+DOWNLOAD_CONFIG = {
+    "chunk_size": 1024 * 1024,
+    "max_retries": 5,  # Resumed attempts after an interrupted transfer or a retryable status
+    "retry_backoff": 2,  # Seconds, doubled per attempt
+    "request_timeout": 30,  # Seconds without data before a transfer counts as interrupted
+    # Base URL the website reaches this server at (e.g. the tunnel or load balancer), from PUBLIC_BASE_URL
+    "public_url": os.getenv("PUBLIC_BASE_URL", "http://localhost:8000").rstrip("/") + "/api/v1/media/downloaded_videos/{filename}",
+    "retry_statuses": [429, 500, 502, 503, 504],  # Server responses retried like an interrupted transfer
+    "max_retry_after": 60  # Seconds, upper bound for a server's Retry-After
+}
+
+# Browser Download Tracking (CDP Browser.downloadProgress, per-job directory under DOWNLOADS_DIR)
+BROWSER_DOWNLOAD_CONFIG = {
+    "start_timeout": 15,  # Seconds for the browser to begin the download
+    "timeout": 600  # Seconds for the download to complete
+}
+
+# Media Serving Configuration (range and conditional requests)
+MEDIA_SERVE_CONFIG = {
+    "stat_ttl_seconds": 5,  # Cached file metadata is re-validated with os.stat after this
+    "chunk_size": 256 * 1024,
+    "cache_control": "public, max-age=3600"
+}
+
+# Media Store Configuration (content-addressed blobs under media/store)
+MEDIA_STORE_CONFIG = {
+    "index_file": DATA_DIR / "media_store.json",  # Filename -> hash index and per-job references
+    "max_age_days": 30,  # Files older than this are released by retention
+    "max_total_bytes": 20 * 1024 ** 3  # Oldest files are released while the store is larger
+}
+
+# Prompt Result Cache (identical prompt + model + action completes from a previous result)
+PROMPT_CACHE_CONFIG = {
+    "enabled": True,
+    "ttl_seconds": 6 * 3600,
+    "max_entries": 500
+}
+
+# Job Progress Streaming (?wait= long-poll and server-sent events)
+JOB_PROGRESS_CONFIG = {
+    "max_wait_seconds": 60,  # Upper bound for ?wait=
+    "recheck_interval": 1,  # Seconds between state comparisons while waiting for a change
+    "keepalive_seconds": 15  # SSE comment sent when nothing changed for this long
+}
+
+# DOM Wait Configuration (MutationObserver reporting through a CDP binding)
+DOM_WAIT_CONFIG = {
+    "binding_name": "__flowDomMatch",
+    "recheck_interval": 2,  # Seconds between safety re-checks while waiting for a push
+    "poll_interval": 0.25  # Polling interval when the browser has no CDP session
+}
+
 # Logging Configuration
 LOGGING_CONFIG = {
     "level": "INFO",
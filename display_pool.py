@@ -0,0 +1,326 @@
+"""
+Virtual Display Pool for Ubuntu Chrome Automation
+Keeps pre-started Xvfb displays and assigns one to every headful browser
+"""
+
+import atexit
+import os
+import secrets
+import shutil
+import socket
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Set
+
+from config import DISPLAY_CONFIG
+
+X11_SOCKET_DIR = Path("/tmp/.X11-unix")
+XAUTH_FAMILY_WILD = 0xFFFF
+XAUTH_PROTOCOL = b"MIT-MAGIC-COOKIE-1"
+
+
+def write_xauthority(path: Path, display_numbers, cookie: bytes):
+    """Write an Xauthority file granting the cookie on the given displays (owner read/write only)"""
+    def field(value: bytes) -> bytes:
+        return struct.pack(">H", len(value)) + value
+    
+    data = b"".join(
+        struct.pack(">H", XAUTH_FAMILY_WILD) + field(b"") + field(str(number).encode())
+        + field(XAUTH_PROTOCOL) + field(cookie)
+        for number in sorted(display_numbers)
+    )
+    temp_path = path.with_suffix(".tmp")
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def parse_screen_size(screen_size: str) -> Dict[str, int]:
+    """Parse 'WIDTHxHEIGHTxDEPTH' into its parts"""
+    width, height, depth = (int(part) for part in screen_size.lower().split("x"))
+    return {"width": width, "height": height, "depth": depth}
+
+
+class XvfbDisplay:
+    """A single Xvfb server"""
+    
+    def __init__(self, number: int, screen_size: str):
+        self.number = number
+        self.screen_size = screen_size
+        self.process: Optional[subprocess.Popen] = None
+        self.started_at: Optional[float] = None
+        self.owner: Optional[str] = None
+        self.browsers_served = 0
+    
+    @property
+    def name(self) -> str:
+        return f":{self.number}"
+    
+    @property
+    def socket_path(self) -> Path:
+        return X11_SOCKET_DIR / f"X{self.number}"
+    
+    def start(self, auth_file: Path, timeout: float = None) -> bool:
+        """Start Xvfb with cookie access control and wait until it accepts connections"""
+        timeout = timeout if timeout is not None else DISPLAY_CONFIG["startup_timeout"]
+        try:
+            self.process = subprocess.Popen(
+                ["Xvfb", self.name, "-screen", "0", self.screen_size, "-nolisten", "tcp", "-auth", str(auth_file)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                # Own session so terminal signals don't reach it; stopped by the pool
+                # on exit, or reaped as an orphan on the next startup after a crash
+                start_new_session=True
+            )
+        except OSError as e:
+            print(f"❌ Xvfb başlatılamadı ({self.name}): {e}")
+            return False
+        
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                break
+            if self.is_healthy():
+                self.started_at = time.time()
+                return True
+            time.sleep(0.1)
+        
+        print(f"❌ Xvfb {self.name} hazır olmadı")
+        self.stop()
+        return False
+    
+    def is_healthy(self) -> bool:
+        """Check that Xvfb runs and accepts connections on its socket"""
+        if not self.process or self.process.poll() is not None:
+            return False
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(1)
+                sock.connect(str(self.socket_path))
+            return True
+        except OSError:
+            return False
+    
+    def stop(self):
+        """Stop Xvfb"""
+        if not self.process:
+            return
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "display": self.name,
+            "screen_size": self.screen_size,
+            "owner": self.owner,
+            "healthy": self.is_healthy(),
+            "pid": self.process.pid if self.process else None,
+            "browsers_served": self.browsers_served,
+            "uptime_seconds": round(time.time() - self.started_at) if self.started_at else None
+        }
+
+
+class XvfbDisplayPool:
+    """Pre-starts Xvfb displays and hands out one per browser, reusing them between browsers"""
+    
+    def __init__(self):
+        self.enabled = DISPLAY_CONFIG["enabled"]
+        self.base_display = DISPLAY_CONFIG["base_display"]
+        self.max_displays = DISPLAY_CONFIG["max_displays"]
+        self.prewarm = DISPLAY_CONFIG["prewarm_displays"]
+        self.screen_size = DISPLAY_CONFIG["screen_size"]
+        self.displays: List[XvfbDisplay] = []
+        self.lock = threading.Lock()
+        self._available: Optional[bool] = None
+        # Only clients with this cookie (our Chromes, via XAUTHORITY) may connect
+        self.cookie = secrets.token_bytes(16)
+        self.auth_file: Optional[Path] = None
+        self._authorized: Set[int] = set()
+    
+    def is_available(self) -> bool:
+        """Check if the pool is enabled and Xvfb is installed"""
+        if self._available is None:
+            self._available = self.enabled and shutil.which("Xvfb") is not None
+            if self.enabled and not self._available:
+                print("⚠️ Xvfb bulunamadı - headful browser'lar mevcut DISPLAY'i kullanacak")
+        return self._available
+    
+    def start(self):
+        """Pre-start idle displays"""
+        if not self.is_available():
+            return
+        
+        self.maintain()
+        with self.lock:
+            names = [display.name for display in self.displays]
+        print(f"✅ Xvfb display havuzu hazır: {', '.join(names) or '-'}")
+    
+    def stop(self):
+        """Stop every display"""
+        with self.lock:
+            displays = list(self.displays)
+            self.displays.clear()
+        for display in displays:
+            display.stop()
+        with self.lock:
+            auth_file, self.auth_file = self.auth_file, None
+            self._authorized.clear()
+        if auth_file:
+            shutil.rmtree(auth_file.parent, ignore_errors=True)
+    
+    def _free_number(self) -> Optional[int]:
+        """Find a display number not used by this pool nor by another X server"""
+        used = {display.number for display in self.displays}
+        for number in range(self.base_display, self.base_display + self.max_displays * 4):
+            if number in used:
+                continue
+            if Path(f"/tmp/.X{number}-lock").exists() or (X11_SOCKET_DIR / f"X{number}").exists():
+                continue
+            return number
+        return None
+    
+    def is_pool_display(self, number: int) -> bool:
+        """Check if a display number is in the range this pool starts displays in"""
+        return self.base_display <= number < self.base_display + self.max_displays * 4
+    
+    def _authorize(self, number: int) -> Path:
+        """Add a display to the pool's Xauthority file (lock held)"""
+        if not self.auth_file:
+            self.auth_file = Path(tempfile.mkdtemp(prefix="flow-xauth-")) / "Xauthority"
+            # Chrome is started by this process and inherits the variable
+            os.environ["XAUTHORITY"] = str(self.auth_file)
+        if number not in self._authorized:
+            self._authorized.add(number)
+            write_xauthority(self.auth_file, self._authorized, self.cookie)
+        return self.auth_file
+    
+    def _start_display(self, screen_size: str, owner: str = None) -> Optional[XvfbDisplay]:
+        """Reserve a display number under the lock and start Xvfb outside it"""
+        with self.lock:
+            if len(self.displays) >= self.max_displays:
+                return None
+            number = self._free_number()
+            if number is None:
+                return None
+            display = XvfbDisplay(number, screen_size)
+            display.owner = owner
+            self.displays.append(display)
+            auth_file = self._authorize(number)
+        
+        if display.start(auth_file):
+            return display
+        with self.lock:
+            self.displays.remove(display)
+        return None
+    
+    def acquire(self, owner: str, screen_size: str = None) -> Optional[str]:
+        """
+        Assign a display to a browser
+        
+        Args:
+            owner: Browser profile name using the display
+            screen_size: 'WIDTHxHEIGHTxDEPTH', defaults to DISPLAY_CONFIG
+        
+        Returns:
+            Display name like ':100', or None when no display could be assigned
+        """
+        if not self.is_available():
+            return None
+        screen_size = screen_size or self.screen_size
+        
+        while True:
+            with self.lock:
+                display = next(
+                    (d for d in self.displays
+                     if d.owner is None and d.started_at and d.screen_size == screen_size),
+                    None
+                )
+                if display:
+                    display.owner = owner
+            if not display:
+                break
+            if display.is_healthy():
+                display.browsers_served += 1
+                return display.name
+            self._discard(display)
+        
+        display = self._start_display(screen_size, owner)
+        if not display:
+            # Pool is full of other screen sizes, replace an idle one
+            with self.lock:
+                display = next((d for d in self.displays if d.owner is None and d.started_at), None)
+                if display:
+                    display.owner = owner
+            if display:
+                self._discard(display)
+                display = self._start_display(screen_size, owner)
+        
+        if not display:
+            print(f"❌ Boş Xvfb display bulunamadı (max {self.max_displays})")
+            return None
+        
+        display.browsers_served += 1
+        return display.name
+    
+    def release(self, name: Optional[str]):
+        """Return a display to the pool once its browser is gone"""
+        if not name:
+            return
+        with self.lock:
+            display = next((d for d in self.displays if d.name == name), None)
+            if display:
+                display.owner = None
+    
+    def _discard(self, display: XvfbDisplay):
+        with self.lock:
+            if display in self.displays:
+                self.displays.remove(display)
+        display.stop()
+    
+    def maintain(self):
+        """Replace crashed idle displays and keep prewarm displays ready"""
+        if not self.is_available():
+            return
+        
+        with self.lock:
+            idle = [display for display in self.displays if display.owner is None and display.started_at]
+        for display in idle:
+            if not display.is_healthy():
+                print(f"⚠️ Xvfb {display.name} yanıt vermiyor, yeniden başlatılıyor")
+                self._discard(display)
+        
+        with self.lock:
+            ready = sum(
+                1 for display in self.displays
+                if display.owner is None and display.screen_size == self.screen_size
+            )
+        for _ in range(self.prewarm - ready):
+            if not self._start_display(self.screen_size):
+                break
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get displays and their owners"""
+        with self.lock:
+            displays = list(self.displays)
+        return {
+            "available": self.is_available(),
+            "max_displays": self.max_displays,
+            "screen_size": self.screen_size,
+            "displays": [display.get_status() for display in displays]
+        }
+
+
+# Process-wide display pool, ChromeDriverManager assigns displays from here
+display_pool = XvfbDisplayPool()
+atexit.register(display_pool.stop)
@@ -0,0 +1,60 @@
+"""
+DOM Probe for Ubuntu Chrome Automation
+Finds every known button of a page in a single WebDriver round-trip
+"""
+
+from typing import Dict, Any, List
+
+# Matches like //button[contains(text(), label)]: the label must be in the
+# button's own text nodes, not in icon ligatures or other child elements.
+# A button whose own text equals the label is preferred over one merely
+# containing it. Visible and enabled buttons only, and each button is
+# returned for one label at most.
+PROBE_BUTTONS_SCRIPT = """
+const groups = arguments[0];
+const isVisible = element => {
+    const style = window.getComputedStyle(element);
+    return style.display !== "none" && style.visibility !== "hidden" && element.getClientRects().length > 0;
+};
+const ownText = element => Array.from(element.childNodes)
+    .filter(node => node.nodeType === Node.TEXT_NODE)
+    .map(node => node.textContent)
+    .join(" ").replace(/\\s+/g, " ").trim();
+const buttons = Array.from(document.querySelectorAll("button"))
+    .filter(button => !button.disabled && isVisible(button))
+    .map(button => ({element: button, text: ownText(button)}));
+const used = new Set();
+const result = {};
+for (const [group, labels] of Object.entries(groups)) {
+    result[group] = [];
+    for (const label of labels) {
+        const free = buttons.filter(candidate => !used.has(candidate.element));
+        const button = free.find(candidate => candidate.text === label)
+            || free.find(candidate => candidate.text.includes(label));
+        if (button) {
+            used.add(button.element);
+            result[group].push({label: label, element: button.element});
+        }
+    }
+}
+return result;
+"""
+
+
+def probe_buttons(driver, groups: Dict[str, List[str]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Find visible buttons of several label groups at once
+    
+    Args:
+        driver: WebDriver of the page
+        groups: Button labels per group, in priority order
+    
+    Returns:
+        Present buttons per group as {"label", "element"} in label order
+    """
+    try:
+        result = driver.execute_script(PROBE_BUTTONS_SCRIPT, groups) or {}
+    except Exception as e:
+        print(f"⚠️ DOM probe hatası: {e}")
+        result = {}
+    return {group: result.get(group, []) for group in groups}
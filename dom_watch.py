@@ -0,0 +1,238 @@
+"""
+DOM Watcher for Ubuntu Chrome Automation
+Push-based element waits through an in-page MutationObserver and a CDP binding
+"""
+
+import itertools
+import json
+import threading
+import time
+import weakref
+from typing import Optional, Dict, Any, List
+
+from cdp_client import cdp_sessions, CDPSession
+from config import DOM_WAIT_CONFIG, FLOW_CONFIG
+
+# Installed on every new document as window.__flowWatch.
+# Selectors starting with "/" or "(" are XPath, everything else is CSS.
+# States: present, visible, clickable (visible and enabled), hidden (absent or invisible).
+# Matches are pushed to Python through the binding, a new document reports
+# itself so Python can re-arm the watches the navigation dropped.
+DOM_WATCH_SOURCE = """
+(() => {
+    if (window.__flowWatch) {
+        return;
+    }
+    const binding = "__BINDING__";
+    const isVisible = element => {
+        const style = window.getComputedStyle(element);
+        return style.display !== "none" && style.visibility !== "hidden" && element.getClientRects().length > 0;
+    };
+    const query = selector => {
+        if (selector.startsWith("/") || selector.startsWith("(")) {
+            return document.evaluate(
+                selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+            ).singleNodeValue;
+        }
+        return document.querySelector(selector);
+    };
+    const matches = (selector, state) => {
+        let element = null;
+        try {
+            element = query(selector);
+        } catch (e) {
+            return false;
+        }
+        if (state === "hidden") {
+            return !element || !isVisible(element);
+        }
+        if (!element) {
+            return false;
+        }
+        if (state === "present") {
+            return true;
+        }
+        return isVisible(element) && (state === "visible" || !element.disabled);
+    };
+    const check = (selectors, state) => {
+        const selector = selectors.find(candidate => matches(candidate, state));
+        return selector === undefined ? null : selector;
+    };
+    const notify = payload => {
+        if (typeof window[binding] === "function") {
+            window[binding](JSON.stringify(payload));
+        }
+    };
+    const watches = new Map();
+    const observer = new MutationObserver(() => {
+        for (const [id, watch] of watches) {
+            const selector = check(watch.selectors, watch.state);
+            if (selector !== null) {
+                watches.delete(id);
+                notify({id: id, selector: selector});
+            }
+        }
+        if (!watches.size) {
+            observer.disconnect();
+        }
+    });
+    window.__flowWatch = {
+        check: check,
+        add(id, selectors, state) {
+            const selector = check(selectors, state);
+            if (selector !== null) {
+                return selector;
+            }
+            if (!watches.size) {
+                observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+            }
+            watches.set(id, {selectors: selectors, state: state});
+            return null;
+        },
+        remove(id) {
+            watches.delete(id);
+            if (!watches.size) {
+                observer.disconnect();
+            }
+        }
+    };
+    if (document.readyState === "loading") {
+        notify({event: "document"});
+    }
+})();
+""".replace("__BINDING__", DOM_WAIT_CONFIG["binding_name"])
+
+ARM_SCRIPT = DOM_WATCH_SOURCE + """
+return window.__flowWatch.add(arguments[0], arguments[1], arguments[2]);
+"""
+
+CHECK_SCRIPT = DOM_WATCH_SOURCE + """
+return window.__flowWatch.check(arguments[0], arguments[1]);
+"""
+
+REMOVE_SCRIPT = """
+if (window.__flowWatch) {
+    window.__flowWatch.remove(arguments[0]);
+}
+"""
+
+
+class DomWatcher:
+    """
+    Waits for selectors without polling WebDriver
+    
+    Each wait arms a watch in the page; the page's MutationObserver calls
+    the CDP binding when a selector reaches the wanted state, so the
+    waiting thread only wakes on DOM changes. Browsers without a CDP
+    session fall back to polling with the same in-page check.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waiters: "weakref.WeakKeyDictionary[CDPSession, Dict[str, Dict[str, Any]]]" = weakref.WeakKeyDictionary()
+        self._ids = itertools.count(1)
+    
+    def _attach(self, driver) -> Optional[CDPSession]:
+        """Add the binding and watch library to the browser once per session"""
+        if driver is None:
+            return None
+        session = cdp_sessions.get(driver)
+        if not session:
+            return None
+        
+        with self.lock:
+            if session in self.waiters:
+                return session
+            self.waiters[session] = {}
+        
+        try:
+            session.on("Runtime.bindingCalled", lambda params: self._on_binding(session, params))
+            session.send("Runtime.addBinding", {"name": DOM_WAIT_CONFIG["binding_name"]})
+            session.send("Page.addScriptToEvaluateOnNewDocument", {"source": DOM_WATCH_SOURCE})
+            return session
+        except Exception as e:
+            print(f"⚠️ DOM watcher bağlanamadı: {e}")
+            with self.lock:
+                self.waiters.pop(session, None)
+            return None
+    
+    def _on_binding(self, session: CDPSession, params: Dict[str, Any]):
+        if params.get("name") != DOM_WAIT_CONFIG["binding_name"]:
+            return
+        payload = json.loads(params.get("payload") or "{}")
+        with self.lock:
+            waiters = self.waiters.get(session, {})
+            if payload.get("event") == "document":
+                # Navigation dropped every watch, let the waiters re-arm
+                woken = list(waiters.values())
+            else:
+                waiter = waiters.get(payload.get("id"))
+                woken = [waiter] if waiter else []
+                if waiter:
+                    waiter["selector"] = payload.get("selector")
+        for waiter in woken:
+            waiter["event"].set()
+    
+    def wait_for(self, driver, selectors: List[str], state: str = "present",
+                 timeout: float = None) -> Optional[str]:
+        """
+        Wait until one of the selectors reaches a state
+        
+        Args:
+            driver: WebDriver of the page
+            selectors: CSS or XPath selectors in priority order
+            state: present, visible, clickable or hidden
+            timeout: Seconds to wait (defaults to FLOW_CONFIG wait_timeout)
+        
+        Returns:
+            First selector in the wanted state, None on timeout
+        """
+        timeout = timeout if timeout is not None else FLOW_CONFIG["wait_timeout"]
+        deadline = time.time() + timeout
+        session = self._attach(driver)
+        if not session:
+            return self._poll(driver, selectors, state, deadline)
+        
+        waiter_id = f"wait-{next(self._ids)}"
+        waiter = {"event": threading.Event(), "selector": None}
+        with self.lock:
+            self.waiters.setdefault(session, {})[waiter_id] = waiter
+        
+        try:
+            while not session.closed:
+                waiter["event"].clear()
+                selector = self._run(driver, ARM_SCRIPT, waiter_id, selectors, state)
+                if selector is not None:
+                    return selector
+                
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self._run(driver, REMOVE_SCRIPT, waiter_id)
+                    return None
+                
+                # Woken by a match or a new document; re-check now and then in case a push was missed
+                waiter["event"].wait(min(remaining, DOM_WAIT_CONFIG["recheck_interval"]))
+                if waiter["selector"] is not None:
+                    return waiter["selector"]
+            return self._poll(driver, selectors, state, deadline)
+        finally:
+            with self.lock:
+                self.waiters.get(session, {}).pop(waiter_id, None)
+    
+    def _poll(self, driver, selectors: List[str], state: str, deadline: float) -> Optional[str]:
+        while True:
+            selector = self._run(driver, CHECK_SCRIPT, selectors, state)
+            if selector is not None or time.time() >= deadline:
+                return selector
+            time.sleep(DOM_WAIT_CONFIG["poll_interval"])
+    
+    def _run(self, driver, script: str, *args) -> Optional[str]:
+        try:
+            return driver.execute_script(script, *args)
+        except Exception:
+            # Page is navigating, the next document re-arms the watch
+            return None
+
+
+# Process-wide watcher shared by all browsers
+dom_watcher = DomWatcher()
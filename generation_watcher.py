@@ -0,0 +1,287 @@
+"""
+Generation Watcher for Ubuntu Chrome Automation
+Follows pending Flow generations of many jobs with one polling task instead of one browser each
+"""
+
+import asyncio
+import json
+import re
+import time
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+import requests
+
+from config import GENERATION_WATCH_CONFIG
+
+VIDEO_URL_PATTERNS = [re.compile(pattern) for pattern in GENERATION_WATCH_CONFIG["video_url_patterns"]]
+COMPLETED_STATUS = re.compile(GENERATION_WATCH_CONFIG["completed_status_pattern"], re.IGNORECASE)
+FAILED_STATUS = re.compile(GENERATION_WATCH_CONFIG["failed_status_pattern"], re.IGNORECASE)
+
+# Anti-JSON-hijacking prefix some Google APIs put before the body
+JSON_PREFIX = re.compile(r"^\)\]\}'?\s*")
+
+
+def _find_project(node: Any, project_id: str) -> Optional[Dict[str, Any]]:
+    """Find the JSON object describing the project"""
+    if isinstance(node, dict):
+        if any(node.get(key) == project_id for key in GENERATION_WATCH_CONFIG["project_id_keys"]):
+            return node
+        children = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        found = _find_project(child, project_id)
+        if found is not None:
+            return found
+    return None
+
+
+def _collect(node: Any, statuses: List[str], video_urls: List[str], key: str = None):
+    """Collect status values and video links of a project object"""
+    if isinstance(node, dict):
+        for child_key, child in node.items():
+            _collect(child, statuses, video_urls, child_key)
+    elif isinstance(node, list):
+        for child in node:
+            _collect(child, statuses, video_urls, key)
+    elif isinstance(node, str):
+        if key in GENERATION_WATCH_CONFIG["status_keys"]:
+            statuses.append(node)
+        urls = [node] if key in GENERATION_WATCH_CONFIG["video_url_keys"] and node.startswith("https://") else []
+        for pattern in VIDEO_URL_PATTERNS:
+            urls.extend(pattern.findall(node))
+        for url in urls:
+            if url not in video_urls:
+                video_urls.append(url)
+
+
+def parse_generation_status(text: str, project_id: str) -> Dict[str, Any]:
+    """
+    Read a project's generation state out of a status API response
+    
+    Only the JSON object whose ID is project_id is looked at, so videos of
+    other projects (or page assets) never complete the wrong job.
+    
+    Returns:
+        {"state": "completed" | "failed" | "pending" | "unknown", "video_urls": [...]}
+        "unknown" when the response does not describe the project
+    """
+    try:
+        payload = json.loads(JSON_PREFIX.sub("", text, count=1))
+    except ValueError:
+        return {"state": "unknown", "video_urls": []}
+    project = _find_project(payload, project_id)
+    if project is None:
+        return {"state": "unknown", "video_urls": []}
+    
+    statuses: List[str] = []
+    video_urls: List[str] = []
+    _collect(project, statuses, video_urls)
+    if any(FAILED_STATUS.search(status) for status in statuses):
+        return {"state": "failed", "video_urls": []}
+    if video_urls and (not statuses or any(COMPLETED_STATUS.search(status) for status in statuses)):
+        return {"state": "completed", "video_urls": video_urls}
+    return {"state": "pending", "video_urls": []}
+
+
+def build_http_session(web_session: Dict[str, Any]) -> requests.Session:
+    """Create a requests session with a browser's cookies and user agent"""
+    http = requests.Session()
+    for cookie in web_session.get("cookies", []):
+        http.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+    if web_session.get("user_agent"):
+        http.headers["User-Agent"] = web_session["user_agent"]
+    return http
+
+
+class GenerationWatcher:
+    """
+    Tracks pending generations of all jobs in one asyncio task
+    
+    Each project is polled with a lightweight authenticated request using
+    its job's browser cookies, so the job's browser is released as soon as
+    the prompt is submitted. Polls get denser towards the expected render
+    time and back off once it is overdue. A project the status API never
+    describes (or cannot be reached for) finishes as "unknown" rather than
+    failed; only a generation reported as running can time out.
+    """
+    
+    def __init__(self):
+        self.watches: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"completed": 0, "failed": 0, "timed_out": 0, "unknown": 0, "polls": 0}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._poll_slots: Optional[asyncio.Semaphore] = None
+    
+    def start(self):
+        """Start the watch task on the running event loop"""
+        if self._task and not self._task.done():
+            return
+        
+        self._wakeup = asyncio.Event()
+        self._poll_slots = asyncio.Semaphore(GENERATION_WATCH_CONFIG["max_parallel_polls"])
+        self._task = asyncio.create_task(self._watch_loop())
+        print("✅ Generation watcher başlatıldı")
+    
+    async def stop(self):
+        """Stop the watch task, pending watches are dropped"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def watch(self, job_id: str, project_id: str, project_url: str, web_session: Dict[str, Any],
+              on_finish: Callable[[str, Dict[str, Any]], Awaitable[Any]]):
+        """
+        Follow a project's generation until it finishes
+        
+        Args:
+            job_id: Job the generation belongs to
+            project_id: Flow project ID
+            project_url: Flow project page URL
+            web_session: Cookies and user agent of the browser that created it
+            on_finish: Coroutine function called with job_id and the final status
+        """
+        now = time.time()
+        self.watches[job_id] = {
+            "job_id": job_id,
+            "project_id": project_id,
+            "status_url": GENERATION_WATCH_CONFIG["status_url"].format(project_id=project_id, project_url=project_url),
+            "http": build_http_session(web_session),
+            "on_finish": on_finish,
+            "started_at": now,
+            "interval": GENERATION_WATCH_CONFIG["min_interval"],
+            "next_check_at": now + self._next_interval(0, None),
+            "checks": 0,
+            "errors": 0,
+            "unknown": 0,
+            "seen_pending": False,
+            "polling": False
+        }
+        self._notify()
+        print(f"👀 Generation takibi başladı: {job_id} ({project_id})")
+    
+    def unwatch(self, job_id: str):
+        """Stop following a job's generation"""
+        self.watches.pop(job_id, None)
+    
+    def _notify(self):
+        if self._wakeup:
+            self._wakeup.set()
+    
+    @staticmethod
+    def _next_interval(age: float, interval: Optional[float]) -> float:
+        """Halve the distance to the expected render time, then back off"""
+        expected = GENERATION_WATCH_CONFIG["expected_render_seconds"]
+        if age < expected:
+            next_interval = (expected - age) / 2
+        else:
+            next_interval = (interval or GENERATION_WATCH_CONFIG["min_interval"]) * GENERATION_WATCH_CONFIG["backoff_factor"]
+        return min(max(next_interval, GENERATION_WATCH_CONFIG["min_interval"]), GENERATION_WATCH_CONFIG["max_interval"])
+    
+    async def _watch_loop(self):
+        while True:
+            now = time.time()
+            for watch in list(self.watches.values()):
+                if not watch["polling"] and watch["next_check_at"] <= now:
+                    watch["polling"] = True
+                    asyncio.create_task(self._check(watch))
+            
+            waiting = [watch["next_check_at"] for watch in self.watches.values() if not watch["polling"]]
+            timeout = max(min(waiting) - now, 0) if waiting else GENERATION_WATCH_CONFIG["max_interval"]
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+    
+    def _poll(self, watch: Dict[str, Any]) -> Dict[str, Any]:
+        response = watch["http"].get(watch["status_url"], timeout=GENERATION_WATCH_CONFIG["request_timeout"])
+        if "accounts.google.com" in response.url:
+            raise RuntimeError("Flow oturumu geçersiz")
+        response.raise_for_status()
+        return parse_generation_status(response.text, watch["project_id"])
+    
+    async def _check(self, watch: Dict[str, Any]):
+        job_id = watch["job_id"]
+        try:
+            async with self._poll_slots:
+                status = await asyncio.get_running_loop().run_in_executor(None, self._poll, watch)
+            watch["errors"] = 0
+            self.stats["polls"] += 1
+        except Exception as e:
+            watch["errors"] += 1
+            print(f"⚠️ Generation durumu okunamadı ({job_id}): {e}")
+            status = {"state": "pending", "video_urls": []}
+            if watch["errors"] >= GENERATION_WATCH_CONFIG["max_consecutive_errors"]:
+                # The status API is unreachable, that says nothing about the generation
+                status = {"state": "unknown", "video_urls": [], "error": str(e)}
+        
+        watch["checks"] += 1
+        if status["state"] == "unknown" and "error" not in status:
+            watch["unknown"] += 1
+            status = {"state": "pending", "video_urls": []}
+            if watch["unknown"] >= GENERATION_WATCH_CONFIG["max_unknown_checks"]:
+                status = {"state": "unknown", "video_urls": []}
+        elif status["state"] == "pending" and not watch["errors"]:
+            watch["seen_pending"] = True
+        
+        age = time.time() - watch["started_at"]
+        if status["state"] == "pending" and age >= GENERATION_WATCH_CONFIG["timeout_seconds"]:
+            # Only a generation Flow reported as running can time out
+            status = {"state": "timeout" if watch["seen_pending"] else "unknown", "video_urls": []}
+        
+        if status["state"] == "pending":
+            watch["interval"] = self._next_interval(age, watch["interval"])
+            watch["next_check_at"] = time.time() + watch["interval"]
+            watch["polling"] = False
+            self._notify()
+            return
+        
+        if self.watches.get(job_id) is not watch:
+            return
+        self.watches.pop(job_id, None)
+        watch["http"].close()
+        self.stats[{"completed": "completed", "timeout": "timed_out", "unknown": "unknown"}.get(status["state"], "failed")] += 1
+        print(f"🎬 Generation bitti: {job_id} - {status['state']} ({watch['checks']} kontrol)")
+        
+        result = {
+            "state": status["state"],
+            "video_urls": status["video_urls"],
+            "project_id": watch["project_id"],
+            "error": status.get("error"),
+            "duration": round(age, 1),
+            "checks": watch["checks"]
+        }
+        try:
+            await watch["on_finish"](job_id, result)
+        except Exception as e:
+            print(f"❌ Generation sonucu işlenemedi ({job_id}): {e}")
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get pending generations and watch statistics"""
+        now = time.time()
+        return {
+            "enabled": GENERATION_WATCH_CONFIG["enabled"],
+            "pending": len(self.watches),
+            "watches": [
+                {
+                    "job_id": watch["job_id"],
+                    "project_id": watch["project_id"],
+                    "age_seconds": round(now - watch["started_at"], 1),
+                    "checks": watch["checks"],
+                    "next_check_in": round(max(watch["next_check_at"] - now, 0), 1)
+                }
+                for watch in self.watches.values()
+            ],
+            **self.stats
+        }
+
+
+# Process-wide watcher for all pending generations
+generation_watcher = GenerationWatcher()
@@ -0,0 +1,87 @@
+"""
+Job Events for Ubuntu Chrome Automation
+Wakes up long-poll and server-sent-event clients when a job's state changes
+"""
+
+import asyncio
+import time
+from typing import Optional, Dict, Any, Set, Callable
+
+from config import JOB_PROGRESS_CONFIG
+
+# Job states after which nothing changes anymore
+TERMINAL_STATES = ("completed", "failed", "error")
+
+
+class JobEventHub:
+    """
+    Change notifications per job
+    
+    publish() may be called from executor threads (automation progress);
+    it hands the wake-up to the event loop. Waiters also re-read the job
+    every recheck_interval, so a state change made without a publish is
+    still delivered, only later.
+    """
+    
+    def __init__(self):
+        self.waiters: Dict[str, Set[asyncio.Future]] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def publish(self, job_id: str):
+        """Wake up everyone waiting for a job"""
+        if not self.loop or self.loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._wake(job_id)
+        else:
+            self.loop.call_soon_threadsafe(self._wake, job_id)
+    
+    def _wake(self, job_id: str):
+        for waiter in self.waiters.pop(job_id, set()):
+            if not waiter.done():
+                waiter.set_result(None)
+    
+    async def wait_for_change(self, job_id: str, snapshot: Callable[[], Optional[Dict[str, Any]]],
+                              last: Optional[Dict[str, Any]], timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait until a job's snapshot differs from last
+        
+        Args:
+            job_id: Job to wait for
+            snapshot: Returns the job's current public state, None if it is gone
+            last: State the client already has
+            timeout: Seconds to wait at most
+        
+        Returns:
+            The current state (unchanged on timeout)
+        """
+        self.loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout
+        while True:
+            current = snapshot()
+            if current != last or current is None or current["status"] in TERMINAL_STATES:
+                return current
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return current
+            
+            waiter = self.loop.create_future()
+            self.waiters.setdefault(job_id, set()).add(waiter)
+            try:
+                await asyncio.wait_for(waiter, min(remaining, JOB_PROGRESS_CONFIG["recheck_interval"]))
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                waiters = self.waiters.get(job_id)
+                if waiters:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self.waiters[job_id]
+
+
+# Process-wide hub, bound to the server's event loop on first wait
+job_events = JobEventHub()
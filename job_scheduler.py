@@ -0,0 +1,276 @@
+"""
+Job Scheduler for Ubuntu Chrome Automation
+Queues jobs and places them on pool accounts with a credit-aware best-fit policy
+"""
+
+import asyncio
+import threading
+import time
+from typing import Optional, Dict, Any, List, Set, Callable, Awaitable
+
+from session_manager import SessionManager
+from admission_control import admission_controller
+from concurrency_controller import AIMDConcurrencyController, concurrency_controller
+from config import FLOW_CONFIG, MODEL_CREDIT_COSTS, SCHEDULER_CONFIG
+
+
+class JobScheduler:
+    """Places queued jobs on accounts so that each login serves as many jobs as possible"""
+    
+    def __init__(self, session_manager: SessionManager = None,
+                 concurrency: AIMDConcurrencyController = None):
+        self.session_manager = session_manager or SessionManager()
+        self.concurrency = concurrency or concurrency_controller
+        self.pending: List[Dict[str, Any]] = []
+        self.running: Dict[str, Dict[str, Any]] = {}
+        self.accounts_used: Set[str] = set()
+        # Running jobs switch accounts from executor threads
+        self.accounts_lock = threading.Lock()
+        self.stats = {
+            "jobs_started": 0,
+            "account_switches": 0
+        }
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+    
+    @staticmethod
+    def get_credit_cost(model: str) -> int:
+        """Get expected credit cost of one generation with the given model"""
+        return MODEL_CREDIT_COSTS.get(model, FLOW_CONFIG["credits_per_project"])
+    
+    def start(self):
+        """Start dispatcher task on the running event loop"""
+        if self._dispatcher and not self._dispatcher.done():
+            return
+        
+        self._wakeup = asyncio.Event()
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+        print("✅ Job scheduler başlatıldı")
+    
+    async def stop(self):
+        """Stop dispatcher task, queued jobs stay in the queue"""
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+    
+    def submit(self, job_id: str, model: str, run: Callable[..., Awaitable[Any]],
+               account: str = None, credit_cost: int = None) -> int:
+        """
+        Queue a job
+        
+        Args:
+            job_id: Job identifier
+            model: Generation model, decides the expected credit cost
+            run: Coroutine function running the job, called with credit_cost and account
+            account: Account the job must run on (e.g. a download of its video)
+            credit_cost: Credit cost overriding the model's (0 for browser-only work)
+        
+        Returns:
+            Position of the job in the queue
+        """
+        self.pending.append({
+            "job_id": job_id,
+            "model": model,
+            "credit_cost": self.get_credit_cost(model) if credit_cost is None else credit_cost,
+            "enqueued_at": time.time(),
+            "pinned_account": account,
+            "account": None,
+            "run": run
+        })
+        self._notify()
+        return len(self.pending)
+    
+    def _notify(self):
+        if self._wakeup:
+            self._wakeup.set()
+    
+    def place_jobs(self, queued: List[Dict[str, Any]] = None) -> Dict[str, Optional[str]]:
+        """
+        Assign queued jobs to pool accounts with best-fit decreasing
+        
+        Jobs go to the active account while it has room, then to accounts
+        already opened in this round (tightest fit first). A new account is
+        only opened when no open one fits; the one whose free credits best
+        match the remaining demand is chosen, so leftover credits are used
+        and every switch covers as many jobs as possible.
+        
+        Returns:
+            Mapping of job_id to account email (None if no account fits)
+        """
+        queued = self.pending if queued is None else queued
+        capacity = self._free_capacity()
+        
+        active_email = self._active_email()
+        open_accounts = {active_email} if active_email in capacity else set()
+        remaining_demand = sum(entry["credit_cost"] for entry in queued)
+        placement: Dict[str, Optional[str]] = {}
+        
+        for entry in sorted(queued, key=lambda x: (-x["credit_cost"], x["enqueued_at"])):
+            cost = entry["credit_cost"]
+            if entry.get("pinned_account") in capacity:
+                chosen = entry["pinned_account"]
+                open_accounts.add(chosen)
+                capacity[chosen] -= cost
+                remaining_demand -= cost
+                placement[entry["job_id"]] = chosen
+                continue
+            fitting_open = [email for email in open_accounts if capacity[email] >= cost]
+            
+            if active_email in fitting_open:
+                chosen = active_email
+            elif fitting_open:
+                chosen = min(fitting_open, key=lambda email: capacity[email])
+            else:
+                candidates = [email for email, free in capacity.items() if free >= cost]
+                if not candidates:
+                    placement[entry["job_id"]] = None
+                    remaining_demand -= cost
+                    continue
+                covering = [email for email in candidates if capacity[email] >= remaining_demand]
+                if covering:
+                    chosen = min(covering, key=lambda email: capacity[email])
+                else:
+                    chosen = max(candidates, key=lambda email: capacity[email])
+                open_accounts.add(chosen)
+            
+            capacity[chosen] -= cost
+            remaining_demand -= cost
+            placement[entry["job_id"]] = chosen
+        
+        return placement
+    
+    def _free_capacity(self) -> Dict[str, int]:
+        """Free credits per account, minus credits committed to running jobs"""
+        threshold = self.session_manager.credit_threshold
+        capacity = {
+            account["email"]: account.get("credits", 0) - threshold
+            for account in self.session_manager.load_account_pool()
+        }
+        for entry in self.running.values():
+            if entry["account"] in capacity:
+                capacity[entry["account"]] -= entry["credit_cost"]
+        return capacity
+    
+    def _active_email(self) -> Optional[str]:
+        session = self.session_manager.get_current_session()
+        return session.get("email") if session else None
+    
+    async def _dispatch_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=SCHEDULER_CONFIG["dispatch_interval"])
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            
+            try:
+                while self.pending and len(self.running) < self.concurrency.limit:
+                    # Jobs wait in the queue until the host has room for their browser
+                    ticket = admission_controller.admit_dispatch()
+                    if ticket is None:
+                        break
+                    entry = self._next_job()
+                    if not entry:
+                        admission_controller.release_ticket(ticket)
+                        break
+                    entry["admission_ticket"] = ticket
+                    self.stats["jobs_started"] += 1
+                    asyncio.create_task(self._run_job(entry))
+            except Exception as e:
+                print(f"⚠️ Job dispatch hatası: {e}")
+    
+    def _next_job(self) -> Optional[Dict[str, Any]]:
+        """
+        Move the next job to running on the account it runs on
+        
+        Every job runs on its own account's session and Chrome profile,
+        and an account runs one job at a time, so parallel jobs use
+        different accounts. A job takes its placed account when that one is
+        free, otherwise the free account whose credits fit it most tightly.
+        Jobs no account has credits for run on the active account, as before.
+        """
+        if not self.pending:
+            return None
+        
+        placement = self.place_jobs()
+        active_email = self._active_email()
+        with self.accounts_lock:
+            return self._take_free_account(placement, active_email)
+    
+    def _take_free_account(self, placement: Dict[str, Optional[str]],
+                           active_email: Optional[str]) -> Optional[Dict[str, Any]]:
+        capacity = self._free_capacity()
+        busy = {entry["account"] for entry in self.running.values()}
+        
+        for entry in self.pending:
+            pinned = entry.get("pinned_account")
+            if pinned:
+                candidates = [pinned]
+            else:
+                placed = placement.get(entry["job_id"])
+                fitting = sorted(
+                    (email for email, free in capacity.items() if free >= entry["credit_cost"] and email != placed),
+                    key=lambda email: capacity[email]
+                )
+                candidates = [placed] + fitting if placed else [active_email]
+            
+            free = [email for email in candidates if email not in busy]
+            if not free:
+                continue
+            
+            account = free[0]
+            entry["account"] = account
+            # Running from here on, a switching job sees this account as taken
+            self.pending.remove(entry)
+            self.running[entry["job_id"]] = entry
+            if account and account not in self.accounts_used:
+                # First job on an account means one more login/profile in use
+                self.accounts_used.add(account)
+                self.stats["account_switches"] += 1
+            return entry
+        return None
+    
+    def claim_account(self, job_id: str, email: str) -> bool:
+        """
+        Move a running job to another account when it switches mid-run
+        
+        Returns:
+            False if another running job holds the account
+        """
+        with self.accounts_lock:
+            if any(entry["account"] == email for other_id, entry in self.running.items() if other_id != job_id):
+                return False
+            if job_id in self.running:
+                self.running[job_id]["account"] = email
+            return True
+    
+    async def _run_job(self, entry: Dict[str, Any]):
+        try:
+            await entry["run"](credit_cost=entry["credit_cost"], account=entry["account"])
+        except Exception as e:
+            print(f"❌ Job {entry['job_id']} çalıştırma hatası: {e}")
+        finally:
+            admission_controller.release_ticket(entry.get("admission_ticket"))
+            self.running.pop(entry["job_id"], None)
+            self._notify()
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get queue, placement and switch statistics"""
+        placement = self.place_jobs()
+        jobs_started = self.stats["jobs_started"]
+        
+        return {
+            "active_account": self._active_email(),
+            "queued": len(self.pending),
+            "running": len(self.running),
+            "max_concurrency": self.concurrency.limit,
+            "placement": placement,
+            "jobs_started": jobs_started,
+            "account_switches": self.stats["account_switches"],
+            "switches_per_100_jobs": round(self.stats["account_switches"] * 100 / jobs_started, 2) if jobs_started else 0,
+            "admission": admission_controller.get_status()
+        }
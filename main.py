@@ -5,21 +5,44 @@ Combines API server functionality with Chrome automation
 """
 
 import argparse
+import getpass
+import json
 import sys
 import asyncio
 import time
 from datetime import datetime, timedelta
+from functools import partial
 import uuid
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 import uvicorn
 
 from chrome_automation import ChromeAutomation
 from session_manager import SessionManager
+from standby_manager import StandbyLoginManager
+from job_scheduler import JobScheduler
+from concurrency_controller import concurrency_controller
+from system_metrics import system_sampler
+from metrics import registry, STEP_DURATION, QUEUE_DEPTH, LIVE_BROWSERS, CONCURRENCY_LIMIT
+from browser_supervisor import browser_supervisor
+from display_pool import display_pool
+from static_cache import static_cache
+from browser_pool import BrowserPool
+from generation_watcher import generation_watcher
+from video_downloader import video_downloader, format_file_size, safe_filename
+from media_server import media_index, media_response, media_type_for
+from media_store import media_store
+from prompt_cache import prompt_cache, prompt_cache_key
+from job_events import job_events, TERMINAL_STATES
+from totp import generate_totp
+from config import SUPERVISOR_CONFIG, CHROME_CONFIG, RESOURCE_PROFILES, GENERATION_WATCH_CONFIG, DOWNLOADED_VIDEOS_DIR
+from config import MEDIA_OUTPUT_DIR, JOB_PROGRESS_CONFIG
+from config import STANDBY_CONFIG
 
 # FastAPI app
 app = FastAPI(
@@ -46,6 +69,21 @@ app.add_middleware(
 jobs = {}
 active_sessions = {}
 
+# Prompt key -> job running it, identical requests wait for that run instead of starting their own
+inflight_prompts: Dict[str, str] = {}
+
+# Sıradaki hesabı kredi bitmeden önce standby browser'da hazırlar
+standby_manager = StandbyLoginManager()
+
+# Login olmuş browser'ları job'lar arasında tekrar kullanır
+browser_pool = BrowserPool()
+LIVE_BROWSERS.set_function(lambda: len(browser_supervisor.browsers))
+
+# Job'ları kredi durumuna göre hesaplara yerleştirir
+job_scheduler = JobScheduler()
+QUEUE_DEPTH.set_function(lambda: len(job_scheduler.pending))
+CONCURRENCY_LIMIT.set_function(lambda: concurrency_controller.limit)
+
 # Pydantic models - BalderAI Production uyumlu
 class GoogleFlowRequest(BaseModel):
     jobId: str
@@ -55,6 +93,9 @@ class GoogleFlowRequest(BaseModel):
     userId: Optional[str] = None
     action: str = "create_project"
     timeout: int = 300
+    resourceProfile: Optional[str] = None  # lean, balanced or full (defaults per step)
+    useCache: bool = False  # Opt in to reuse this user's identical earlier result
+    coalesce: bool = True  # Join this user's identical request that is still running
     callbackUrl: Optional[str] = "https://balder-ai.vercel.app/api/jobs/callback"
 
 class JobResponse(BaseModel):
@@ -72,7 +113,10 @@ class JobStatus(BaseModel):
     job_id: str
     status: str
     project_url: Optional[str] = None
+    project_id: Optional[str] = None
     video_url: Optional[str] = None
+    progress: int = 0
+    current_step: Optional[str] = None
     created_at: str
     completed_at: Optional[str] = None
 
@@ -100,6 +144,7 @@ class HealthStatus(BaseModel):
     status: str
     timestamp: str
     version: str = "1.0.0"
+    resources: Optional[Dict[str, Any]] = None
 
 class RestartResponse(BaseModel):
     success: bool
@@ -107,30 +152,61 @@ class RestartResponse(BaseModel):
     data: Dict[str, Any]
 
 # Background task for automation
-async def run_automation(job_id: str, prompt: str, user_id: str, callback_url: str = None):
+async def run_automation(job_id: str, prompt: str, user_id: str, callback_url: str = None, credit_cost: int = None,
+                         resource_profile: str = None, account: str = None):
     """Background'da automation çalıştır"""
     try:
         job = jobs[job_id]
         job["status"] = "processing"
+        job["account"] = account
         job["currentStep"] = "Automation başlatılıyor"
         job["progress"] = 0
         
-        # Chrome automation başlat
-        automation = ChromeAutomation()
+        # Chrome automation başlat (scheduler'ın yerleştirdiği hesapla)
+        automation = ChromeAutomation(standby_manager=standby_manager, browser_pool=browser_pool, account=account)
+        # A low-credit switch moves the job to an account no other job runs on
+        automation.session_manager.claim_account = partial(job_scheduler.claim_account, job_id)
         
         # Progress callback'leri için wrapper
         def progress_callback(step: str, progress: int):
             job["currentStep"] = step
             job["progress"] = progress
             print(f"Job {job_id}: {step} - Progress: {progress}%")
+            job_events.publish(job_id)
         
-        # Automation'ı çalıştır
-        success = automation.start_test(
+        # Automation'ı çalıştır (event loop'u bloklamadan)
+        loop = asyncio.get_running_loop()
+        success = await loop.run_in_executor(None, partial(
+            automation.start_test,
             user_id=user_id or "api_user",
-            prompt=prompt
-        )
+            prompt=prompt,
+            credit_cost=credit_cost,
+            resource_profile=resource_profile,
+            progress_callback=progress_callback
+        ))
         
-        if success:
+        # Step timings decide whether more browsers may run in parallel
+        concurrency_controller.record(success, automation.step_timings)
+        job["account"] = automation.session_manager.account or account
+        
+        # Real project reported by Flow
+        if automation.project_url:
+            job["project_id"] = automation.project_id
+            job["project_url"] = automation.project_url
+        
+        if success and automation.project_id and GENERATION_WATCH_CONFIG["enabled"]:
+            # Browser is released now, the watcher finishes the job when the video is rendered
+            job["status"] = "generating"
+            job["currentStep"] = "Video oluşturuluyor"
+            web_session = await loop.run_in_executor(None, automation.export_web_session)
+            generation_watcher.watch(
+                job_id,
+                automation.project_id,
+                automation.project_url,
+                web_session,
+                partial(finish_generation, callback_url=callback_url, web_session=web_session)
+            )
+        elif success:
             job["status"] = "completed"
             job["progress"] = 100
             job["currentStep"] = "Video başarıyla oluşturuldu"
@@ -150,6 +226,8 @@ async def run_automation(job_id: str, prompt: str, user_id: str, callback_url: s
         job["status"] = "error"
         job["currentStep"] = f"Hata: {str(e)}"
         print(f"Job {job_id} hatası: {e}")
+        if 'automation' in locals():
+            concurrency_controller.record(False, automation.step_timings)
         
         # Error callback gönder
         if callback_url:
@@ -157,8 +235,159 @@ async def run_automation(job_id: str, prompt: str, user_id: str, callback_url: s
     finally:
         if 'automation' in locals():
             automation.close_browser()
+        if jobs.get(job_id, {}).get("status") != "generating":
+            await settle_followers(job_id)
+        job_events.publish(job_id)
 
-async def send_production_callback(job_id: str, status: str, callback_url: str, error: str = None, result_url: str = None):
+def share_result(job: Dict[str, Any], source: Dict[str, Any]):
+    """Bitmiş bir job'ın (veya önbelleğin) projesini ve videosunu başka job'a aktar"""
+    job["project_id"] = source.get("project_id")
+    job["project_url"] = source.get("project_url")
+    job["video_url"] = source.get("video_url")
+    job["file_size"] = source.get("file_size")
+    
+    # The job gets its own name for the stored video, so cleaning up the source job keeps it
+    if source.get("video_file"):
+        extension = Path(source["video_file"]).suffix
+        linked = media_store.link(source["video_file"], f"{safe_filename(job['id'])}{extension}", job["id"])
+        if linked:
+            job["video_file"] = linked["filename"]
+            job["video_sha256"] = linked["sha256"]
+            job["video_url"] = video_downloader.public_url(linked["filename"])
+
+async def settle_followers(job_id: str):
+    """Aynı prompt için bekleyen job'ları biten job'ın sonucuyla bitir"""
+    job = jobs.get(job_id)
+    if not job:
+        return
+    if job.get("prompt_key") and inflight_prompts.get(job["prompt_key"]) == job_id:
+        del inflight_prompts[job["prompt_key"]]
+    
+    for follower_id in job.pop("followers", []):
+        follower = jobs.get(follower_id)
+        if not follower:
+            continue
+        follower["completed_at"] = datetime.now().isoformat()
+        if job["status"] == "completed":
+            share_result(follower, job)
+            follower["status"] = "completed"
+            follower["progress"] = 100
+            follower["currentStep"] = "Video başarıyla oluşturuldu"
+            await send_production_callback(
+                follower_id, "completed", follower["callback_url"],
+                result_url=follower.get("video_url"), file_size=follower.get("file_size")
+            )
+        else:
+            follower["status"] = job["status"]
+            follower["currentStep"] = job.get("currentStep")
+            await send_production_callback(
+                follower_id, job["status"], follower["callback_url"], error=job.get("currentStep")
+            )
+        job_events.publish(follower_id)
+
+def download_with_browser(job_id: str, video_url: str, account: str = None) -> Optional[Dict[str, Any]]:
+    """Videoyu job'ın hesabına ait browser ile indir"""
+    automation = ChromeAutomation(standby_manager=standby_manager, browser_pool=browser_pool)
+    try:
+        if account:
+            profile = automation.session_manager.get_profile_name(account)
+        else:
+            profile = automation.session_manager.get_session_profile()
+        if not automation.launch_browser(profile):
+            return None
+        return automation.download_video_in_browser(video_url, job_id)
+    finally:
+        automation.close_browser()
+
+async def schedule_browser_download(job_id: str, video_url: str, account: str = None) -> Optional[Dict[str, Any]]:
+    """Browser ile indirmeyi scheduler kuyruğundan çalıştır (admission ve eşzamanlılık limitleri geçerli)"""
+    loop = asyncio.get_running_loop()
+    result = loop.create_future()
+    
+    async def run(credit_cost: int = None, account: str = None):
+        try:
+            result.set_result(await loop.run_in_executor(None, download_with_browser, job_id, video_url, account))
+        except Exception as e:
+            print(f"❌ Browser indirme hatası ({job_id}): {e}")
+            result.set_result(None)
+    
+    # No credits are spent, but the job's account (and its profile) is needed
+    job_scheduler.submit(f"{job_id}:download", None, run, account=account, credit_cost=0)
+    return await result
+
+async def finish_generation(job_id: str, result: Dict[str, Any], callback_url: str = None,
+                            web_session: Dict[str, Any] = None):
+    """Generation watcher sonucu ile job'ı bitir, videoyu media/downloaded_videos'a indir"""
+    job = jobs.get(job_id)
+    if not job:
+        return
+    
+    if result["state"] == "completed":
+        job["video_url"] = result["video_urls"][0]
+        job["video_urls"] = result["video_urls"]
+        job["currentStep"] = "Video indiriliyor"
+        job["progress"] = 95
+        job_events.publish(job_id)
+        
+        # Serve our own copy, Flow's video links are signed and expire
+        result_url, file_size = job["video_url"], None
+        loop = asyncio.get_running_loop()
+        try:
+            download = await loop.run_in_executor(
+                None, video_downloader.download, job["video_url"], job_id, web_session
+            )
+        except Exception as e:
+            print(f"⚠️ HTTP indirme başarısız ({job_id}), browser ile deneniyor: {e}")
+            download = await schedule_browser_download(job_id, job["video_url"], job.get("account"))
+        
+        if download:
+            # Keep the video once under its hash, the filename stays its public name
+            download = await loop.run_in_executor(
+                None, media_store.put, download["path"], download["filename"], job_id,
+                download["sha256"], download.get("content_type")
+            )
+            await loop.run_in_executor(None, media_store.enforce_retention)
+            job["video_file"] = download["filename"]
+            job["video_sha256"] = download["sha256"]
+            job["file_size"] = download["size"]
+            result_url, file_size = video_downloader.public_url(download["filename"]), download["size"]
+            job["video_url"] = result_url
+            prompt_cache.store(job)
+        else:
+            print(f"⚠️ Video indirilemedi ({job_id}), Flow linki gönderiliyor")
+        
+        job["status"] = "completed"
+        job["progress"] = 100
+        job["currentStep"] = "Video başarıyla oluşturuldu"
+        job["completed_at"] = datetime.now().isoformat()
+        
+        if callback_url:
+            await send_production_callback(job_id, "completed", callback_url, result_url=result_url, file_size=file_size)
+    elif result["state"] == "unknown":
+        # The status API did not tell, finish like before the watcher with the project link
+        print(f"⚠️ Generation durumu bilinmiyor ({job_id}), proje linki gönderiliyor")
+        job["status"] = "completed"
+        job["progress"] = 100
+        job["currentStep"] = "Proje oluşturuldu, video durumu bilinmiyor"
+        job["completed_at"] = datetime.now().isoformat()
+        
+        if callback_url:
+            await send_production_callback(job_id, "completed", callback_url, result_url=job.get("project_url"))
+    else:
+        job["status"] = "failed"
+        job["currentStep"] = f"Video oluşturma başarısız ({result['state']})"
+        
+        if callback_url:
+            await send_production_callback(
+                job_id, "failed", callback_url,
+                error=result.get("error") or f"Video generation {result['state']}"
+            )
+    
+    await settle_followers(job_id)
+    job_events.publish(job_id)
+
+async def send_production_callback(job_id: str, status: str, callback_url: str, error: str = None, result_url: str = None,
+                                   file_size: int = None):
     """Production BalderAI callback sistemi - BalderAI Production güncellemeleri"""
     try:
         import requests
@@ -184,7 +413,8 @@ async def send_production_callback(job_id: str, status: str, callback_url: str,
         
         if result_url:
             payload["resultUrl"] = result_url
-            payload["fileSize"] = "5.2MB"  # Default file size
+        if file_size is not None:
+            payload["fileSize"] = format_file_size(file_size)
         
         headers = {
             "Content-Type": "application/json",
@@ -195,7 +425,8 @@ async def send_production_callback(job_id: str, status: str, callback_url: str,
         print(f"📤 Sending callback to {callback_url}")
         print(f"📦 Payload: {payload}")
         
-        response = requests.post(callback_url, json=payload, headers=headers, timeout=10)
+        with STEP_DURATION.time(step="callback_delivery"):
+            response = requests.post(callback_url, json=payload, headers=headers, timeout=10)
         
         if response.status_code == 200:
             print(f"✅ Callback sent successfully to {callback_url}")
@@ -205,6 +436,34 @@ async def send_production_callback(job_id: str, status: str, callback_url: str,
     except Exception as e:
         print(f"❌ Callback error: {e}")
 
+@app.on_event("startup")
+async def start_background_services():
+    """Background servisleri başlat"""
+    system_sampler.start()
+    if SUPERVISOR_CONFIG["reap_orphans_on_startup"]:
+        browser_supervisor.reap_orphans()
+    if not CHROME_CONFIG["headless"]:
+        display_pool.start()
+        browser_supervisor.check_callbacks.append(display_pool.maintain)
+    browser_supervisor.start()
+    job_scheduler.start()
+    if GENERATION_WATCH_CONFIG["enabled"]:
+        generation_watcher.start()
+    if STANDBY_CONFIG["enabled"]:
+        standby_manager.start()
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    """Background servisleri durdur"""
+    await job_scheduler.stop()
+    await generation_watcher.stop()
+    standby_manager.stop()
+    browser_pool.close_all()
+    browser_supervisor.stop()
+    display_pool.stop()
+    static_cache.flush()
+    system_sampler.stop()
+
 # API Endpoints
 @app.get("/")
 async def root():
@@ -215,17 +474,23 @@ async def root():
         "status": "running"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics endpoint"""
+    return PlainTextResponse(registry.render(), media_type=registry.content_type)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint - Android Agent Ubuntu Migration Guide uyumlu"""
     return HealthStatus(
         status="healthy",
         timestamp=datetime.now().isoformat(),
-        version="1.0.0"
+        version="1.0.0",
+        resources=system_sampler.get_summary()
     )
 
 @app.post("/api/v1/automation/google-flow")
-async def google_flow_automation_endpoint(request: GoogleFlowRequest, background_tasks: BackgroundTasks):
+async def google_flow_automation_endpoint(request: GoogleFlowRequest):
     """Google Flow automation endpoint - BalderAI Production uyumlu"""
     try:
         # Validate action
@@ -235,46 +500,97 @@ async def google_flow_automation_endpoint(request: GoogleFlowRequest, background
                 status_code=400, 
                 detail=f"Invalid action. Must be one of: {', '.join(valid_actions)}"
             )
+        
+        if request.resourceProfile and request.resourceProfile not in RESOURCE_PROFILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid resourceProfile. Must be one of: {', '.join(RESOURCE_PROFILES)}"
+            )
 
         # Job oluştur - BalderAI Production uyumlu
         job_id = request.jobId
-        project_id = f"project_{int(time.time())}"
-        project_url = f"https://labs.google/fx/tools/flow/project/{project_id}"
         
+        # Retried submissions get the existing job instead of a second automation
+        if job_id in jobs:
+            job = jobs[job_id]
+            print(f"🔁 Job {job_id} zaten var ({job['status']}), tekrar başlatılmadı")
+            return {
+                "success": True,
+                "jobId": job_id,
+                "message": "Job already received",
+                "internalJobId": job_id,
+                "status": job["status"],
+                "progress": job.get("progress", 0),
+                "currentStep": job.get("currentStep"),
+                "resultUrl": job.get("video_url"),
+                "duplicate": True
+            }
+        
+        # Production callback URL'ini kontrol et
+        callback_url = request.callbackUrl
+        if not callback_url or callback_url == "None":
+            callback_url = "https://balder-ai.vercel.app/api/jobs/callback"
+        
+        cached = prompt_cache.lookup(request.prompt, request.model, request.action, request.userId) if request.useCache else None
+        if cached:
+            return complete_from_cache(request, cached, callback_url)
+        
+        prompt_key = prompt_cache_key(request.prompt, request.model, request.action, request.userId)
         jobs[job_id] = {
             "id": job_id,
             "prompt": request.prompt,
             "model": request.model,
             "user_id": request.userId,
-            "project_id": project_id,
-            "project_url": project_url,
+            "project_id": None,  # Filled with Flow's real project once it is created
+            "project_url": None,
             "status": "pending",
             "created_at": datetime.now().isoformat(),
-            "callback_url": request.callbackUrl,
+            "callback_url": callback_url,
             "action": request.action,
-            "timeout": request.timeout
+            "timeout": request.timeout,
+            "resource_profile": request.resourceProfile
         }
         
-        # Production callback URL'ini kontrol et
-        callback_url = request.callbackUrl
-        if not callback_url or callback_url == "None":
-            callback_url = "https://balder-ai.vercel.app/api/jobs/callback"
+        # An identical prompt is already running, wait for its result
+        leader_id = inflight_prompts.get(prompt_key) if request.coalesce else None
+        if leader_id in jobs and jobs[leader_id]["status"] not in TERMINAL_STATES:
+            jobs[job_id]["coalesced_with"] = leader_id
+            jobs[job_id]["currentStep"] = f"Aynı prompt ile çalışan job bekleniyor ({leader_id})"
+            jobs[leader_id].setdefault("followers", []).append(job_id)
+            print(f"🔗 Job {job_id}, aynı prompt ile çalışan {leader_id} job'ına bağlandı")
+            return {
+                "success": True,
+                "jobId": job_id,
+                "message": "Job joined an identical request in progress",
+                "estimatedTime": "3-5 minutes",
+                "internalJobId": job_id,
+                "status": "pending",
+                "coalescedWith": leader_id
+            }
+        if request.coalesce:
+            jobs[job_id]["prompt_key"] = prompt_key
+            inflight_prompts[prompt_key] = job_id
         
         print(f"🚀 Google Flow automation started for job {job_id}")
         print(f"📝 Prompt: {request.prompt}")
         print(f"👤 User ID: {request.userId}")
         print(f"🎯 Action: {request.action}")
-        print(f"🔗 Project URL: {project_url}")
         print(f"📞 Callback URL: {callback_url}")
         
-        # Background task olarak automation'ı başlat
-        background_tasks.add_task(
-            run_automation, 
-            job_id, 
-            request.prompt, 
-            request.userId or "default_user",
-            callback_url
+        # Job'ı kuyruğa ekle, scheduler uygun hesaba yerleştirip çalıştırır
+        queue_position = job_scheduler.submit(
+            job_id,
+            request.model,
+            partial(
+                run_automation,
+                job_id,
+                request.prompt,
+                request.userId or "default_user",
+                callback_url,
+                resource_profile=request.resourceProfile
+            )
         )
+        jobs[job_id]["queue_position"] = queue_position
         
         # Return integration guide format
         return {
@@ -292,21 +608,108 @@ async def google_flow_automation_endpoint(request: GoogleFlowRequest, background
         print(f"Failed to create Google Flow job: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def complete_from_cache(request: GoogleFlowRequest, cached: Dict[str, Any], callback_url: str) -> Dict[str, Any]:
+    """Aynı kullanıcının aynı prompt + model + action isteği için önceki sonuçla job'ı hemen tamamla"""
+    job_id = request.jobId
+    now = datetime.now().isoformat()
+    job = {
+        "id": job_id,
+        "prompt": request.prompt,
+        "model": request.model,
+        "user_id": request.userId,
+        "status": "completed",
+        "progress": 100,
+        "currentStep": "Video önbellekten tamamlandı",
+        "created_at": now,
+        "completed_at": now,
+        "callback_url": callback_url,
+        "action": request.action,
+        "cached_from": cached["source_job_id"]
+    }
+    share_result(job, cached)
+    jobs[job_id] = job
+    
+    print(f"♻️ Job {job_id} önbellekten tamamlandı (kaynak: {cached['source_job_id']})")
+    if callback_url:
+        asyncio.create_task(send_production_callback(
+            job_id, "completed", callback_url, result_url=job["video_url"], file_size=job["file_size"]
+        ))
+    
+    return {
+        "success": True,
+        "jobId": job_id,
+        "message": "Job completed from an identical earlier request",
+        "estimatedTime": "0 minutes",
+        "internalJobId": job_id,
+        "status": "completed",
+        "cached": True
+    }
+
+def job_snapshot(job_id: str) -> Optional[Dict[str, Any]]:
+    """Job'ın istemciye gösterilen durumu, job yoksa None"""
+    job = jobs.get(job_id)
+    if not job:
+        return None
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "project_url": job.get("project_url"),
+        "project_id": job.get("project_id"),
+        "video_url": job.get("video_url"),
+        "progress": job.get("progress", 0),
+        "current_step": job.get("currentStep"),
+        "created_at": job["created_at"],
+        "completed_at": job.get("completed_at")
+    }
+
 @app.get("/api/v1/jobs/{job_id}", response_model=JobStatus)
-async def get_job_status(job_id: str):
-    """Get job status - BalderAI Production uyumlu"""
+async def get_job_status(job_id: str, wait: float = 0):
+    """Get job status - BalderAI Production uyumlu
+    
+    With ?wait=N the request is held until the job changes (or finishes),
+    at most N seconds, instead of the client polling in a loop.
+    """
+    snapshot = job_snapshot(job_id)
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Job bulunamadı")
+    
+    if wait > 0:
+        timeout = min(wait, JOB_PROGRESS_CONFIG["max_wait_seconds"])
+        snapshot = await job_events.wait_for_change(job_id, partial(job_snapshot, job_id), snapshot, timeout)
+        if not snapshot:
+            raise HTTPException(status_code=404, detail="Job bulunamadı")
+    
+    return JobStatus(**snapshot)
+
+@app.get("/api/v1/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """Job durumunu server-sent events ile yayınla, job bitince akış kapanır"""
     if job_id not in jobs:
         raise HTTPException(status_code=404, detail="Job bulunamadı")
     
-    job = jobs[job_id]
+    async def events():
+        last = None
+        while not await request.is_disconnected():
+            snapshot = await job_events.wait_for_change(
+                job_id, partial(job_snapshot, job_id), last, JOB_PROGRESS_CONFIG["keepalive_seconds"]
+            )
+            if snapshot is None:
+                yield "event: gone\ndata: {}\n\n"
+                return
+            if snapshot == last:
+                # Keeps proxies (ngrok) from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+            last = snapshot
+            yield f"event: progress\ndata: {json.dumps(snapshot)}\n\n"
+            if snapshot["status"] in TERMINAL_STATES:
+                yield f"event: done\ndata: {json.dumps(snapshot)}\n\n"
+                return
     
-    return JobStatus(
-        job_id=job_id,
-        status=job["status"],
-        project_url=job.get("project_url"),
-        video_url=job.get("video_url"),
-        created_at=job["created_at"],
-        completed_at=job.get("completed_at")
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 @app.get("/api/v1/automation/google-flow/status")
@@ -322,6 +725,7 @@ async def get_google_flow_status():
                     "current_job": latest_job["id"],
                     "status": latest_job["status"],
                     "project_url": latest_job.get("project_url"),
+                    "project_id": latest_job.get("project_id"),
                     "created_at": latest_job["created_at"]
                 },
                 "timestamp": datetime.now().isoformat()
@@ -354,6 +758,109 @@ async def get_session_status():
         print(f"Failed to get session status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/v1/scheduler/status")
+async def get_scheduler_status():
+    """Get job queue, account placement and account switch statistics"""
+    try:
+        return {
+            "status": "success",
+            "data": job_scheduler.get_status(),
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        print(f"Failed to get scheduler status: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/scheduler/concurrency")
+async def get_concurrency_status():
+    """Get adaptive concurrency limit and its adjustment history"""
+    try:
+        return {
+            "status": "success",
+            "data": concurrency_controller.get_status(),
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        print(f"Failed to get concurrency status: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/generations")
+async def get_generation_status():
+    """Get pending generations followed by the watcher"""
+    try:
+        return {
+            "status": "success",
+            "data": generation_watcher.get_status(),
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        print(f"Failed to get generation status: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/media/store")
+async def get_media_store_status():
+    """Get content-addressed media store statistics"""
+    try:
+        return {
+            "status": "success",
+            "data": media_store.get_status(),
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        print(f"Failed to get media store status: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/cache/prompts")
+async def get_prompt_cache_status():
+    """Get prompt result cache statistics"""
+    try:
+        return {
+            "status": "success",
+            "data": prompt_cache.get_status(),
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        print(f"Failed to get prompt cache status: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/browsers")
+async def get_browser_status():
+    """Get supervised browser processes and pool state"""
+    try:
+        return {
+            "status": "success",
+            "data": {
+                **browser_supervisor.get_status(),
+                "pool": browser_pool.get_status(),
+                "displays": display_pool.get_status(),
+                "static_cache": static_cache.get_status()
+            },
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        print(f"Failed to get browser status: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/accounts/standby")
+async def get_standby_status():
+    """Get credit burn forecast and standby account status"""
+    try:
+        return {
+            "status": "success",
+            "data": standby_manager.get_status(),
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        print(f"Failed to get standby status: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/restart", response_model=RestartResponse)
 async def restart_service():
     """Servisi yeniden başlat"""
@@ -437,12 +944,18 @@ async def cleanup_old_projects(request: CleanupRequest):
         old_jobs = [job_id for job_id, job in jobs.items() 
                    if datetime.fromisoformat(job["created_at"]) < cutoff_time]
         
+        freed = 0
         for job_id in old_jobs:
             del jobs[job_id]
+            freed += media_store.release_job(job_id)
+        
+        # Files of jobs no longer in memory (e.g. before a restart) age out here
+        retention = media_store.enforce_retention(max_age_days=request.days_threshold)
+        freed += retention["freed_bytes"]
         
         return CleanupResponse(
             status="success",
-            message=f"Cleaned up {len(old_jobs)} old projects",
+            message=f"Cleaned up {len(old_jobs)} old projects, {format_file_size(freed)} media freed",
             days_threshold=request.days_threshold,
             timestamp=datetime.now().isoformat()
         )
@@ -472,42 +985,22 @@ async def test_callback():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/v1/media/downloaded_videos/{filename}")
-async def serve_output_file(filename: str):
+@app.api_route("/api/v1/media/downloaded_videos/{filename}", methods=["GET", "HEAD"])
+async def serve_output_file(filename: str, request: Request):
     """Serve output files (videos, images) to website via ngrok - BalderAI Production uyumlu"""
     try:
-        import os
-        file_path = os.path.join("media", "downloaded_videos", filename)
-        
-        # Check if file exists
-        if not os.path.exists(file_path):
+        # Files stored before the media store are still served from the directory
+        file_path = media_store.resolve(filename) or DOWNLOADED_VIDEOS_DIR / filename
+        entry = media_index.get(file_path)
+        if not entry:
             raise HTTPException(status_code=404, detail=f"File not found: {filename}")
         
-        # Get file info
-        file_size = os.path.getsize(file_path)
-        
-        # Determine media type based on extension
-        file_ext = filename.lower().split('.')[-1]
-        media_type_map = {
-            'mp4': 'video/mp4',
-            'avi': 'video/x-msvideo',
-            'mov': 'video/quicktime',
-            'mkv': 'video/x-matroska',
-            'jpg': 'image/jpeg',
-            'jpeg': 'image/jpeg',
-            'png': 'image/png',
-            'gif': 'image/gif'
-        }
-        
-        media_type = media_type_map.get(file_ext, 'application/octet-stream')
-        
-        print(f"Serving file: {filename} ({file_size} bytes, {media_type})")
-        
-        from fastapi.responses import FileResponse
-        return FileResponse(
-            path=file_path,
-            media_type=media_type,
-            filename=filename
+        return media_response(
+            request,
+            file_path,
+            entry,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+            media_type=media_type_for(filename)
         )
         
     except HTTPException:
@@ -516,23 +1009,22 @@ async def serve_output_file(filename: str):
         print(f"Failed to serve file {filename}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/v1/download/{filename}")
-async def download_file(filename: str):
+@app.api_route("/api/v1/download/{filename}", methods=["GET", "HEAD"])
+async def download_file(filename: str, request: Request):
     """Download endpoint for processed files - BalderAI Production uyumlu"""
     try:
-        import os
-        file_path = os.path.join("media", "output", filename)
-        
-        # Check if file exists
-        if not os.path.exists(file_path):
+        file_path = media_store.resolve(filename) or MEDIA_OUTPUT_DIR / filename
+        entry = media_index.get(file_path)
+        if not entry:
             raise HTTPException(status_code=404, detail=f"File not found: {filename}")
         
         # Force download by setting appropriate headers
-        from fastapi.responses import FileResponse
-        return FileResponse(
-            path=file_path,
-            filename=filename,
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        return media_response(
+            request,
+            file_path,
+            entry,
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+            media_type=media_type_for(filename)
         )
         
     except HTTPException:
@@ -554,6 +1046,7 @@ def main():
   python main.py --test-session     # Session manager'ı test et
   python main.py --clear-session    # Session'ı temizle
   python main.py --session-info     # Session bilgilerini göster
+  python main.py --set-totp EMAIL   # Hesabın 2FA (TOTP) secret'ını kaydet
         """
     )
     
@@ -589,6 +1082,12 @@ def main():
         help="Mevcut session bilgilerini göster"
     )
     
+    parser.add_argument(
+        "--set-totp",
+        metavar="EMAIL",
+        help="Hesap havuzundaki bir hesabın 2FA (TOTP) secret'ını şifreli kaydet (secret sorulur)"
+    )
+    
     args = parser.parse_args()
     
     print("🚀 Ubuntu Chrome Automation API Server")
@@ -616,6 +1115,10 @@ def main():
         show_session_info()
         return
     
+    if args.set_totp:
+        set_totp_secret(args.set_totp)
+        return
+    
     # Start API server
     print(f"🌐 API Server başlatılıyor...")
     print(f"📍 Host: {args.host}")
@@ -685,6 +1188,25 @@ def clear_session():
         print(f"❌ Session temizleme hatası: {e}")
 
 
+def set_totp_secret(email: str):
+    """Store an account's 2-Step Verification secret"""
+    print("🔐 TOTP Secret Kaydetme")
+    print("-" * 30)
+    
+    # Read without echo so the secret stays out of the terminal and shell history
+    secret = getpass.getpass(f"{email} için authenticator secret'ı: ").strip()
+    try:
+        code = generate_totp(secret)
+    except (ValueError, TypeError) as e:
+        print(f"❌ Geçersiz secret (base32 bekleniyor): {e}")
+        return
+    
+    if SessionManager().set_totp_secret(email, secret):
+        print(f"✅ TOTP secret kaydedildi: {email} (şu anki kod: {code})")
+    else:
+        print("❌ TOTP secret kaydedilemedi")
+
+
 def show_session_info():
     """Show current session information"""
     print("ℹ️ Session Bilgileri")
@@ -0,0 +1,204 @@
+"""
+Media Server for Ubuntu Chrome Automation
+Serves media files with byte ranges, strong ETags and conditional requests from a cached stat index
+"""
+
+import os
+import stat
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple, Iterator
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+from config import MEDIA_SERVE_CONFIG
+
+MEDIA_TYPES = {
+    ".mp4": "video/mp4",
+    ".avi": "video/x-msvideo",
+    ".mov": "video/quicktime",
+    ".mkv": "video/x-matroska",
+    ".webm": "video/webm",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif"
+}
+
+
+def media_type_for(filename: str) -> str:
+    """Guess a media type from a file name"""
+    return MEDIA_TYPES.get(Path(filename).suffix.lower(), "application/octet-stream")
+
+
+class MediaFileIndex:
+    """
+    Cached file metadata for media requests
+    
+    A path is stat'ed at most once per stat_ttl_seconds. Media files are
+    only ever replaced atomically (rename), so inode, size and mtime
+    together identify the bytes and make a strong ETag.
+    """
+    
+    def __init__(self):
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+    
+    def get(self, path: Path) -> Optional[Dict[str, Any]]:
+        """Get metadata of a regular file, None if it does not exist or is not a regular file"""
+        key = str(path)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and now - entry["checked_at"] < MEDIA_SERVE_CONFIG["stat_ttl_seconds"]:
+                return entry
+        
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            file_stat = None
+        if not file_stat or not stat.S_ISREG(file_stat.st_mode):
+            # Directories, FIFOs and devices would hang or fail the streamed read
+            self.invalidate(path)
+            return None
+        
+        identity = (file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns)
+        if not entry or entry["identity"] != identity:
+            entry = {
+                "identity": identity,
+                "size": file_stat.st_size,
+                "mtime": file_stat.st_mtime,
+                "etag": '"%x-%x-%x"' % identity,
+                "last_modified": formatdate(file_stat.st_mtime, usegmt=True),
+                "media_type": media_type_for(str(path))
+            }
+        entry["checked_at"] = now
+        with self.lock:
+            self.entries[key] = entry
+        return entry
+    
+    def invalidate(self, path: Path):
+        """Forget a file's metadata after it was replaced or removed"""
+        with self.lock:
+            self.entries.pop(str(path), None)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison"""
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range
+    
+    Returns:
+        Inclusive (start, end), None for a multi-range or malformed header,
+        including a last byte before the first (served as a full response)
+    
+    Raises:
+        ValueError: Range cannot be satisfied
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, dash, end_text = (part.strip() for part in spec.partition("-"))
+    if not dash or not (start_text or end_text) or not (start_text + end_text).isdigit():
+        return None
+    
+    if not start_text:
+        # Suffix range: the last N bytes
+        length = int(end_text)
+        if length == 0 or size == 0:
+            raise ValueError("range not satisfiable")
+        return max(size - length, 0), size - 1
+    
+    start = int(start_text)
+    if end_text and int(end_text) < start:
+        # Syntactically invalid (RFC 9110 14.1.1), the Range header is ignored
+        return None
+    end = min(int(end_text), size - 1) if end_text else size - 1
+    if start >= size:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+def _read_file(path: Path, start: int, length: int) -> Iterator[bytes]:
+    chunk_size = MEDIA_SERVE_CONFIG["chunk_size"]
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def media_response(request: Request, path: Path, entry: Dict[str, Any],
+                   headers: Dict[str, str] = None, media_type: str = None) -> Response:
+    """
+    Build the response for a media request
+    
+    Answers If-None-Match / If-Modified-Since with 304, a single Range
+    (honoring If-Range) with 206, an unsatisfiable range with 416 and
+    everything else with the full file. media_type overrides the one
+    guessed from the path (store blobs have no extension).
+    """
+    media_type = media_type or entry["media_type"]
+    base_headers = {
+        "ETag": entry["etag"],
+        "Last-Modified": entry["last_modified"],
+        "Accept-Ranges": "bytes",
+        "Cache-Control": MEDIA_SERVE_CONFIG["cache_control"],
+        **(headers or {})
+    }
+    size = entry["size"]
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, entry["etag"]):
+            return Response(status_code=304, headers=base_headers)
+    elif _not_modified_since(request.headers.get("if-modified-since"), entry["mtime"]):
+        return Response(status_code=304, headers=base_headers)
+    
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range in (entry["etag"], entry["last_modified"])):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**base_headers, "Content-Range": f"bytes */{size}"})
+    
+    start, end = byte_range or (0, size - 1)
+    length = max(end - start + 1, 0)
+    response_headers = {**base_headers, "Content-Length": str(length)}
+    if byte_range:
+        response_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    
+    if request.method == "HEAD":
+        return Response(status_code=206 if byte_range else 200, headers=response_headers, media_type=media_type)
+    return StreamingResponse(
+        _read_file(path, start, length),
+        status_code=206 if byte_range else 200,
+        headers=response_headers,
+        media_type=media_type
+    )
+
+
+# Process-wide metadata index shared by the media endpoints
+media_index = MediaFileIndex()
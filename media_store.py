@@ -0,0 +1,219 @@
+"""
+Media Store for Ubuntu Chrome Automation
+Keeps every media blob once under its content hash, with a filename index, per-job references and retention
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from config import MEDIA_STORE_CONFIG, MEDIA_STORE_DIR
+
+
+def file_sha256(path: Path) -> str:
+    """Hash a file in 1MB chunks"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class MediaStore:
+    """
+    Content-addressed media storage
+    
+    Blobs live at store/<aa>/<sha256>. The index maps each public filename
+    to its blob and owning job, and every blob counts its references per
+    job; a blob is deleted when its last reference is released. The index
+    is rewritten atomically after every change.
+    """
+    
+    def __init__(self, store_dir: Path = None, index_file: Path = None):
+        self.store_dir = Path(store_dir or MEDIA_STORE_DIR)
+        self.index_file = Path(index_file or MEDIA_STORE_CONFIG["index_file"])
+        self.lock = threading.Lock()
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.index = self._load_index()
+    
+    def _load_index(self) -> Dict[str, Any]:
+        try:
+            with open(self.index_file) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault("files", {})
+        index.setdefault("blobs", {})
+        return index
+    
+    def _save_index(self):
+        temp_file = self.index_file.with_suffix(".tmp")
+        with open(temp_file, "w") as f:
+            json.dump(self.index, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.index_file)
+    
+    def blob_path(self, sha256: str) -> Path:
+        return self.store_dir / sha256[:2] / sha256
+    
+    def put(self, source: Path, filename: str, job_id: str, sha256: str = None,
+            content_type: str = None) -> Dict[str, Any]:
+        """
+        Move a finished file into the store
+        
+        Args:
+            source: File to take over, it is moved (or removed if the blob exists)
+            filename: Public name the file is served under
+            job_id: Job holding the reference
+            sha256: Content hash if already known (computed otherwise)
+            content_type: MIME type of the content
+        
+        Returns:
+            {"filename", "sha256", "size", "path", "deduplicated"}
+        """
+        source = Path(source)
+        sha256 = sha256 or file_sha256(source)
+        blob = self.blob_path(sha256)
+        
+        with self.lock:
+            deduplicated = blob.exists()
+            if deduplicated:
+                source.unlink(missing_ok=True)
+            else:
+                blob.parent.mkdir(exist_ok=True)
+                os.replace(source, blob)
+            size = blob.stat().st_size
+            
+            now = datetime.now().isoformat()
+            entry = self.index["blobs"].setdefault(sha256, {
+                "size": size,
+                "content_type": content_type,
+                "created_at": now,
+                "refs": {}
+            })
+            entry["refs"][job_id] = entry["refs"].get(job_id, 0) + 1
+            
+            # A filename stored again (e.g. a retried job) moves to the new content
+            previous = self.index["files"].get(filename)
+            self.index["files"][filename] = {"sha256": sha256, "job_id": job_id, "created_at": now}
+            if previous:
+                self._release(previous)
+            self._save_index()
+        
+        if deduplicated:
+            print(f"♻️ Aynı video zaten kayıtlı: {filename} -> {sha256[:12]}")
+        return {"filename": filename, "sha256": sha256, "size": size, "path": str(blob), "deduplicated": deduplicated}
+    
+    def link(self, filename: str, new_filename: str, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Serve a stored file under another name for another job, without copying it
+        
+        Returns:
+            {"filename", "sha256", "size"}, None if filename is not stored
+        """
+        with self.lock:
+            entry = self.index["files"].get(filename)
+            blob = self.index["blobs"].get(entry["sha256"]) if entry else None
+            if not blob:
+                return None
+            blob["refs"][job_id] = blob["refs"].get(job_id, 0) + 1
+            previous = self.index["files"].get(new_filename)
+            self.index["files"][new_filename] = {
+                "sha256": entry["sha256"],
+                "job_id": job_id,
+                "created_at": datetime.now().isoformat()
+            }
+            if previous:
+                self._release(previous)
+            self._save_index()
+        return {"filename": new_filename, "sha256": entry["sha256"], "size": blob["size"]}
+    
+    def resolve(self, filename: str) -> Optional[Path]:
+        """Get the blob a filename is served from, None if unknown"""
+        with self.lock:
+            entry = self.index["files"].get(filename)
+        return self.blob_path(entry["sha256"]) if entry else None
+    
+    def _drop_file(self, filename: str) -> int:
+        """Remove a filename and its reference, returns the bytes freed (lock held)"""
+        entry = self.index["files"].pop(filename, None)
+        return self._release(entry) if entry else 0
+    
+    def _release(self, entry: Dict[str, Any]) -> int:
+        """Drop a file entry's blob reference, deleting the blob after its last one"""
+        blob = self.index["blobs"].get(entry["sha256"])
+        if not blob:
+            return 0
+        refs = blob["refs"]
+        refs[entry["job_id"]] = refs.get(entry["job_id"], 1) - 1
+        if refs[entry["job_id"]] <= 0:
+            del refs[entry["job_id"]]
+        if refs:
+            return 0
+        
+        del self.index["blobs"][entry["sha256"]]
+        self.blob_path(entry["sha256"]).unlink(missing_ok=True)
+        return blob["size"]
+    
+    def release_job(self, job_id: str) -> int:
+        """
+        Release all files of a job
+        
+        Returns:
+            Bytes freed by blobs no other job references
+        """
+        with self.lock:
+            filenames = [name for name, entry in self.index["files"].items() if entry["job_id"] == job_id]
+            freed = sum(self._drop_file(name) for name in filenames)
+            if filenames:
+                self._save_index()
+        return freed
+    
+    def enforce_retention(self, max_age_days: float = None, max_total_bytes: int = None) -> Dict[str, Any]:
+        """
+        Release files older than max_age_days, then the oldest files while the store is too large
+        
+        Returns:
+            {"released_files", "freed_bytes", "total_bytes"}
+        """
+        max_age_days = max_age_days if max_age_days is not None else MEDIA_STORE_CONFIG["max_age_days"]
+        max_total_bytes = max_total_bytes if max_total_bytes is not None else MEDIA_STORE_CONFIG["max_total_bytes"]
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+        
+        with self.lock:
+            by_age: List[str] = sorted(self.index["files"], key=lambda name: self.index["files"][name]["created_at"])
+            total = sum(blob["size"] for blob in self.index["blobs"].values())
+            released, freed = 0, 0
+            for filename in by_age:
+                if self.index["files"][filename]["created_at"] >= cutoff and total - freed <= max_total_bytes:
+                    break
+                freed += self._drop_file(filename)
+                released += 1
+            
+            if released:
+                self._save_index()
+            total -= freed
+        
+        if released:
+            print(f"🧹 Media store: {released} dosya bırakıldı, {freed} byte silindi")
+        return {"released_files": released, "freed_bytes": freed, "total_bytes": total}
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get store size and reference statistics"""
+        with self.lock:
+            blobs = self.index["blobs"]
+            return {
+                "files": len(self.index["files"]),
+                "blobs": len(blobs),
+                "total_bytes": sum(blob["size"] for blob in blobs.values()),
+                "shared_blobs": sum(1 for blob in blobs.values() if sum(blob["refs"].values()) > 1)
+            }
+
+
+# Process-wide media store
+media_store = MediaStore()
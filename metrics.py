@@ -0,0 +1,286 @@
+"""
+Metrics Registry for Ubuntu Chrome Automation
+Prometheus-style counters, gauges and histograms with lock-light updates
+"""
+
+import abc
+import bisect
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+
+class _Metric(abc.ABC):
+    """
+    Base metric with per-thread shards
+    
+    Every thread writes only to its own shard, so updates never take a
+    lock. The shard list lock is only taken when a thread touches a metric
+    for the first time and when shards are merged at scrape time.
+    """
+    
+    metric_type = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._shards: List[Dict[Tuple[str, ...], Any]] = []
+        self._shards_lock = threading.Lock()
+        self._local = threading.local()
+    
+    def _shard(self) -> Dict[Tuple[str, ...], Any]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+    
+    def _label_values(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+    
+    def _snapshot_shards(self) -> List[Dict[Tuple[str, ...], Any]]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        # dict.copy() runs under the GIL, so a concurrent writer cannot break it
+        return [shard.copy() for shard in shards]
+    
+    def _format_labels(self, values: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ""
+        escaped = [
+            '%s="%s"' % (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for name, value in pairs
+        ]
+        return "{" + ",".join(escaped) + "}"
+    
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}"
+        ]
+        lines.extend(self._render_samples())
+        return lines
+    
+    @abc.abstractmethod
+    def _render_samples(self) -> List[str]:
+        """Sample lines of the metric in exposition format"""
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+    
+    metric_type = "counter"
+    
+    def inc(self, amount: float = 1, **labels):
+        """Increase counter"""
+        shard = self._shard()
+        key = self._label_values(labels)
+        shard[key] = shard.get(key, 0) + amount
+    
+    def get(self, **labels) -> float:
+        """Get current counter value"""
+        key = self._label_values(labels)
+        return sum(shard.get(key, 0) for shard in self._snapshot_shards())
+    
+    def _render_samples(self) -> List[str]:
+        totals: Dict[Tuple[str, ...], float] = {}
+        for shard in self._snapshot_shards():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0) + value
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in sorted(totals.items())]
+
+
+class Gauge(_Metric):
+    """Gauge updated with inc/dec or computed at scrape time"""
+    
+    metric_type = "gauge"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+    
+    def inc(self, amount: float = 1, **labels):
+        """Increase gauge"""
+        shard = self._shard()
+        key = self._label_values(labels)
+        shard[key] = shard.get(key, 0) + amount
+    
+    def dec(self, amount: float = 1, **labels):
+        """Decrease gauge"""
+        self.inc(-amount, **labels)
+    
+    def set_function(self, function: Callable[[], float], **labels):
+        """Compute gauge value with the given function at scrape time"""
+        self._functions[self._label_values(labels)] = function
+    
+    def get(self, **labels) -> float:
+        """Get current gauge value"""
+        key = self._label_values(labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return sum(shard.get(key, 0) for shard in self._snapshot_shards())
+    
+    def _render_samples(self) -> List[str]:
+        totals: Dict[Tuple[str, ...], float] = {}
+        for shard in self._snapshot_shards():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0) + value
+        for key, function in list(self._functions.items()):
+            try:
+                totals[key] = function()
+            except Exception as e:
+                print(f"⚠️ Gauge hesaplama hatası ({self.name}): {e}")
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in sorted(totals.items())]
+
+
+class _Timer:
+    """Context manager observing elapsed seconds into a histogram"""
+    
+    def __init__(self, histogram: "Histogram", labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+        self.elapsed: Optional[float] = None
+        self._start = 0.0
+    
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.elapsed = time.perf_counter() - self._start
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+
+class Histogram(_Metric):
+    """Histogram with fixed upper bounds"""
+    
+    metric_type = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, **labels):
+        """Record an observation"""
+        shard = self._shard()
+        key = self._label_values(labels)
+        state = shard.get(key)
+        if state is None:
+            # Bucket counts (+Inf last), then sum and count
+            state = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            shard[key] = state
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+    
+    def time(self, **labels) -> _Timer:
+        """Time a block of code"""
+        return _Timer(self, labels)
+    
+    def _render_samples(self) -> List[str]:
+        totals: Dict[Tuple[str, ...], List[float]] = {}
+        for shard in self._snapshot_shards():
+            for key, state in shard.items():
+                state = list(state)
+                if key in totals:
+                    totals[key] = [a + b for a, b in zip(totals[key], state)]
+                else:
+                    totals[key] = state
+        
+        lines = []
+        for key, state in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f"{self.name}_bucket{self._format_labels(key, (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {state[-2]}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {state[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in Prometheus text format"""
+    
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+    
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.lock = threading.Lock()
+    
+    def _register(self, metric: _Metric) -> _Metric:
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self.metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+    
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+    
+    def render(self) -> str:
+        """Render all metrics in Prometheus exposition format"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry and automation metrics
+registry = MetricsRegistry()
+
+STEP_DURATION = registry.histogram(
+    "flow_step_duration_seconds",
+    "Duration of automation steps",
+    ("step",)
+)
+SELECTOR_MISSES = registry.counter(
+    "flow_selector_misses_total",
+    "Selectors that did not match any element",
+    ("step",)
+)
+ACCOUNT_SWITCHES = registry.counter(
+    "flow_account_switches_total",
+    "Account switches",
+    ("reason",)
+)
+QUEUE_DEPTH = registry.gauge(
+    "flow_job_queue_depth",
+    "Jobs waiting in the scheduler queue"
+)
+LIVE_BROWSERS = registry.gauge(
+    "flow_live_browsers",
+    "Chrome browsers currently running"
+)
+CONCURRENCY_LIMIT = registry.gauge(
+    "flow_concurrency_limit",
+    "Jobs allowed to run at once"
+)
+DOWNLOADED_BYTES = registry.counter(
+    "flow_downloaded_bytes_total",
+    "Video bytes downloaded into the media directory",
+    ("resumed",)
+)
+PROMPT_CACHE_LOOKUPS = registry.counter(
+    "flow_prompt_cache_lookups_total",
+    "Prompt result cache lookups",
+    ("result",)
+)
@@ -0,0 +1,213 @@
+"""
+In-Page Helpers for Ubuntu Chrome Automation
+Finds form elements in one script call and drives them with trusted CDP input
+"""
+
+from typing import Dict, Any, List, Optional
+
+from selenium.webdriver.common.by import By
+
+from cdp_client import cdp_sessions
+from config import FLOW_CONFIG
+
+# Input.dispatchKeyEvent modifier bit for Ctrl
+CTRL_MODIFIER = 2
+
+# Installed on every new document as window.__flowHelpers.
+# Selectors starting with "/" or "(" are XPath, everything else is CSS.
+# The page only finds elements and reports where they are; typing and
+# clicking are sent as trusted input through CDP (see fill_and_submit).
+HELPERS_SOURCE = """
+(() => {
+    if (window.__flowHelpers) {
+        return;
+    }
+    const isUsable = element => {
+        const style = window.getComputedStyle(element);
+        return !element.disabled && style.display !== "none" && style.visibility !== "hidden"
+            && element.getClientRects().length > 0;
+    };
+    const query = selector => {
+        if (selector.startsWith("/") || selector.startsWith("(")) {
+            return document.evaluate(
+                selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+            ).singleNodeValue;
+        }
+        return document.querySelector(selector);
+    };
+    const findFirst = selectors => {
+        for (const selector of selectors) {
+            try {
+                const element = query(selector);
+                if (element && isUsable(element)) {
+                    return {selector: selector, element: element};
+                }
+            } catch (e) {
+                // Invalid selector, try the next one
+            }
+        }
+        return null;
+    };
+    const locate = found => {
+        found.element.scrollIntoView({block: "center", inline: "center"});
+        const rect = found.element.getBoundingClientRect();
+        return {
+            selector: found.selector,
+            x: rect.left + rect.width / 2,
+            y: rect.top + rect.height / 2,
+            hasValue: !!found.element.value
+        };
+    };
+    const nextFrame = () => new Promise(resolve => requestAnimationFrame(() => resolve()));
+    window.__flowHelpers = {
+        locateFirst(selectors) {
+            const found = findFirst(selectors);
+            return found ? locate(found) : null;
+        },
+        async waitForFirst(selectors, timeoutMs) {
+            // Frameworks enable the submit button after they render the new value
+            const deadline = Date.now() + timeoutMs;
+            let found = findFirst(selectors);
+            while (!found && selectors.length && Date.now() < deadline) {
+                await nextFrame();
+                found = findFirst(selectors);
+            }
+            return found ? locate(found) : null;
+        }
+    };
+})();
+"""
+
+CALL_HELPER_SCRIPT = """
+const helpers = window.__flowHelpers;
+if (!helpers) {
+    return {__missing__: true};
+}
+return helpers[arguments[0]](...arguments[1]);
+"""
+
+
+def install_page_helpers(driver) -> bool:
+    """Install the helpers on every future document of a browser and on the current one"""
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": HELPERS_SOURCE})
+        driver.execute_script(HELPERS_SOURCE)
+        return True
+    except Exception as e:
+        print(f"⚠️ Sayfa yardımcıları yüklenemedi: {e}")
+        return False
+
+
+def call_helper(driver, name: str, *args) -> Any:
+    """Run a helper in the page, injecting it first if the page does not have it yet"""
+    result = driver.execute_script(CALL_HELPER_SCRIPT, name, list(args))
+    if isinstance(result, dict) and result.get("__missing__"):
+        driver.execute_script(HELPERS_SOURCE)
+        result = driver.execute_script(CALL_HELPER_SCRIPT, name, list(args))
+    return result
+
+
+def _find_element(driver, selector: str):
+    by = By.XPATH if selector.startswith(("/", "(")) else By.CSS_SELECTOR
+    return driver.find_element(by, selector)
+
+
+def _cdp_click(session, x: float, y: float):
+    """Trusted mouse click at viewport coordinates"""
+    session.send("Input.dispatchMouseEvent", {"type": "mouseMoved", "x": x, "y": y}, wait=False)
+    session.send("Input.dispatchMouseEvent",
+                 {"type": "mousePressed", "x": x, "y": y, "button": "left", "clickCount": 1}, wait=False)
+    session.send("Input.dispatchMouseEvent",
+                 {"type": "mouseReleased", "x": x, "y": y, "button": "left", "clickCount": 1})
+
+
+def _cdp_type(session, text: str, clear: bool):
+    """
+    Trusted typing into the focused field
+    
+    Every character is a keyDown/keyUp pair carrying its text, so the page
+    sees the same trusted keydown, keypress, beforeinput and input events
+    as from a keyboard. The events are pipelined; Input handles them in
+    order and only the last one is awaited.
+    """
+    events = []
+    if clear:
+        select_all = {"key": "a", "code": "KeyA", "windowsVirtualKeyCode": 65, "modifiers": CTRL_MODIFIER}
+        backspace = {"key": "Backspace", "code": "Backspace", "windowsVirtualKeyCode": 8}
+        events += [
+            {"type": "rawKeyDown", **select_all, "commands": ["selectAll"]},
+            {"type": "keyUp", **select_all},
+            {"type": "rawKeyDown", **backspace},
+            {"type": "keyUp", **backspace}
+        ]
+    for character in text:
+        # Line breaks carry "\r" text but no Enter key, so Enter handlers do not submit the form
+        events += [
+            {"type": "keyDown", "key": character, "text": character.replace("\n", "\r")},
+            {"type": "keyUp", "key": character}
+        ]
+    for index, event in enumerate(events):
+        session.send("Input.dispatchKeyEvent", event, wait=index == len(events) - 1)
+
+
+def click_first(driver, selectors: List[str]) -> Optional[str]:
+    """
+    Click the first visible and enabled element matching one of the selectors
+    
+    Returns:
+        Selector that matched, None if nothing was clicked
+    """
+    found = call_helper(driver, "locateFirst", selectors)
+    if not found:
+        return None
+    session = cdp_sessions.get(driver)
+    if session:
+        _cdp_click(session, found["x"], found["y"])
+    else:
+        _find_element(driver, found["selector"]).click()
+    return found["selector"]
+
+
+def fill_and_submit(driver, field_selectors: List[str], text: str,
+                    submit_selectors: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Type text into the first matching field and click the first matching submit button
+    
+    Input is trusted: CDP Input events on the shared session, or WebDriver
+    send_keys/click when no CDP session is available.
+    
+    Args:
+        driver: WebDriver of the page
+        field_selectors: Input or textarea selectors in priority order
+        text: Text to type, replaces the current value
+        submit_selectors: Button selectors in priority order, empty to only fill
+    
+    Returns:
+        {"filled", "submitted", "field", "submit"} with the matched selectors
+    """
+    field = call_helper(driver, "locateFirst", field_selectors)
+    if not field:
+        return {"filled": False, "submitted": False, "field": None, "submit": None}
+    
+    session = cdp_sessions.get(driver)
+    if session:
+        _cdp_click(session, field["x"], field["y"])
+        _cdp_type(session, text, clear=field["hasValue"])
+    else:
+        element = _find_element(driver, field["selector"])
+        element.clear()
+        element.send_keys(text)
+    
+    timeout_ms = int(FLOW_CONFIG["submit_ready_timeout"] * 1000)
+    submit = call_helper(driver, "waitForFirst", submit_selectors or [], timeout_ms) if submit_selectors else None
+    if submit:
+        if session:
+            _cdp_click(session, submit["x"], submit["y"])
+        else:
+            _find_element(driver, submit["selector"]).click()
+    return {
+        "filled": True,
+        "submitted": bool(submit),
+        "field": field["selector"],
+        "submit": submit["selector"] if submit else None
+    }
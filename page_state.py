@@ -0,0 +1,110 @@
+"""
+Page State Detector for Ubuntu Chrome Automation
+Reads URL, login state and Flow UI readiness of a browser with one script call
+"""
+
+import time
+from typing import Dict, Any
+from urllib.parse import urlparse
+
+from config import FLOW_CONFIG
+
+# Flow is ready on its home page once a create button is enabled
+# (same button texts as the create project selectors in ChromeAutomation)
+PAGE_STATE_SCRIPT = """
+const flowPath = arguments[0];
+const host = location.hostname;
+const path = location.pathname;
+const onFlow = host === "labs.google" && path.startsWith(flowPath);
+const signInLink = document.querySelector(
+    'a[href*="accounts.google.com/ServiceLogin"], a[href*="accounts.google.com/signin"]'
+);
+const signedOut = host === "accounts.google.com" || (onFlow && !!signInLink);
+const createReady = Array.from(document.querySelectorAll("button")).some(button => {
+    const text = button.innerText || "";
+    return ["Create", "New Project", "Start"].some(label => text.includes(label)) && !button.disabled;
+});
+return {
+    url: location.href,
+    ready_state: document.readyState,
+    on_flow: onFlow,
+    in_project: onFlow && path.includes("/project/"),
+    signed_out: signedOut,
+    logged_in: onFlow && !signedOut,
+    flow_ready: onFlow && !signedOut && !path.includes("/project/") && document.readyState === "complete" && createReady
+};
+"""
+
+# Client-side navigation to Flow home, keeps the loaded app and its connections
+RESET_TO_HOME_SCRIPT = """
+const flowPath = arguments[0];
+if (window.next && window.next.router && typeof window.next.router.push === "function") {
+    window.next.router.push(flowPath);
+    return true;
+}
+const homeLink = Array.from(document.querySelectorAll("a[href]")).find(
+    link => new URL(link.href, location.href).pathname.replace(/\\/$/, "") === flowPath
+);
+if (homeLink) {
+    homeLink.click();
+    return true;
+}
+return false;
+"""
+
+FLOW_PATH = urlparse(FLOW_CONFIG["base_url"]).path.rstrip("/")
+
+EMPTY_STATE = {
+    "url": None,
+    "ready_state": None,
+    "on_flow": False,
+    "in_project": False,
+    "signed_out": False,
+    "logged_in": False,
+    "flow_ready": False
+}
+
+
+def detect_page_state(driver) -> Dict[str, Any]:
+    """Get URL, login state and Flow readiness of the current page"""
+    try:
+        state = driver.execute_script(PAGE_STATE_SCRIPT, FLOW_PATH)
+        return state if isinstance(state, dict) else dict(EMPTY_STATE)
+    except Exception as e:
+        print(f"⚠️ Sayfa durumu okunamadı: {e}")
+        return dict(EMPTY_STATE)
+
+
+def wait_for_flow_ready(driver, timeout: float = None) -> Dict[str, Any]:
+    """
+    Poll page state until Flow is ready, signed out is detected or timeout expires
+    
+    A loaded Flow page without a create button (e.g. onboarding) counts as
+    settled after page_settle_seconds, so callers are not held until timeout.
+    
+    Returns:
+        Last detected page state
+    """
+    timeout = timeout if timeout is not None else FLOW_CONFIG["page_ready_timeout"]
+    deadline = time.time() + timeout
+    loaded_at = None
+    while True:
+        state = detect_page_state(driver)
+        if state["flow_ready"] or state["signed_out"] or time.time() >= deadline:
+            return state
+        if state["on_flow"] and state["ready_state"] == "complete":
+            loaded_at = loaded_at or time.time()
+            if time.time() - loaded_at >= FLOW_CONFIG["page_settle_seconds"]:
+                return state
+        else:
+            loaded_at = None
+        time.sleep(FLOW_CONFIG["page_state_poll_interval"])
+
+
+def reset_to_flow_home(driver) -> bool:
+    """Go back to Flow home without a full page load, False if the page cannot do it"""
+    try:
+        return bool(driver.execute_script(RESET_TO_HOME_SCRIPT, FLOW_PATH))
+    except Exception as e:
+        print(f"⚠️ Flow ana sayfasına dönülemedi: {e}")
+        return False
@@ -0,0 +1,151 @@
+"""
+Project Capture for Ubuntu Chrome Automation
+Reads the created project's ID from Flow's API responses through CDP Network events
+"""
+
+import base64
+import re
+import threading
+import time
+from typing import Optional, Dict, Any, Set
+
+from cdp_client import cdp_sessions, CDPSession
+from config import PROJECT_CAPTURE_CONFIG, FLOW_CONFIG
+
+CREATE_URL_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in PROJECT_CAPTURE_CONFIG["create_url_patterns"]]
+PROJECT_ID_PATTERN = re.compile(
+    r'"(?:%s)"\s*:\s*"([A-Za-z0-9_-]+)"' % "|".join(map(re.escape, PROJECT_CAPTURE_CONFIG["id_keys"]))
+)
+PROJECT_URL_PATTERN = re.compile(r"/project/([A-Za-z0-9_-]+)")
+
+
+def project_id_from_url(url: Optional[str]) -> Optional[str]:
+    """Get the project ID of a Flow project page URL"""
+    match = PROJECT_URL_PATTERN.search(url or "")
+    return match.group(1) if match else None
+
+
+def project_url_for(project_id: str) -> str:
+    """Build the Flow page URL of a project"""
+    return f"{FLOW_CONFIG['base_url'].rstrip('/')}/project/{project_id}"
+
+
+class ProjectCapture:
+    """
+    Catches the project ID in Flow's project creation response
+    
+    Only the creation request itself (method and URL, seen in
+    Network.requestWillBeSent) is followed, so list or fetch calls made
+    meanwhile cannot report another project. Its body is read with
+    Network.getResponseBody once loadingFinished says it is complete.
+    """
+    
+    def __init__(self, session: CDPSession):
+        self.session = session
+        self.project_id: Optional[str] = None
+        self.found = threading.Event()
+        self.create_requests: Set[str] = set()
+        self.request_ids: Set[str] = set()
+        self.network_enabled = False
+        self.lock = threading.Lock()
+    
+    @classmethod
+    def attach(cls, driver) -> Optional["ProjectCapture"]:
+        """Start capturing on a browser, None when it has no CDP session"""
+        session = cdp_sessions.get(driver)
+        if not session:
+            return None
+        capture = cls(session)
+        try:
+            capture.start()
+            return capture
+        except Exception as e:
+            print(f"⚠️ Proje ID yakalama başlatılamadı: {e}")
+            capture.stop()
+            return None
+    
+    def start(self):
+        self.session.on("Network.requestWillBeSent", self._on_request_will_be_sent)
+        self.session.on("Network.responseReceived", self._on_response_received)
+        self.session.on("Network.loadingFinished", self._on_loading_finished)
+        self.session.send("Network.enable", {})
+        self.network_enabled = True
+    
+    def stop(self):
+        self.session.off("Network.requestWillBeSent", self._on_request_will_be_sent)
+        self.session.off("Network.responseReceived", self._on_response_received)
+        self.session.off("Network.loadingFinished", self._on_loading_finished)
+        # The pooled browser's session would otherwise stream every Network event for later jobs
+        if self.network_enabled:
+            self.network_enabled = False
+            try:
+                self.session.send("Network.disable", {}, wait=False)
+            except Exception:
+                pass
+    
+    def _on_request_will_be_sent(self, params: Dict[str, Any]):
+        request = params.get("request", {})
+        if request.get("method") not in PROJECT_CAPTURE_CONFIG["create_methods"]:
+            return
+        if any(pattern.search(request.get("url", "")) for pattern in CREATE_URL_PATTERNS):
+            with self.lock:
+                self.create_requests.add(params["requestId"])
+    
+    def _on_response_received(self, params: Dict[str, Any]):
+        response = params.get("response", {})
+        if response.get("status") != 200 or "json" not in response.get("mimeType", ""):
+            return
+        with self.lock:
+            if params["requestId"] in self.create_requests:
+                self.request_ids.add(params["requestId"])
+    
+    def _on_loading_finished(self, params: Dict[str, Any]):
+        with self.lock:
+            if params["requestId"] not in self.request_ids:
+                return
+            self.request_ids.discard(params["requestId"])
+        if self.found.is_set():
+            return
+        
+        result = self.session.send("Network.getResponseBody", {"requestId": params["requestId"]})
+        body = base64.b64decode(result["body"]).decode("utf-8", "replace") if result["base64Encoded"] else result["body"]
+        match = PROJECT_ID_PATTERN.search(body)
+        if match:
+            self.project_id = match.group(1)
+            self.found.set()
+
+
+def wait_for_project_id(driver, capture: Optional[ProjectCapture], timeout: float = None) -> Optional[str]:
+    """
+    Wait for the created project's ID
+    
+    Returns the ID from the creation response as soon as it arrives, or
+    from the page URL if Flow navigates to the project first. When both
+    are known and differ, the project page the browser is on wins.
+    
+    Returns:
+        Project ID, None on timeout
+    """
+    timeout = timeout if timeout is not None else FLOW_CONFIG["project_creation_timeout"]
+    deadline = time.time() + timeout
+    interval = FLOW_CONFIG["page_state_poll_interval"]
+    try:
+        while True:
+            captured = capture.project_id if capture and capture.found.wait(interval) else None
+            try:
+                project_id = project_id_from_url(driver.current_url)
+            except Exception:
+                project_id = None
+            if project_id:
+                if captured and captured != project_id:
+                    print(f"⚠️ Yakalanan proje ID'si ({captured}) sayfa URL'si ile uyuşmuyor, URL kullanılıyor")
+                return project_id
+            if captured:
+                return captured
+            if time.time() >= deadline:
+                return None
+            if not capture:
+                time.sleep(interval)
+    finally:
+        if capture:
+            capture.stop()
@@ -0,0 +1,102 @@
+"""
+Prompt Result Cache for Ubuntu Chrome Automation
+Completes a user's repeated prompt + model + action requests from an earlier result instead of a new Flow generation
+"""
+
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+from config import PROMPT_CACHE_CONFIG
+from media_store import media_store
+from metrics import PROMPT_CACHE_LOOKUPS
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a prompt for cache keys
+    
+    Unicode compatibility forms and whitespace differences are removed.
+    Case is kept, it can change what Flow renders (e.g. on-screen text).
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", prompt)).strip()
+
+
+def prompt_cache_key(prompt: str, model: str, action: str, user_id: Optional[str]) -> str:
+    """Hash of the normalized prompt with the model, action and requesting user"""
+    text = "\0".join((normalize_prompt(prompt), model.strip().lower(), action, user_id or ""))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PromptResultCache:
+    """
+    LRU cache of finished job results
+    
+    Entries expire after ttl_seconds and the least recently used one is
+    evicted above max_entries. A cached video that the media store no
+    longer has (released by retention or cleanup) is a miss. Results are
+    only shared with the user who requested them.
+    """
+    
+    def __init__(self):
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def lookup(self, prompt: str, model: str, action: str, user_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Get the cached result of a user's request, None on a miss"""
+        if not PROMPT_CACHE_CONFIG["enabled"]:
+            return None
+        key = prompt_cache_key(prompt, model, action, user_id)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and time.time() - entry["stored_at"] > PROMPT_CACHE_CONFIG["ttl_seconds"]:
+                del self.entries[key]
+                entry = None
+            if entry and entry.get("video_file") and not media_store.resolve(entry["video_file"]):
+                del self.entries[key]
+                entry = None
+            if entry:
+                self.entries.move_to_end(key)
+        
+        PROMPT_CACHE_LOOKUPS.inc(result="hit" if entry else "miss")
+        return dict(entry) if entry else None
+    
+    def store(self, job: Dict[str, Any]):
+        """Remember a completed job's result under its prompt, model, action and user"""
+        if not PROMPT_CACHE_CONFIG["enabled"] or not job.get("prompt"):
+            return
+        if not (job.get("video_url") or job.get("project_url")):
+            return
+        key = prompt_cache_key(job["prompt"], job.get("model") or "", job.get("action") or "", job.get("user_id"))
+        with self.lock:
+            self.entries[key] = {
+                "source_job_id": job["id"],
+                "project_id": job.get("project_id"),
+                "project_url": job.get("project_url"),
+                "video_url": job.get("video_url"),
+                "video_file": job.get("video_file"),
+                "video_sha256": job.get("video_sha256"),
+                "file_size": job.get("file_size"),
+                "stored_at": time.time()
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > PROMPT_CACHE_CONFIG["max_entries"]:
+                self.entries.popitem(last=False)
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get cache size and settings"""
+        with self.lock:
+            return {
+                "enabled": PROMPT_CACHE_CONFIG["enabled"],
+                "entries": len(self.entries),
+                "max_entries": PROMPT_CACHE_CONFIG["max_entries"],
+                "ttl_seconds": PROMPT_CACHE_CONFIG["ttl_seconds"]
+            }
+
+
+# Process-wide prompt result cache
+prompt_cache = PromptResultCache()
@@ -0,0 +1,54 @@
+"""
+Resource Profiles for Ubuntu Chrome Automation
+Blocks heavy content per job or step through CDP Network.setBlockedURLs
+"""
+
+from typing import Optional, List
+
+from config import RESOURCE_PROFILES, RESOURCE_BLOCK_PATTERNS, STEP_RESOURCE_PROFILES, CHROME_CONFIG
+
+
+def get_profile(name: Optional[str]) -> str:
+    """Resolve a profile name, falling back to the configured launch profile"""
+    if name in RESOURCE_PROFILES:
+        return name
+    if name:
+        print(f"⚠️ Bilinmeyen resource profile: {name}, {CHROME_CONFIG['resource_profile']} kullanılıyor")
+    return CHROME_CONFIG["resource_profile"]
+
+
+def get_launch_arguments(name: str = None) -> List[str]:
+    """Get Chrome command line arguments of a profile"""
+    return list(RESOURCE_PROFILES[get_profile(name)]["launch_arguments"])
+
+
+def get_blocked_patterns(name: str) -> List[str]:
+    """Get URL patterns a profile blocks"""
+    patterns = []
+    for category in RESOURCE_PROFILES[get_profile(name)]["blocked"]:
+        patterns.extend(RESOURCE_BLOCK_PATTERNS[category])
+    return patterns
+
+
+def get_step_profile(step: str, job_profile: str = None) -> str:
+    """Get runtime profile of a step, a job profile overrides the step defaults"""
+    return get_profile(job_profile or STEP_RESOURCE_PROFILES.get(step))
+
+
+def apply_resource_profile(driver, name: str) -> bool:
+    """
+    Apply a profile's URL blocking to a running browser
+    
+    Blocking only affects requests made after the call, so a page
+    loaded under "lean" keeps working when "full" is applied later.
+    
+    Returns:
+        True if the profile was applied
+    """
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": get_blocked_patterns(name)})
+        return True
+    except Exception as e:
+        print(f"⚠️ Resource profile uygulanamadı ({name}): {e}")
+        return False
@@ -5,25 +5,63 @@ Handles user sessions, credits, and account switching
 
 import json
 import os
+import re
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable
 
 from cryptography.fernet import Fernet
 
 from config import SESSION_CONFIG, DATA_DIR
+from metrics import ACCOUNT_SWITCHES
 
 
 class SessionManager:
-    """Manages user sessions, credits, and account switching"""
+    """
+    Manages user sessions, credits, and account switching
     
-    def __init__(self):
-        self.session_file = DATA_DIR / SESSION_CONFIG["session_file"]
+    Without an account the manager works on the process-wide current
+    session. Bound to an account (one per scheduled job) it keeps that
+    account's session in its own file, so jobs on different accounts
+    never read or switch each other's session.
+    """
+    
+    def __init__(self, account: str = None):
+        self.account = account
+        self.session_file = self._session_file_for(account)
+        # Asked before switching a job to another account, False if that account is taken
+        self.claim_account: Optional[Callable[[str], bool]] = None
         self.credit_threshold = SESSION_CONFIG["credit_threshold"]
         self.session_timeout_hours = SESSION_CONFIG["session_timeout_hours"]
         self.encryption_key_file = Path(SESSION_CONFIG["encryption_key_file"])
         self.cipher = self._get_or_create_cipher()
         
+    def _session_file_for(self, email: Optional[str]) -> Path:
+        """Session file of an account, the shared current session file without one"""
+        session_file = DATA_DIR / SESSION_CONFIG["session_file"]
+        if not email:
+            return session_file
+        return session_file.with_name(f"{session_file.stem}-{self.get_profile_name(email)}{session_file.suffix}")
+    
+    def bind_account(self, email: str) -> bool:
+        """
+        Work on an account's own session, creating it from the pool if needed
+        
+        Returns:
+            False if the account is not in the pool
+        """
+        self.account = email
+        self.session_file = self._session_file_for(email)
+        if self.get_current_session():
+            return True
+        
+        credentials = self.get_account_credentials(email)
+        if not credentials:
+            print(f"❌ Hesap havuzda yok: {email}")
+            return False
+        account = next(account for account in self.load_account_pool() if account["email"] == email)
+        return self.create_session(email, credentials["password"], account.get("credits", 0))
+    
     def _get_or_create_cipher(self) -> Fernet:
         """Get existing encryption key or create new one"""
         if self.encryption_key_file.exists():
@@ -97,6 +135,11 @@ class SessionManager:
     def create_session(self, email: str, password: str, credits: int = 1000) -> bool:
         """Create new session"""
         try:
+            # A bound manager follows the job to its new account
+            if self.account and email != self.account:
+                self.account = email
+                self.session_file = self._session_file_for(email)
+            
             session_data = {
                 "email": email,
                 "password": self.encrypt_password(password),
@@ -106,7 +149,7 @@ class SessionManager:
                 "status": "active",
                 "first_flow_access": False,
                 "onboarding_completed": False,
-                "browser_profile": None
+                "browser_profile": self.get_profile_name(email)
             }
             
             self.save_session(session_data)
@@ -163,29 +206,102 @@ class SessionManager:
         try:
             return {
                 "email": session["email"],
-                "password": self.decrypt_password(session["password"])
+                "password": self.decrypt_password(session["password"]),
+                "totp_secret": self.get_totp_secret(session["email"])
             }
         except Exception as e:
             print(f"❌ Credential çözme hatası: {e}")
             return None
     
-    def check_credits_and_switch_if_needed(self) -> bool:
+    def get_account_credentials(self, email: str) -> Optional[Dict[str, str]]:
+        """Get email, password and TOTP secret of an account from the pool"""
+        for account in self.load_account_pool():
+            if account["email"] == email:
+                return {
+                    "email": account["email"],
+                    "password": account["password"],
+                    "totp_secret": self.get_totp_secret(email)
+                }
+        return None
+    
+    def set_totp_secret(self, email: str, secret: str) -> bool:
+        """Store an account's 2-Step Verification secret encrypted in the pool"""
+        try:
+            accounts = self.load_account_pool()
+            
+            for account in accounts:
+                if account["email"] == email:
+                    account["totp_secret"] = self.cipher.encrypt(secret.encode()).decode()
+                    break
+            else:
+                print(f"⚠️ Hesap bulunamadı: {email}")
+                return False
+            
+            account_file = DATA_DIR / "account_pool.json"
+            with open(account_file, "w") as f:
+                json.dump(accounts, f, indent=2)
+            return True
+            
+        except Exception as e:
+            print(f"⚠️ TOTP secret kaydetme hatası: {e}")
+            return False
+    
+    def get_totp_secret(self, email: str) -> Optional[str]:
+        """Get an account's decrypted 2-Step Verification secret"""
+        for account in self.load_account_pool():
+            if account["email"] == email and account.get("totp_secret"):
+                try:
+                    return self.cipher.decrypt(account["totp_secret"].encode()).decode()
+                except Exception as e:
+                    print(f"❌ TOTP secret çözme hatası: {e}")
+                    return None
+        return None
+    
+    def get_profile_name(self, email: str) -> str:
+        """Get Chrome profile directory name for an account"""
+        slug = re.sub(r"[^a-z0-9]+", "-", email.lower()).strip("-")
+        return f"chrome-profile-{slug}"
+    
+    def get_session_profile(self) -> Optional[str]:
+        """Get Chrome profile directory name of the current session"""
+        session = self.get_current_session()
+        if not session:
+            return None
+        return session.get("browser_profile")
+    
+    def check_credits_and_switch_if_needed(self, preferred_email: str = None) -> bool:
         """Check credits and switch account if needed"""
         session = self.get_current_session()
         
         if session and session.get("credits_remaining", 0) <= self.credit_threshold:
             print(f"⚠️ Düşük kredi: {session.get('credits_remaining', 0)}")
-            return self.switch_to_next_account()
+            return self.switch_to_next_account(preferred_email)
         
         return False
     
-    def switch_to_next_account(self) -> bool:
-        """Switch to next available account"""
+    def switch_to_next_account(self, preferred_email: str = None) -> bool:
+        """
+        Switch to next available account
+        
+        Args:
+            preferred_email: Account to switch to if it still has credits
+                (e.g. one that is already logged in on a standby browser)
+        """
         try:
             print("🔄 Hesap değiştirme başlatılıyor...")
             
-            # Get next available account
-            next_account = self.get_next_available_account()
+            # Get next available account, one no other job is running on
+            session = self.get_current_session()
+            current_email = session.get("email") if session else None
+            candidates = []
+            if preferred_email and preferred_email != current_email:
+                candidates.append(self.get_available_account(preferred_email))
+            candidates.extend(self.get_available_accounts(exclude_email=current_email))
+            next_account = next(
+                (account for account in candidates
+                 if account and (not self.claim_account or self.claim_account(account["email"]))),
+                None
+            )
             
             if next_account:
                 # Create new session with new account
@@ -195,6 +311,7 @@ class SessionManager:
                     next_account["credits"]
                 ):
                     print(f"✅ Yeni hesaba geçildi: {next_account['email']}")
+                    ACCOUNT_SWITCHES.inc(reason="low_credits")
                     return True
                 else:
                     print("❌ Yeni session oluşturulamadı")
@@ -207,17 +324,41 @@ class SessionManager:
             print(f"❌ Hesap değiştirme hatası: {e}")
             return False
     
-    def get_next_available_account(self) -> Optional[Dict[str, Any]]:
+    def switch_to_account(self, email: str) -> bool:
+        """Switch to a specific account from the pool"""
+        account = self.get_available_account(email)
+        if not account:
+            print(f"❌ Hesap kullanılamıyor: {email}")
+            return False
+        
+        print(f"🔄 Hesaba geçiliyor: {email}")
+        if not self.create_session(account["email"], account["password"], account["credits"]):
+            return False
+        
+        ACCOUNT_SWITCHES.inc(reason="placement")
+        return True
+    
+    def get_next_available_account(self, exclude_email: str = None) -> Optional[Dict[str, Any]]:
         """Get next available account from pool"""
+        accounts = self.get_available_accounts(exclude_email)
+        return accounts[0] if accounts else None
+    
+    def get_available_accounts(self, exclude_email: str = None) -> List[Dict[str, Any]]:
+        """Get pool accounts with enough credits, least recently used first"""
         accounts = self.load_account_pool()
         
         # Sort by last used time (oldest first)
         accounts.sort(key=lambda x: x.get("last_used", "1970-01-01"))
-        
-        for account in accounts:
-            if account.get("credits", 0) > self.credit_threshold:
+        return [
+            account for account in accounts
+            if account["email"] != exclude_email and account.get("credits", 0) > self.credit_threshold
+        ]
+    
+    def get_available_account(self, email: str) -> Optional[Dict[str, Any]]:
+        """Get a specific account from pool if it has enough credits"""
+        for account in self.load_account_pool():
+            if account["email"] == email and account.get("credits", 0) > self.credit_threshold:
                 return account
-        
         return None
     
     def load_account_pool(self) -> List[Dict[str, Any]]:
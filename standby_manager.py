@@ -0,0 +1,220 @@
+"""
+Standby Account Manager for Ubuntu Chrome Automation
+Forecasts credit burn and logs in the next account before credits run out
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Deque, Tuple
+
+from chrome_automation import ChromeAutomation
+from session_manager import SessionManager
+from admission_control import admission_controller
+from config import FLOW_CONFIG, STANDBY_CONFIG
+
+
+class CreditBurnForecaster:
+    """Forecasts credit burn rate per account from recent credit samples"""
+    
+    def __init__(self, window: int = None):
+        self.window = window or STANDBY_CONFIG["sample_window"]
+        self.samples: Dict[str, Deque[Tuple[float, int]]] = {}
+    
+    def add_sample(self, email: str, credits: int, timestamp: float = None):
+        """Record remaining credits of an account"""
+        timestamp = timestamp if timestamp is not None else time.time()
+        samples = self.samples.setdefault(email, deque(maxlen=self.window))
+        
+        if samples:
+            last_credits = samples[-1][1]
+            if credits == last_credits:
+                return
+            if credits > last_credits:
+                # Credits were topped up, old burn history no longer applies
+                samples.clear()
+        
+        samples.append((timestamp, credits))
+    
+    def burn_rate(self, email: str) -> Optional[float]:
+        """Get credits burned per second, None if there is not enough data"""
+        samples = self.samples.get(email)
+        if not samples or len(samples) < STANDBY_CONFIG["min_samples"]:
+            return None
+        
+        (first_time, first_credits), (last_time, last_credits) = samples[0], samples[-1]
+        elapsed = last_time - first_time
+        if elapsed <= 0 or first_credits <= last_credits:
+            return None
+        
+        return (first_credits - last_credits) / elapsed
+    
+    def seconds_until(self, email: str, credits_floor: int, now: float = None) -> Optional[float]:
+        """Estimate seconds until an account drops to credits_floor"""
+        rate = self.burn_rate(email)
+        if not rate:
+            return None
+        
+        last_time, last_credits = self.samples[email][-1]
+        now = now if now is not None else time.time()
+        remaining = (last_credits - credits_floor) / rate
+        return max(0.0, remaining - (now - last_time))
+
+
+class StandbyLoginManager:
+    """Keeps the next account logged in on a standby browser before a switch is needed"""
+    
+    def __init__(self, session_manager: SessionManager = None):
+        self.session_manager = session_manager or SessionManager()
+        self.forecaster = CreditBurnForecaster()
+        self.check_interval = STANDBY_CONFIG["check_interval"]
+        self.warmup_lead_seconds = STANDBY_CONFIG["warmup_lead_seconds"]
+        self.standby: Optional[Dict[str, Any]] = None
+        self.lock = threading.Lock()
+        self._warming_up = False
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start background forecasting thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="standby-login", daemon=True)
+        self._thread.start()
+        print("✅ Standby login manager başlatıldı")
+    
+    def stop(self):
+        """Stop background thread and close standby browser"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.discard()
+    
+    def _run(self):
+        while not self._stop_event.wait(self.check_interval):
+            try:
+                self.check_and_warm_up()
+            except Exception as e:
+                print(f"⚠️ Standby kontrol hatası: {e}")
+    
+    def check_and_warm_up(self) -> bool:
+        """Sample current credits and warm up next account if exhaustion is near"""
+        session = self.session_manager.get_current_session()
+        if not session:
+            return False
+        
+        email = session.get("email")
+        credits = session.get("credits_remaining", 0)
+        self.forecaster.add_sample(email, credits)
+        
+        with self.lock:
+            # Standby already prepared or being prepared, wait for the handoff
+            if self._warming_up or self.standby:
+                return False
+            if not self.should_warm_up(email, credits):
+                return False
+            self._warming_up = True
+        
+        try:
+            next_account = self.session_manager.get_next_available_account(exclude_email=email)
+            if not next_account:
+                print("⚠️ Standby için kullanılabilir hesap yok")
+                return False
+            return self.warm_up(next_account["email"])
+        finally:
+            with self.lock:
+                self._warming_up = False
+    
+    def should_warm_up(self, email: str, credits: int) -> bool:
+        """Decide whether the active account is about to run out of credits"""
+        threshold = self.session_manager.credit_threshold
+        
+        # Next few jobs would already push the account below threshold
+        jobs_left = (credits - threshold) / FLOW_CONFIG["credits_per_project"]
+        if jobs_left <= STANDBY_CONFIG["jobs_margin"]:
+            return True
+        
+        eta = self.forecaster.seconds_until(email, threshold)
+        return eta is not None and eta <= self.warmup_lead_seconds
+    
+    def warm_up(self, email: str) -> bool:
+        """Launch a standby browser and log in the given account"""
+        credentials = self.session_manager.get_account_credentials(email)
+        if not credentials:
+            print(f"❌ Standby credentials bulunamadı: {email}")
+            return False
+        
+        admitted, reason = admission_controller.check()
+        if not admitted:
+            print(f"⏳ Standby browser ertelendi - {reason}")
+            return False
+        
+        print(f"🔥 Standby hesap hazırlanıyor: {email}")
+        automation = ChromeAutomation()
+        if not automation.launch_browser(self.session_manager.get_profile_name(email)):
+            return False
+        
+        if not automation.perform_login_flow(credentials):
+            automation.close_browser()
+            return False
+        
+        with self.lock:
+            self.standby = {
+                "email": email,
+                "automation": automation,
+                "ready_at": time.time()
+            }
+        
+        print(f"✅ Standby hesap hazır: {email}")
+        return True
+    
+    def get_ready_email(self) -> Optional[str]:
+        """Get email of the logged-in standby account, if any"""
+        with self.lock:
+            return self.standby["email"] if self.standby else None
+    
+    def take(self, email: str):
+        """
+        Hand off the standby browser for the given account
+        
+        Returns:
+            Logged-in driver or None if no standby browser for that account
+        """
+        with self.lock:
+            if not self.standby or self.standby["email"] != email:
+                return None
+            driver = self.standby["automation"].driver
+            self.standby = None
+        
+        print(f"⚡ Standby browser devredildi: {email}")
+        return driver
+    
+    def discard(self):
+        """Close standby browser without handing it off"""
+        with self.lock:
+            self._close_standby()
+    
+    def _close_standby(self):
+        if self.standby:
+            self.standby["automation"].close_browser()
+            self.standby = None
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get standby and forecast information"""
+        session = self.session_manager.get_current_session()
+        email = session.get("email") if session else None
+        rate = self.forecaster.burn_rate(email) if email else None
+        eta = self.forecaster.seconds_until(email, self.session_manager.credit_threshold) if email else None
+        
+        with self.lock:
+            standby = self.standby
+            return {
+                "active_account": email,
+                "burn_rate_per_hour": round(rate * 3600, 2) if rate else None,
+                "seconds_until_threshold": round(eta) if eta is not None else None,
+                "standby_account": standby["email"] if standby else None,
+                "standby_ready_since": standby["ready_at"] if standby else None,
+                "warming_up": self._warming_up
+            }
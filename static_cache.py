@@ -0,0 +1,324 @@
+"""
+Shared Static Asset Cache for Ubuntu Chrome Automation
+Serves Flow and Google static assets to every browser from one content-addressed store
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from cdp_client import cdp_sessions, CDPSession
+from config import STATIC_CACHE_CONFIG, STATIC_CACHE_DIR
+
+# Headers that describe the network transfer, not the stored body
+SKIPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie", "date", "age"}
+
+# Vary values that do not change the body the URL-keyed store would replay
+SHAREABLE_VARY = {"", "accept-encoding"}
+
+HASHED_URL_PATTERNS = [re.compile(pattern) for pattern in STATIC_CACHE_CONFIG["hashed_url_patterns"]]
+
+
+def parse_max_age(headers: Dict[str, str]) -> Optional[int]:
+    """Get max-age of a response, 0 when it must not be shared between browsers"""
+    cache_control = headers.get("cache-control", "").lower()
+    if any(directive in cache_control for directive in ("no-store", "private", "no-cache")):
+        return 0
+    # The store is keyed by URL only, a body varying on Origin, Cookie,
+    # Accept-Language etc. could be replayed to the wrong page
+    vary = {value.strip() for value in headers.get("vary", "").lower().split(",")}
+    if not vary <= SHAREABLE_VARY:
+        return 0
+    match = re.search(r"max-age=(\d+)", cache_control)
+    return int(match.group(1)) if match else None
+
+
+def is_immutable(url: str, headers: Dict[str, str]) -> bool:
+    """Whether a response without max-age can never change (content-hashed URL or immutable)"""
+    if "immutable" in headers.get("cache-control", "").lower():
+        return True
+    return any(pattern.search(url) for pattern in HASHED_URL_PATTERNS)
+
+
+class StaticAssetStore:
+    """
+    Size-limited content-addressed store on local disk
+    
+    Bodies are stored once per SHA-256 digest under objects/, an index maps
+    URLs to a digest, response headers and expiry. Least recently used
+    URLs are evicted when the store grows over max_size_mb. Index writes
+    are batched: a store schedules one write index_flush_seconds later,
+    covering every store made in between.
+    """
+    
+    def __init__(self, root: Path = None):
+        self.root = Path(root or STATIC_CACHE_DIR)
+        self.objects_dir = self.root / "objects"
+        self.index_file = self.root / "index.json"
+        self.max_size = STATIC_CACHE_CONFIG["max_size_mb"] * 1024 * 1024
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+        self.save_lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index: Dict[str, Dict[str, Any]] = self._load_index()
+    
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_file) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Drop entries whose object was removed
+        return {url: entry for url, entry in index.items() if self._object_path(entry["digest"]).exists()}
+    
+    def _schedule_save(self):
+        """Write the index soon, once for all stores until then (lock held)"""
+        if self._save_timer:
+            return
+        self._save_timer = threading.Timer(STATIC_CACHE_CONFIG["index_flush_seconds"], self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+    
+    def flush(self):
+        """Write the index now"""
+        with self.lock:
+            self._save_timer = None
+            data = json.dumps(self.index)
+        with self.save_lock:
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+            os.replace(tmp_path, self.index_file)
+    
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+    
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get a fresh stored response for a URL with its body"""
+        with self.lock:
+            entry = self.index.get(url)
+            if not entry or entry["expires_at"] < time.time():
+                self.stats["misses"] += 1
+                return None
+            entry["last_used"] = time.time()
+        
+        try:
+            body = self._object_path(entry["digest"]).read_bytes()
+        except OSError:
+            with self.lock:
+                self.index.pop(url, None)
+                self.stats["misses"] += 1
+            return None
+        
+        with self.lock:
+            self.stats["hits"] += 1
+        return {"status": entry["status"], "headers": entry["headers"], "body": body}
+    
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes, ttl: int):
+        """Store a response body under its digest and index the URL"""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        
+        now = time.time()
+        with self.lock:
+            self.index[url] = {
+                "digest": digest,
+                "size": len(body),
+                "status": status,
+                "headers": headers,
+                "stored_at": now,
+                "last_used": now,
+                "expires_at": now + ttl
+            }
+            self.stats["stored"] += 1
+            self._evict()
+            self._schedule_save()
+    
+    def _evict(self):
+        """Remove least recently used URLs until the store fits, and unreferenced objects"""
+        sizes = {entry["digest"]: entry["size"] for entry in self.index.values()}
+        total = sum(sizes.values())
+        if total <= self.max_size:
+            return
+        
+        for url, entry in sorted(self.index.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_size:
+                break
+            del self.index[url]
+            self.stats["evicted"] += 1
+            digest = entry["digest"]
+            if any(other["digest"] == digest for other in self.index.values()):
+                continue
+            total -= sizes[digest]
+            try:
+                self._object_path(digest).unlink()
+            except OSError:
+                pass
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get store size and hit statistics"""
+        with self.lock:
+            digests = {entry["digest"]: entry["size"] for entry in self.index.values()}
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "urls": len(self.index),
+                "objects": len(digests),
+                "size_mb": round(sum(digests.values()) / 1024 / 1024, 1),
+                "max_size_mb": STATIC_CACHE_CONFIG["max_size_mb"],
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+                **self.stats
+            }
+
+
+def fetch_patterns() -> List[Dict[str, str]]:
+    """Fetch.enable patterns of the static asset interceptor"""
+    patterns = []
+    for url_pattern in STATIC_CACHE_CONFIG["url_patterns"]:
+        for resource_type in STATIC_CACHE_CONFIG["resource_types"]:
+            for stage in ("Request", "Response"):
+                patterns.append({"urlPattern": url_pattern, "resourceType": resource_type, "requestStage": stage})
+    return patterns
+
+
+class StaticAssetInterceptor:
+    """Answers a browser's static asset requests from the shared store through CDP Fetch"""
+    
+    def __init__(self, session: CDPSession, store: StaticAssetStore, executor: ThreadPoolExecutor):
+        self.session = session
+        self.store = store
+        self.executor = executor
+        self.max_entry_size = STATIC_CACHE_CONFIG["max_entry_size_mb"] * 1024 * 1024
+        self.default_ttl = STATIC_CACHE_CONFIG["default_ttl_seconds"]
+    
+    def enable(self):
+        """Pause matching requests before they are sent and their responses before they are read"""
+        self.session.on("Fetch.requestPaused", self._on_request_paused)
+        self.session.send("Fetch.enable", {"patterns": fetch_patterns()})
+    
+    def _on_request_paused(self, params: Dict[str, Any]):
+        # Other interceptors on the session (e.g. browser downloads) handle their own types
+        if params.get("resourceType") not in STATIC_CACHE_CONFIG["resource_types"]:
+            return
+        # Body reads and disk access must not hold up the session's shared event thread
+        self.executor.submit(self._handle_paused, params)
+    
+    def _handle_paused(self, params: Dict[str, Any]):
+        request_id = params["requestId"]
+        try:
+            if "responseStatusCode" in params or "responseErrorReason" in params:
+                self._store_response(params)
+            else:
+                self._serve_request(params)
+        except Exception as e:
+            print(f"⚠️ Static cache hatası: {e}")
+            # Never leave the browser's request hanging
+            self.session.send("Fetch.continueRequest", {"requestId": request_id}, wait=False)
+    
+    def _serve_request(self, params: Dict[str, Any]):
+        request = params["request"]
+        cached = self.store.get(request["url"]) if request["method"] == "GET" else None
+        if not cached:
+            self.session.send("Fetch.continueRequest", {"requestId": params["requestId"]}, wait=False)
+            return
+        
+        self.session.send("Fetch.fulfillRequest", {
+            "requestId": params["requestId"],
+            "responseCode": cached["status"],
+            "responseHeaders": [{"name": name, "value": value} for name, value in cached["headers"].items()],
+            "body": base64.b64encode(cached["body"]).decode()
+        }, wait=False)
+    
+    def _store_response(self, params: Dict[str, Any]):
+        request_id = params["requestId"]
+        status = params.get("responseStatusCode")
+        headers = {
+            header["name"].lower(): header["value"]
+            for header in params.get("responseHeaders", [])
+        }
+        max_age = parse_max_age(headers)
+        if max_age is None:
+            # Without cache headers only assets that cannot change are kept
+            ttl = self.default_ttl if is_immutable(params["request"]["url"], headers) else 0
+        else:
+            ttl = max_age
+        size = int(headers.get("content-length", 0) or 0)
+        
+        if params["request"]["method"] == "GET" and status == 200 and ttl > 0 and size <= self.max_entry_size:
+            result = self.session.send("Fetch.getResponseBody", {"requestId": request_id})
+            body = base64.b64decode(result["body"]) if result["base64Encoded"] else result["body"].encode()
+            if len(body) <= self.max_entry_size:
+                kept_headers = {name: value for name, value in headers.items() if name not in SKIPPED_HEADERS}
+                self.store.put(params["request"]["url"], status, kept_headers, body, ttl)
+        
+        self.session.send("Fetch.continueRequest", {"requestId": request_id}, wait=False)
+
+
+class StaticAssetCache:
+    """Attaches the shared asset store to every launched browser"""
+    
+    def __init__(self):
+        self.enabled = STATIC_CACHE_CONFIG["enabled"]
+        self._store: Optional[StaticAssetStore] = None
+        self.sessions: "weakref.WeakSet[CDPSession]" = weakref.WeakSet()
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=STATIC_CACHE_CONFIG["workers"], thread_name_prefix="static-cache")
+    
+    @property
+    def store(self) -> StaticAssetStore:
+        with self.lock:
+            if self._store is None:
+                self._store = StaticAssetStore()
+            return self._store
+    
+    def attach(self, driver) -> bool:
+        """Start serving a browser's static assets from the shared store"""
+        if not self.enabled:
+            return False
+        
+        session = cdp_sessions.get(driver)
+        if not session:
+            return False
+        try:
+            StaticAssetInterceptor(session, self.store, self.executor).enable()
+            self.sessions.add(session)
+            return True
+        except Exception as e:
+            print(f"⚠️ Static cache bağlanamadı: {e}")
+            return False
+    
+    def patterns_for(self, session: CDPSession) -> List[Dict[str, str]]:
+        """Fetch patterns the cache needs on a session, for interceptors that re-enable Fetch"""
+        return fetch_patterns() if session in self.sessions else []
+    
+    def flush(self):
+        """Write a pending index update, e.g. on shutdown"""
+        with self.lock:
+            store = self._store
+        if store:
+            store.flush()
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get store statistics"""
+        if not self.enabled:
+            return {"enabled": False}
+        return {"enabled": True, **self.store.get_status()}
+
+
+# Process-wide asset cache shared by all browsers
+static_cache = StaticAssetCache()
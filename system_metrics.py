@@ -0,0 +1,358 @@
+"""
+System Metrics Sampler for Ubuntu Chrome Automation
+Reads /proc on a fixed interval and serves cached snapshots to health checks
+"""
+
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, Set
+
+from config import METRICS_CONFIG, PROFILES_DIR, DOWNLOADS_DIR
+
+PROC_DIR = Path("/proc")
+SHM_DIR = Path("/dev/shm")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+CHROME_PROCESS_NAMES = ("chrome", "chromedriver", "undetected_chromedriver")
+
+
+def read_loadavg() -> Tuple[float, float, float]:
+    """Read 1, 5 and 15 minute load averages"""
+    with open(PROC_DIR / "loadavg") as f:
+        parts = f.read().split()
+    return float(parts[0]), float(parts[1]), float(parts[2])
+
+
+def read_meminfo() -> Dict[str, int]:
+    """Read /proc/meminfo values in bytes"""
+    meminfo = {}
+    with open(PROC_DIR / "meminfo") as f:
+        for line in f:
+            key, value = line.split(":", 1)
+            fields = value.split()
+            amount = int(fields[0])
+            if len(fields) > 1 and fields[1] == "kB":
+                amount *= 1024
+            meminfo[key] = amount
+    return meminfo
+
+
+def read_cpu_times() -> Tuple[int, int]:
+    """Read total and idle CPU ticks of the host"""
+    with open(PROC_DIR / "stat") as f:
+        fields = [int(x) for x in f.readline().split()[1:]]
+    idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+    return sum(fields), idle
+
+
+def read_process_stat(pid: int) -> Optional[Dict[str, Any]]:
+    """Read name, state, parent, CPU ticks and RSS of a process"""
+    try:
+        with open(PROC_DIR / str(pid) / "stat") as f:
+            data = f.read()
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+    
+    # comm may contain spaces, it is wrapped in parentheses
+    name = data[data.index("(") + 1:data.rindex(")")]
+    fields = data[data.rindex(")") + 2:].split()
+    return {
+        "pid": pid,
+        "name": name,
+        "state": fields[0],
+        "ppid": int(fields[1]),
+        "cpu_ticks": int(fields[11]) + int(fields[12]),
+        "rss_bytes": int(fields[21]) * PAGE_SIZE
+    }
+
+
+def read_all_processes() -> Dict[int, Dict[str, Any]]:
+    """Read stat of every process on the host"""
+    processes = {}
+    for entry in os.scandir(PROC_DIR):
+        if entry.name.isdigit():
+            stat = read_process_stat(int(entry.name))
+            if stat:
+                processes[stat["pid"]] = stat
+    return processes
+
+
+def get_process_tree(root_pids: Set[int], processes: Dict[int, Dict[str, Any]] = None) -> List[int]:
+    """Get PIDs of the given processes and all of their descendants"""
+    processes = processes if processes is not None else read_all_processes()
+    children: Dict[int, List[int]] = {}
+    for stat in processes.values():
+        children.setdefault(stat["ppid"], []).append(stat["pid"])
+    
+    tree = []
+    stack = [pid for pid in root_pids if pid in processes]
+    seen = set()
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def get_directory_size(path: Path) -> int:
+    """Get total size of files under a directory"""
+    total = 0
+    stack = [str(path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
+
+
+def format_bytes(amount: int) -> str:
+    """Format byte count as GB/MB string"""
+    if amount >= 1024 ** 3:
+        return f"{amount / 1024 ** 3:.1f}GB"
+    return f"{amount / 1024 ** 2:.0f}MB"
+
+
+class SystemMetricsSampler:
+    """Samples host and Chrome process metrics in the background"""
+    
+    def __init__(self, interval: float = None):
+        self.interval = interval or METRICS_CONFIG["sample_interval"]
+        self.disk_sample_every = METRICS_CONFIG["disk_sample_every"]
+        self.browser_pids: Set[int] = set()
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.lock = threading.Lock()
+        self._sample_count = 0
+        self._last_cpu: Optional[Tuple[int, int]] = None
+        self._last_process_ticks: Dict[int, int] = {}
+        self._last_sample_time: Optional[float] = None
+        self._disk: Dict[str, Any] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start background sampling thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop background sampling thread"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+    
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"⚠️ Metrics sampling hatası: {e}")
+            self._stop_event.wait(self.interval)
+    
+    def track_browser(self, driver):
+        """Track Chrome and chromedriver processes of a driver"""
+        pids = [getattr(driver, "browser_pid", None)]
+        service = getattr(driver, "service", None)
+        process = getattr(service, "process", None) if service else None
+        pids.append(getattr(process, "pid", None))
+        
+        with self.lock:
+            self.browser_pids.update(pid for pid in pids if pid)
+    
+    def get_snapshot(self) -> Dict[str, Any]:
+        """
+        Get latest cached snapshot without sampling on the caller's thread
+        
+        Callers run on the event loop, and a full sample walks the profile
+        directories. Without any snapshot yet (sampler not started) a light
+        one from /proc and statvfs is returned instead, with no Chrome
+        process data and the last known directory sizes.
+        """
+        with self.lock:
+            snapshot = self.snapshot
+        return snapshot if snapshot is not None else self._light_snapshot()
+    
+    def _light_snapshot(self) -> Dict[str, Any]:
+        load_1m, load_5m, load_15m = read_loadavg()
+        meminfo = read_meminfo()
+        mem_total = meminfo.get("MemTotal", 0)
+        mem_available = meminfo.get("MemAvailable", meminfo.get("MemFree", 0))
+        usage = shutil.disk_usage(PROFILES_DIR)
+        now = time.time()
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "sampled_at": now,
+            "cpu": {
+                "percent": None,
+                "count": os.cpu_count() or 1,
+                "load_1m": load_1m,
+                "load_5m": load_5m,
+                "load_15m": load_15m
+            },
+            "memory": {
+                "total_bytes": mem_total,
+                "available_bytes": mem_available,
+                "used_percent": round(100.0 * (mem_total - mem_available) / mem_total, 1) if mem_total else None,
+                "swap_used_bytes": meminfo.get("SwapTotal", 0) - meminfo.get("SwapFree", 0)
+            },
+            "chrome": {"process_count": 0, "rss_bytes": 0, "cpu_percent": 0.0, "processes": []},
+            "shm": self._sample_shm(),
+            "disk": {
+                "profiles_bytes": self._disk.get("profiles_bytes", 0),
+                "downloads_bytes": self._disk.get("downloads_bytes", 0),
+                "free_bytes": usage.free,
+                "total_bytes": usage.total,
+                "sampled_at": self._disk.get("sampled_at")
+            }
+        }
+    
+    def sample(self) -> Dict[str, Any]:
+        """Take a new snapshot of host and Chrome process metrics"""
+        now = time.time()
+        elapsed = now - self._last_sample_time if self._last_sample_time else None
+        
+        load_1m, load_5m, load_15m = read_loadavg()
+        meminfo = read_meminfo()
+        total_ticks, idle_ticks = read_cpu_times()
+        
+        cpu_percent = None
+        if self._last_cpu:
+            total_delta = total_ticks - self._last_cpu[0]
+            idle_delta = idle_ticks - self._last_cpu[1]
+            if total_delta > 0:
+                cpu_percent = round(100.0 * (total_delta - idle_delta) / total_delta, 1)
+        self._last_cpu = (total_ticks, idle_ticks)
+        
+        chrome = self._sample_chrome_processes(elapsed)
+        
+        if self._sample_count % self.disk_sample_every == 0:
+            self._disk = self._sample_disk()
+        self._sample_count += 1
+        self._last_sample_time = now
+        
+        mem_total = meminfo.get("MemTotal", 0)
+        mem_available = meminfo.get("MemAvailable", meminfo.get("MemFree", 0))
+        snapshot = {
+            "timestamp": datetime.now().isoformat(),
+            "sampled_at": now,
+            "cpu": {
+                "percent": cpu_percent,
+                "count": os.cpu_count() or 1,
+                "load_1m": load_1m,
+                "load_5m": load_5m,
+                "load_15m": load_15m
+            },
+            "memory": {
+                "total_bytes": mem_total,
+                "available_bytes": mem_available,
+                "used_percent": round(100.0 * (mem_total - mem_available) / mem_total, 1) if mem_total else None,
+                "swap_used_bytes": meminfo.get("SwapTotal", 0) - meminfo.get("SwapFree", 0)
+            },
+            "chrome": chrome,
+            "shm": self._sample_shm(),
+            "disk": self._disk
+        }
+        
+        with self.lock:
+            self.snapshot = snapshot
+        return snapshot
+    
+    def _sample_chrome_processes(self, elapsed: Optional[float]) -> Dict[str, Any]:
+        processes = read_all_processes()
+        
+        with self.lock:
+            # Forget browsers whose root process is gone
+            self.browser_pids &= set(processes)
+            roots = set(self.browser_pids)
+        roots.add(os.getpid())
+        
+        chrome_processes = []
+        ticks = {}
+        for pid in get_process_tree(roots, processes):
+            stat = processes[pid]
+            if not stat["name"].startswith(CHROME_PROCESS_NAMES):
+                continue
+            
+            ticks[pid] = stat["cpu_ticks"]
+            cpu_percent = None
+            if elapsed and pid in self._last_process_ticks:
+                tick_delta = stat["cpu_ticks"] - self._last_process_ticks[pid]
+                cpu_percent = round(100.0 * tick_delta / CLOCK_TICKS / elapsed, 1)
+            
+            chrome_processes.append({
+                "pid": pid,
+                "name": stat["name"],
+                "rss_bytes": stat["rss_bytes"],
+                "cpu_percent": cpu_percent
+            })
+        self._last_process_ticks = ticks
+        
+        return {
+            "process_count": len(chrome_processes),
+            "rss_bytes": sum(p["rss_bytes"] for p in chrome_processes),
+            "cpu_percent": round(sum(p["cpu_percent"] or 0 for p in chrome_processes), 1),
+            "processes": chrome_processes
+        }
+    
+    def _sample_shm(self) -> Optional[Dict[str, Any]]:
+        if not SHM_DIR.exists():
+            return None
+        usage = shutil.disk_usage(SHM_DIR)
+        return {
+            "used_bytes": usage.used,
+            "total_bytes": usage.total,
+            "used_percent": round(100.0 * usage.used / usage.total, 1) if usage.total else 0.0
+        }
+    
+    def _sample_disk(self) -> Dict[str, Any]:
+        usage = shutil.disk_usage(PROFILES_DIR)
+        return {
+            "profiles_bytes": get_directory_size(PROFILES_DIR),
+            "downloads_bytes": get_directory_size(DOWNLOADS_DIR),
+            "free_bytes": usage.free,
+            "total_bytes": usage.total,
+            "sampled_at": time.time()
+        }
+    
+    def get_summary(self) -> Dict[str, Any]:
+        """Get human readable summary of the latest snapshot"""
+        snapshot = self.get_snapshot()
+        cpu = snapshot["cpu"]
+        memory = snapshot["memory"]
+        disk = snapshot["disk"]
+        cpu_percent = cpu["percent"] if cpu["percent"] is not None else 100.0 * cpu["load_1m"] / cpu["count"]
+        
+        return {
+            "cpu": f"{cpu_percent:.0f}%",
+            "memory": f"{format_bytes(memory['total_bytes'] - memory['available_bytes'])}/{format_bytes(memory['total_bytes'])}",
+            "disk": f"{format_bytes(disk['total_bytes'] - disk['free_bytes'])}/{format_bytes(disk['total_bytes'])}",
+            "load": [cpu["load_1m"], cpu["load_5m"], cpu["load_15m"]],
+            "chromeProcesses": snapshot["chrome"]["process_count"],
+            "chromeMemory": format_bytes(snapshot["chrome"]["rss_bytes"]),
+            "profilesSize": format_bytes(disk["profiles_bytes"]),
+            "downloadsSize": format_bytes(disk["downloads_bytes"]),
+            "sampledAt": snapshot["timestamp"]
+        }
+
+
+# Process-wide sampler shared by the API servers and Chrome manager
+system_sampler = SystemMetricsSampler()
@@ -0,0 +1,208 @@
+"""
+TOTP 2FA Test Script
+handle_2fa'yı RFC 6238 vektörleri ve yerel bir login stub sayfası ile test etmek için
+"""
+
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+import requests
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+import chrome_automation
+from chrome_automation import ChromeAutomation
+from totp import generate_totp, normalize_secret
+
+# RFC 6238 test secret "12345678901234567890"
+RFC_SECRET = "GEZDGNBVGY3TQOJQGEZDGNBVGY3TQOJQ"
+STUB_SECRET = "JBSW Y3DP EHPK 3PXP"
+
+CHALLENGE_PAGE = """<!DOCTYPE html>
+<html>
+<body>
+  <form method="post" action="/verify">
+    <p>{message}</p>
+    <input type="tel" name="totpPin" autocomplete="one-time-code">
+    <button id="totpNext" type="submit">Next</button>
+  </form>
+</body>
+</html>
+"""
+
+
+class StubLoginHandler(BaseHTTPRequestHandler):
+    """Google 2-Step Verification challenge stub"""
+    
+    received_codes = []
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send_page(self, body: str):
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def do_GET(self):
+        if self.path == "/success":
+            self._send_page("<html><body>Logged in</body></html>")
+        else:
+            self._send_page(CHALLENGE_PAGE.format(message="Enter code"))
+    
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        code = form.get("totpPin", [""])[0]
+        self.received_codes.append(code)
+        
+        # Accept the current and the previous window like Google does
+        now = time.time()
+        valid = {generate_totp(STUB_SECRET, now), generate_totp(STUB_SECRET, now - 30)}
+        if code in valid:
+            self.send_response(303)
+            self.send_header("Location", "/success")
+            self.end_headers()
+        else:
+            self._send_page(CHALLENGE_PAGE.format(message="Wrong code. Try again."))
+
+
+class FakePinInput:
+    """totpPin input stub, records what handle_2fa types"""
+    
+    def __init__(self):
+        self.typed = []
+    
+    def clear(self):
+        self.typed.clear()
+    
+    def send_keys(self, keys):
+        self.typed.append(keys)
+
+
+class FakeNextButton:
+    def __init__(self):
+        self.clicked = False
+    
+    def click(self):
+        self.clicked = True
+
+
+class FakeDriver:
+    """WebDriver stub for the challenge page, no Chrome needed"""
+    
+    def __init__(self, with_next_button: bool = True):
+        self.pin_input = FakePinInput()
+        self.next_button = FakeNextButton() if with_next_button else None
+    
+    def find_element(self, by, value):
+        if (by, value) == (By.NAME, "totpPin"):
+            return self.pin_input
+        if (by, value) == (By.ID, "totpNext") and self.next_button:
+            return self.next_button
+        raise NoSuchElementException(value)
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubLoginHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_rfc6238_vectors():
+    """RFC 6238 SHA1 test vektörleri"""
+    assert generate_totp(RFC_SECRET, 59, digits=8) == "94287082"
+    assert generate_totp(RFC_SECRET, 1111111109, digits=8) == "07081804"
+    assert generate_totp(RFC_SECRET, 1111111111, digits=8) == "14050471"
+    assert generate_totp(RFC_SECRET, 1234567890, digits=8) == "89005924"
+    assert generate_totp(RFC_SECRET, 2000000000, digits=8) == "69279037"
+
+
+def test_secret_format_from_google():
+    """Google'ın gösterdiği boşluklu küçük harf secret"""
+    assert normalize_secret("jbsw y3dp ehpk 3pxp") == normalize_secret("JBSWY3DPEHPK3PXP")
+    assert len(generate_totp(STUB_SECRET)) == 6
+
+
+def test_stub_accepts_generated_code(stub_url):
+    """Stub sayfası yerel üretilen kodu kabul etmeli"""
+    response = requests.post(f"{stub_url}/verify", data={"totpPin": generate_totp(STUB_SECRET)})
+    assert response.url.endswith("/success")
+
+
+def test_stub_rejects_wrong_code(stub_url):
+    """Stub sayfası yanlış kodu reddetmeli"""
+    response = requests.post(f"{stub_url}/verify", data={"totpPin": "000000x"})
+    assert "Wrong code" in response.text
+
+
+def test_handle_2fa_without_secret_fails_fast():
+    """Secret yoksa 30 saniye beklemeden başarısız olmalı"""
+    automation = ChromeAutomation()
+    
+    start = time.time()
+    assert automation.handle_2fa(None) is False
+    assert time.time() - start < 1
+
+
+def test_handle_2fa_with_stub_driver(monkeypatch):
+    """handle_2fa kodu girip Next'e basmalı ve challenge kaybolunca başarılı olmalı"""
+    waits = []
+    monkeypatch.setattr(chrome_automation.dom_watcher, "wait_for",
+                        lambda driver, selectors, state, timeout: waits.append((selectors, state)) or True)
+    automation = ChromeAutomation()
+    automation.driver = FakeDriver()
+    
+    assert automation.handle_2fa(STUB_SECRET) is True
+    now = time.time()
+    assert automation.driver.pin_input.typed[-1] in {generate_totp(STUB_SECRET, now), generate_totp(STUB_SECRET, now - 30)}
+    assert automation.driver.next_button.clicked
+    assert waits == [(['input[name="totpPin"]'], "hidden")]
+
+
+def test_handle_2fa_rejected_code_with_stub_driver(monkeypatch):
+    """Challenge sayfası kaybolmazsa başarısız olmalı, Next yoksa Enter ile göndermeli"""
+    monkeypatch.setattr(chrome_automation.dom_watcher, "wait_for", lambda driver, selectors, state, timeout: False)
+    automation = ChromeAutomation()
+    automation.driver = FakeDriver(with_next_button=False)
+    
+    assert automation.handle_2fa(STUB_SECRET) is False
+    assert automation.driver.pin_input.typed[-1] == chrome_automation.Keys.ENTER
+
+
+@pytest.mark.skipif(
+    not any(shutil.which(name) for name in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser")),
+    reason="Chrome kurulu değil"
+)
+def test_handle_2fa_against_stub_page(stub_url):
+    """handle_2fa kodu üretip stub challenge sayfasına göndermeli"""
+    from selenium import webdriver
+    
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    driver = webdriver.Chrome(options=options)
+    
+    try:
+        driver.get(f"{stub_url}/challenge")
+        automation = ChromeAutomation()
+        automation.driver = driver
+        
+        start = time.time()
+        assert automation.handle_2fa(STUB_SECRET) is True
+        assert time.time() - start < 10
+        assert driver.current_url.endswith("/success")
+        now = time.time()
+        assert StubLoginHandler.received_codes[-1] in {generate_totp(STUB_SECRET, now), generate_totp(STUB_SECRET, now - 30)}
+    finally:
+        driver.quit()
@@ -0,0 +1,61 @@
+"""
+TOTP Generator for Ubuntu Chrome Automation
+RFC 6238 one-time codes for Google 2-Step Verification
+"""
+
+import base64
+import hashlib
+import hmac
+import struct
+import time
+from typing import Optional
+
+from config import TOTP_CONFIG
+
+
+def normalize_secret(secret: str) -> bytes:
+    """Decode a base32 secret as shown by Google ('abcd efgh ...', any case, no padding)"""
+    cleaned = secret.replace(" ", "").replace("-", "").upper()
+    cleaned += "=" * (-len(cleaned) % 8)
+    return base64.b32decode(cleaned)
+
+
+def generate_totp(secret: str, timestamp: Optional[float] = None, digits: int = None,
+                  period: int = None, digest=hashlib.sha1) -> str:
+    """
+    Generate a TOTP code
+    
+    Args:
+        secret: Base32 encoded shared secret
+        timestamp: Unix time to generate the code for (defaults to now)
+        digits: Code length
+        period: Seconds one code is valid
+        digest: HMAC hash function
+    
+    Returns:
+        Zero padded numeric code
+    """
+    digits = digits or TOTP_CONFIG["digits"]
+    period = period or TOTP_CONFIG["period"]
+    timestamp = timestamp if timestamp is not None else time.time()
+    
+    counter = int(timestamp // period)
+    mac = hmac.new(normalize_secret(secret), struct.pack(">Q", counter), digest).digest()
+    offset = mac[-1] & 0x0F
+    code = struct.unpack(">I", mac[offset:offset + 4])[0] & 0x7FFFFFFF
+    return str(code % 10 ** digits).zfill(digits)
+
+
+def seconds_remaining(timestamp: Optional[float] = None, period: int = None) -> float:
+    """Get seconds until the current code expires"""
+    period = period or TOTP_CONFIG["period"]
+    timestamp = timestamp if timestamp is not None else time.time()
+    return period - timestamp % period
+
+
+def generate_fresh_totp(secret: str) -> str:
+    """Generate a code that stays valid long enough to be typed and submitted"""
+    remaining = seconds_remaining()
+    if remaining < TOTP_CONFIG["min_validity_seconds"]:
+        time.sleep(remaining)
+    return generate_totp(secret)
@@ -0,0 +1,231 @@
+"""
+Video Downloader for Ubuntu Chrome Automation
+Streams finished videos into media/downloaded_videos, resuming interrupted transfers with HTTP Range
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any
+from urllib.parse import urlparse
+
+import requests
+
+from config import DOWNLOAD_CONFIG, DOWNLOADED_VIDEOS_DIR
+from generation_watcher import build_http_session
+from metrics import STEP_DURATION, DOWNLOADED_BYTES
+
+# Errors after which the transfer is resumed from the bytes already on disk
+RESUMABLE_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError
+)
+
+
+class DownloadError(Exception):
+    """Video could not be downloaded"""
+
+
+def format_file_size(size: int) -> str:
+    """Format a byte count like the callback's fileSize field ("5.2MB")"""
+    return f"{size / 1024 / 1024:.1f}MB"
+
+
+def safe_filename(name: str) -> str:
+    """Strip everything but a plain file name"""
+    return re.sub(r"[^A-Za-z0-9._-]", "_", name).strip("._") or "video"
+
+
+class VideoDownloader:
+    """
+    Downloads videos with the browser's cookies in fixed-size chunks
+    
+    Bytes go to <name>.part next to the target and are hashed while they
+    are written. An interrupted transfer continues from the .part size
+    with a Range request (guarded by If-Range so a changed file starts
+    over), and the finished file is fsynced and renamed into place, so
+    the media directory never shows a partial video.
+    """
+    
+    def __init__(self, target_dir: Path = None):
+        self.target_dir = Path(target_dir or DOWNLOADED_VIDEOS_DIR)
+        self.target_dir.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = DOWNLOAD_CONFIG["chunk_size"]
+    
+    def download(self, url: str, name: str, web_session: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Download a video
+        
+        Args:
+            url: Video URL
+            name: File name without extension (e.g. the job ID)
+            web_session: Cookies and user agent of the browser that can see the video
+        
+        Returns:
+            {"filename", "path", "size", "sha256", "content_type", "resumes"}
+        """
+        http = build_http_session(web_session or {})
+        try:
+            with STEP_DURATION.time(step="video_download"):
+                return self._download(http, url, safe_filename(name))
+        finally:
+            http.close()
+    
+    def _download(self, http: requests.Session, url: str, name: str) -> Dict[str, Any]:
+        part_path = self.target_dir / f"{name}.part"
+        meta_path = self.target_dir / f"{name}.part.json"
+        meta = self._load_meta(meta_path, url)
+        hasher, offset = self._resume_state(part_path, meta)
+        resumes = 0
+        
+        for attempt in range(DOWNLOAD_CONFIG["max_retries"] + 1):
+            # Byte offsets must refer to the stored bytes, not a compressed stream
+            headers = {"Accept-Encoding": "identity"}
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+                if meta.get("validator"):
+                    headers["If-Range"] = meta["validator"]
+            
+            try:
+                with http.get(url, headers=headers, stream=True, timeout=DOWNLOAD_CONFIG["request_timeout"]) as response:
+                    if offset and response.status_code == 416 and meta.get("total") == offset:
+                        break
+                    response.raise_for_status()
+                    if offset and response.status_code != 206:
+                        # Server ignored the range or the file changed, start over
+                        hasher, offset = hashlib.sha256(), 0
+                    
+                    meta.update(self._response_meta(response, offset))
+                    self._save_meta(meta_path, meta)
+                    
+                    with open(part_path, "r+b" if offset else "wb") as f:
+                        f.seek(offset)
+                        f.truncate()
+                        try:
+                            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                                f.write(chunk)
+                                hasher.update(chunk)
+                                offset += len(chunk)
+                                DOWNLOADED_BYTES.inc(len(chunk), resumed=str(resumes > 0).lower())
+                        finally:
+                            f.flush()
+                            os.fsync(f.fileno())
+                
+                if meta.get("total") is None or offset >= meta["total"]:
+                    break
+                raise requests.exceptions.ChunkedEncodingError(f"{offset}/{meta['total']} byte alındı")
+            
+            except RESUMABLE_ERRORS + (requests.HTTPError,) as e:
+                status = e.response.status_code if isinstance(e, requests.HTTPError) and e.response is not None else None
+                if isinstance(e, requests.HTTPError) and status not in DOWNLOAD_CONFIG["retry_statuses"]:
+                    raise DownloadError(f"İndirme hatası: {e}")
+                if attempt >= DOWNLOAD_CONFIG["max_retries"]:
+                    raise DownloadError(f"İndirme {attempt + 1} denemede tamamlanamadı: {e}")
+                resumes += 1
+                delay = DOWNLOAD_CONFIG["retry_backoff"] * 2 ** attempt
+                if status:
+                    # Throttled or failing server, wait at least as long as it asks
+                    delay = max(delay, self._retry_after(e.response))
+                print(f"⚠️ İndirme kesildi ({offset} byte), {delay}s sonra devam ediliyor: {e}")
+                time.sleep(delay)
+        
+        extension = self._extension(url, meta.get("content_type"))
+        filename = f"{name}{extension}"
+        target = self.target_dir / filename
+        os.replace(part_path, target)
+        self._fsync_dir()
+        meta_path.unlink(missing_ok=True)
+        
+        print(f"✅ Video indirildi: {filename} ({format_file_size(offset)})")
+        return {
+            "filename": filename,
+            "path": str(target),
+            "size": offset,
+            "sha256": hasher.hexdigest(),
+            "content_type": meta.get("content_type"),
+            "resumes": resumes
+        }
+    
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float:
+        """Seconds from a Retry-After header, 0 if missing or an HTTP date"""
+        value = response.headers.get("Retry-After", "")
+        if not value.strip().isdigit():
+            return 0
+        return min(int(value), DOWNLOAD_CONFIG["max_retry_after"])
+    
+    def _resume_state(self, part_path: Path, meta: Dict[str, Any]):
+        """Hash the bytes a previous run left in the .part file"""
+        hasher = hashlib.sha256()
+        if "total" not in meta or not part_path.exists():
+            return hasher, 0
+        offset = 0
+        with open(part_path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                hasher.update(chunk)
+                offset += len(chunk)
+        return hasher, offset
+    
+    @staticmethod
+    def _response_meta(response: requests.Response, offset: int) -> Dict[str, Any]:
+        content_range = response.headers.get("Content-Range", "")
+        if "/" in content_range and not content_range.endswith("/*"):
+            total = int(content_range.rsplit("/", 1)[1])
+        elif response.headers.get("Content-Length"):
+            total = offset + int(response.headers["Content-Length"])
+        else:
+            total = None
+        # Only strong ETags or Last-Modified may guard a range request
+        etag = response.headers.get("ETag")
+        validator = etag if etag and not etag.startswith("W/") else response.headers.get("Last-Modified")
+        return {
+            "total": total,
+            "validator": validator,
+            "content_type": response.headers.get("Content-Type", "").split(";")[0] or None
+        }
+    
+    @staticmethod
+    def _load_meta(meta_path: Path, url: str) -> Dict[str, Any]:
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+        return meta if meta.get("url") == url else {"url": url}
+    
+    @staticmethod
+    def _save_meta(meta_path: Path, meta: Dict[str, Any]):
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+    
+    @staticmethod
+    def _extension(url: str, content_type: Optional[str]) -> str:
+        suffix = Path(urlparse(url).path).suffix.lower()
+        if re.fullmatch(r"\.[a-z0-9]{2,4}", suffix):
+            return suffix
+        return mimetypes.guess_extension(content_type or "") or ".mp4"
+    
+    def _fsync_dir(self):
+        """Persist the rename itself"""
+        try:
+            fd = os.open(self.target_dir, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+    
+    @staticmethod
+    def public_url(filename: str) -> str:
+        """URL the website loads a downloaded video from"""
+        return DOWNLOAD_CONFIG["public_url"].format(filename=filename)
+
+
+# Process-wide downloader for finished videos
+video_downloader = VideoDownloader()